@@ -5,11 +5,25 @@
 # --------------------------------------------------------------------------
 """Module for Model class for modelling sessions data."""
 
+import os
 from collections import defaultdict
-from typing import List, Union, Dict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
+
+import numpy as np
 
 from .utils.data_structures import Cmd
-from .utils import cmds_only, cmds_params_only, cmds_params_values, probabilities
+from .utils import (
+    cmds_only,
+    cmds_params_only,
+    cmds_params_values,
+    model_io,
+    probabilities,
+)
+from .utils.log_likelihood import EncodedSessions, LogLikelihoodScorer
 from ...common.exceptions import MsticpyException
 
 
@@ -18,8 +32,24 @@ from ...common.exceptions import MsticpyException
 class Model:
     """Class for modelling sessions data."""
 
+    # restored from the saved tables of a model loaded with `load` when first used
+    _seq1_counts = model_io.SavedTable("seq1_counts")
+    _seq2_counts = model_io.SavedTable("seq2_counts")
+    _param_counts = model_io.SavedTable("param_counts")
+    _cmd_param_counts = model_io.SavedTable("cmd_param_counts")
+    _value_counts = model_io.SavedTable("value_counts")
+    _param_value_counts = model_io.SavedTable("param_value_counts")
+    prior_probs = model_io.SavedTable("prior_probs")
+    trans_probs = model_io.SavedTable("trans_probs")
+    param_probs = model_io.SavedTable("param_probs")
+    param_cond_cmd_probs = model_io.SavedTable("param_cond_cmd_probs")
+    value_probs = model_io.SavedTable("value_probs")
+    value_cond_param_probs = model_io.SavedTable("value_cond_param_probs")
+
     def __init__(
-        self, sessions: List[List[Union[str, Cmd]]], modellable_params: set = None
+        self,
+        sessions: Optional[List[List[Union[str, Cmd]]]],
+        modellable_params: set = None,
     ):
         """
         Instantiate the Model class.
@@ -32,7 +62,7 @@ class Model:
 
         Parameters
         ----------
-        sessions: List[List[Union[str, Cmd]]]
+        sessions: Optional[List[List[Union[str, Cmd]]]]
             list of sessions, where each session is a list of either
             strings or a list of the Cmd datatype.
 
@@ -50,6 +80,9 @@ class Model:
             Cmd(name='Set-Mailbox',
             params={'Identity': 'blahblah', 'AuditEnabled': 'false'})]
 
+            If None, the model is created without any sessions. This is
+            used by `Model.load` to restore a saved model.
+
         modellable_params: set, optional
             set of params which you deem to have categorical values which are suitable
             for modelling.
@@ -59,26 +92,17 @@ class Model:
             which params have values which are suitable for modelling.
 
         """
-        if not isinstance(sessions, list):
-            raise MsticpyException("`sessions` should be a list")
-        if not sessions:
-            raise MsticpyException("`sessions` should not be an empty list")
-        for i, ses in enumerate(sessions):
-            if not isinstance(ses, list):
-                raise MsticpyException("each session in `sessions` should be a list")
-            if len(ses) == 0:
-                raise MsticpyException(
-                    f"session at index {i} of `sessions` is empty. Each session "
-                    "should contain at least one command"
-                )
+        if sessions is not None:
+            _validate_sessions(sessions)
 
         self.start_token = "##START##"  # nosec B105
         self.end_token = "##END##"  # nosec B105
         self.unk_token = "##UNK##"  # nosec B105
 
-        self.sessions = sessions
-        self.session_type = None
-        self._asses_input()
+        self.sessions: List[List[Union[str, Cmd]]] = sessions or []
+        self.session_type: Optional[str] = None
+        if sessions is not None:
+            self._asses_input()
 
         # non laplace smoothed counts
         self._seq1_counts = None
@@ -105,10 +129,16 @@ class Model:
         self.value_probs = None
         self.value_cond_param_probs = None
 
-        self.set_params_cond_cmd_probs = {}  # type: Dict[str, Dict[str, float]]
+        self.set_params_cond_cmd_probs = {}  # type: Dict[str, Dict[tuple, float]]
 
-        self.session_likelihoods = None
-        self.session_geomean_likelihoods = None
+        self.session_likelihoods: Optional[List[float]] = None
+        self.session_log_likelihoods: Optional[List[float]] = None
+        self.session_geomean_likelihoods: Optional[List[float]] = None
+        self._saved_tables: Optional[model_io.ModelTables] = None
+        self._scorer: Optional[LogLikelihoodScorer] = None
+        self._encoded_sessions: Optional[
+            Tuple[List[List[Union[str, Cmd]]], EncodedSessions]
+        ] = None
 
         self.rare_windows = {}  # type: Dict[int, list]
         self.rare_window_likelihoods = {}  # type: Dict[int, list]
@@ -116,15 +146,73 @@ class Model:
         self.rare_windows_geo = {}  # type: Dict[int, list]
         self.rare_window_likelihoods_geo = {}  # type: Dict[int, list]
 
-    def train(self):
+    def train(self, n_jobs: int = 1):
         """
         Train the model by computing counts and probabilities.
 
         In particular, computes the counts and probabilities of the commands
         (and possibly the params if provided, and possibly the values if provided)
 
+        Parameters
+        ----------
+        n_jobs: int, optional
+            Number of processes to use to compute the counts, by default 1.
+            If -1, all available CPUs are used. The sessions are split
+            into chunks which are counted in separate processes and the
+            counts are then added together.
+
         """
-        self._compute_counts()
+        self._compute_counts(n_jobs=n_jobs)
+        self._laplace_smooth_counts()
+        self._compute_probs()
+
+    def partial_fit(self, sessions: List[List[Union[str, Cmd]]], n_jobs: int = 1):
+        """
+        Update the model with additional sessions.
+
+        The counts for `sessions` are added to the existing counts of the
+        model and the smoothed counts and probabilities are then recomputed
+        from the updated counts. This gives the same model as training on
+        all of the sessions, but only the new sessions need to be counted.
+
+        Parameters
+        ----------
+        sessions: List[List[Union[str, Cmd]]]
+            list of new sessions. These should be in the same format as
+            the sessions used to create the model.
+        n_jobs: int, optional
+            Number of processes to use to compute the counts, by default 1.
+            If -1, all available CPUs are used.
+
+        Notes
+        -----
+        `sessions` are appended to the `sessions` attribute of the model.
+        If the model has not yet been trained, the counts for the existing
+        `sessions` attribute are computed first.
+        If `modellable_params` were determined from the data when the model
+        was first trained, they are not re-evaluated.
+
+        """
+        _validate_sessions(sessions)
+        session_type = _get_session_type(sessions)
+        if session_type != self.session_type:
+            raise MsticpyException(
+                "`sessions` should be in the same format as the sessions "
+                f"used to create the model ({self.session_type})"
+            )
+        if self._seq1_counts is None:
+            self._compute_counts(n_jobs=n_jobs)
+        new_counts = _count_sessions(
+            sessions=sessions,
+            session_type=session_type,
+            start_token=self.start_token,
+            end_token=self.end_token,
+            unk_token=self.unk_token,
+            n_jobs=n_jobs,
+        )
+        for counts, session_counts in zip(self._get_counts(), new_counts):
+            _add_counts(counts, session_counts)
+        self.sessions = self.sessions + sessions
         self._laplace_smooth_counts()
         self._compute_probs()
 
@@ -153,10 +241,6 @@ class Model:
             of the sessions respectively before the calculations are done.
 
         """
-        if self.prior_probs is None:
-            raise MsticpyException(
-                "please train the model first before using this method"
-            )
         self.compute_likelihoods_of_sessions(use_start_end_tokens=use_start_end_tokens)
         self.compute_geomean_lik_of_sessions()
         self.compute_rarest_windows(
@@ -166,7 +250,84 @@ class Model:
             window_len=3, use_geo_mean=False, use_start_end_tokens=use_start_end_tokens
         )
 
-    def _compute_counts(self):
+    def save(self, path: Union[str, Path]):
+        """
+        Save the trained model to the folder `path`.
+
+        The vocabulary of commands/params/values, the non laplace smoothed
+        counts and the probabilities are saved as NumPy arrays (plus a
+        JSON file of metadata) rather than pickled dicts, so that the
+        model can be loaded with `Model.load` and used to score new
+        sessions without retraining. The sessions are not saved.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            folder to save the model to. This is created if it does
+            not exist and any existing saved model in it is overwritten.
+
+        Raises
+        ------
+        MsticpyException
+            If the model has not been trained.
+
+        """
+        if self.prior_probs is None or self._seq1_counts is None:
+            raise MsticpyException("Please train the model before saving it.")
+        model_io.save_model(self, path, counts=self._get_counts())
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        sessions: Optional[List[List[Union[str, Cmd]]]] = None,
+        mmap: bool = True,
+    ) -> "Model":
+        """
+        Load a model saved with `Model.save`.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            folder the model was saved to
+        sessions: List[List[Union[str, Cmd]]], optional
+            sessions to score with the loaded model. These should be in the
+            same format as the sessions the model was trained on.
+            If not supplied, the `sessions` attribute of the model is
+            an empty list and should be set before computing scores.
+        mmap: bool, optional
+            If True (the default), the saved arrays are memory-mapped read
+            only rather than read into memory, so processes which load the
+            same model share the pages of the files.
+
+        Returns
+        -------
+        Model
+            the trained model. Scores are computed directly from the saved
+            arrays. The probabilities and the non laplace smoothed counts
+            are restored as dicts when they are first used (e.g. by
+            `partial_fit`).
+
+        Raises
+        ------
+        MsticpyException
+            If `path` does not contain a saved model or `sessions` are
+            not in the format the model was trained on.
+
+        """
+        model = cls(sessions=None)
+        model_io.load_model(model, path, mmap_mode="r" if mmap else None)
+        if sessions is not None:
+            _validate_sessions(sessions)
+            if _get_session_type(sessions) != model.session_type:
+                raise MsticpyException(
+                    "`sessions` should be in the same format as the sessions "
+                    f"used to train the model ({model.session_type})"
+                )
+            model.sessions = sessions
+        return model
+
+    def _compute_counts(self, n_jobs: int = 1):
         """
         Compute all the counts for the model.
 
@@ -183,63 +344,49 @@ class Model:
         to determine which params take categorical values, and hence
         have modellable values.
 
+        Parameters
+        ----------
+        n_jobs: int, optional
+            Number of processes to use to compute the counts, by default 1.
+
         """
         if self.session_type is None:
             raise MsticpyException("session_type attribute should not be None")
 
-        if self.session_type == SessionType.cmds_only:
-            seq1_counts, seq2_counts = cmds_only.compute_counts(
-                sessions=self.sessions,
-                start_token=self.start_token,
-                end_token=self.end_token,
-                unk_token=self.unk_token,
-            )
-            self._seq1_counts = seq1_counts
-            self._seq2_counts = seq2_counts
-
-        elif self.session_type == SessionType.cmds_params_only:
-            (
-                seq1_counts,
-                seq2_counts,
-                param_counts,
-                cmd_param_counts,
-            ) = cmds_params_only.compute_counts(
-                sessions=self.sessions,
-                start_token=self.start_token,
-                end_token=self.end_token,
-            )
-
-            self._seq1_counts = seq1_counts
-            self._seq2_counts = seq2_counts
-            self._param_counts = param_counts
-            self._cmd_param_counts = cmd_param_counts
-
-        elif self.session_type == SessionType.cmds_params_values:
-            (
-                seq1_counts,
-                seq2_counts,
-                param_counts,
-                cmd_param_counts,
-                value_counts,
-                param_value_counts,
-            ) = cmds_params_values.compute_counts(
-                sessions=self.sessions,
-                start_token=self.start_token,
-                end_token=self.end_token,
-            )
-
+        counts = _count_sessions(
+            sessions=self.sessions,
+            session_type=self.session_type,
+            start_token=self.start_token,
+            end_token=self.end_token,
+            unk_token=self.unk_token,
+            n_jobs=n_jobs,
+        )
+        self._seq1_counts, self._seq2_counts = counts[:2]
+        if self.session_type in [
+            SessionType.cmds_params_only,
+            SessionType.cmds_params_values,
+        ]:
+            self._param_counts, self._cmd_param_counts = counts[2:4]
+        if self.session_type == SessionType.cmds_params_values:
+            self._value_counts, self._param_value_counts = counts[4:]
             if self.modellable_params is None:
-                modellable_params = cmds_params_values.get_params_to_model_values(
-                    param_counts=param_counts, param_value_counts=param_value_counts
+                self.modellable_params = cmds_params_values.get_params_to_model_values(
+                    param_counts=counts[2], param_value_counts=counts[5]
                 )
-                self.modellable_params = modellable_params
 
-            self._seq1_counts = seq1_counts
-            self._seq2_counts = seq2_counts
-            self._param_counts = param_counts
-            self._cmd_param_counts = cmd_param_counts
-            self._value_counts = value_counts
-            self._param_value_counts = param_value_counts
+    def _get_counts(self) -> tuple:
+        """Return the (non laplace smoothed) counts for the session type."""
+        counts = (
+            self._seq1_counts,
+            self._seq2_counts,
+            self._param_counts,
+            self._cmd_param_counts,
+            self._value_counts,
+            self._param_value_counts,
+        )
+        if self.session_type is None:
+            return ()
+        return counts[: _N_COUNTS[self.session_type]]
 
     def _laplace_smooth_counts(self):
         """
@@ -330,6 +477,9 @@ class Model:
         value conditional on the param probabilities.
 
         """
+        self._scorer = None
+        self._encoded_sessions = None
+        self._saved_tables = None
         self._compute_probs_cmds()
         if self.session_type in [
             SessionType.cmds_params_only,
@@ -381,9 +531,12 @@ class Model:
             raise MsticpyException(
                 'this method is not available for your type of input data "sessions"'
             )
+        result: Dict[str, Dict[tuple, float]] = defaultdict(
+            lambda: defaultdict(lambda: 0)
+        )
+        sessions = cast(List[List[Cmd]], self.sessions)
         if self.session_type == SessionType.cmds_params_only:
-            result = defaultdict(lambda: defaultdict(lambda: 0))
-            for ses in self.sessions:
+            for ses in sessions:
                 for cmd in ses:
                     c_name = cmd.name
                     params = cmd.params
@@ -396,13 +549,13 @@ class Model:
                     result[c_name][tuple(params)] = prob
             self.set_params_cond_cmd_probs = result
         else:
-            result = defaultdict(lambda: defaultdict(lambda: 0))
-            for ses in self.sessions:
+            modellable_params = cast(set, self.modellable_params)
+            for ses in sessions:
                 for cmd in ses:
                     c_name = cmd.name
-                    params = cmd.params
-                    pars = set(cmd.params.keys())
-                    intersection_pars = pars.intersection(self.modellable_params)
+                    params = cast(dict, cmd.params)
+                    pars = set(params.keys())
+                    intersection_pars = pars.intersection(modellable_params)
                     key = set()
                     for par in pars:
                         if par in intersection_pars:
@@ -414,7 +567,7 @@ class Model:
                         params_with_vals=params,
                         param_cond_cmd_probs=self.param_cond_cmd_probs,
                         value_cond_param_probs=self.value_cond_param_probs,
-                        modellable_params=self.modellable_params,
+                        modellable_params=modellable_params,
                         use_geo_mean=use_geo_mean,
                     )
                     result[c_name][tuple(key)] = prob
@@ -433,6 +586,10 @@ class Model:
         you can compare the likelihoods more fairly across different session
         lengths
 
+        The likelihoods are calculated in log space. The log likelihoods are
+        stored in the `session_log_likelihoods` attribute - these remain
+        usable for very long sessions whose likelihood underflows to 0.
+
         Parameters
         ----------
         use_start_end_tokens: bool
@@ -441,52 +598,12 @@ class Model:
             are done
 
         """
-        if self.prior_probs is None:
-            raise MsticpyException(
-                "please train the model first before using this method"
-            )
-
-        result = []
-
-        for sess in self.sessions:
-            if self.session_type == SessionType.cmds_only:
-                tmp = cmds_only.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-            elif self.session_type == SessionType.cmds_params_only:
-                tmp = cmds_params_only.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-            else:
-                tmp = cmds_params_values.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    value_cond_param_probs=self.value_cond_param_probs,
-                    modellable_params=self.modellable_params,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-
-            result.append(tmp)
-
-        self.session_likelihoods = result
+        log_liks = self._get_scorer().session_log_likelihoods(
+            encoded=self._get_encoded_sessions(),
+            use_start_end_tokens=use_start_end_tokens,
+        )
+        self.session_log_likelihoods = log_liks.tolist()
+        self.session_likelihoods = np.exp(log_liks).tolist()
 
     def compute_geomean_lik_of_sessions(self):
         """
@@ -505,14 +622,12 @@ class Model:
         lengths.
 
         """
-        if self.session_likelihoods is None:
+        if self.session_log_likelihoods is None:
             self.compute_likelihoods_of_sessions()
-        result = [
-            self.session_likelihoods[idx] ** (1 / len(session))
-            for idx, session in enumerate(self.sessions)
-        ]
-
-        self.session_geomean_likelihoods = result
+        ses_lengths = np.array([len(session) for session in self.sessions])
+        self.session_geomean_likelihoods = np.exp(
+            np.array(self.session_log_likelihoods) / ses_lengths
+        ).tolist()
 
     def compute_rarest_windows(
         self,
@@ -555,57 +670,19 @@ class Model:
             of (1/`window_len`)
 
         """
-        if self.prior_probs is None:
-            raise MsticpyException(
-                "please train the model first before using this method"
+        rarest_idx, rarest_log_liks = self._get_scorer().rarest_windows(
+            encoded=self._get_encoded_sessions(),
+            window_len=window_len,
+            use_start_end_tokens=use_start_end_tokens,
+        )
+        if use_geo_mean:
+            rarest_log_liks = rarest_log_liks / window_len
+        rare_tuples = [
+            (ses[idx : idx + window_len] if idx >= 0 else [], lik)  # noqa: E203
+            for ses, idx, lik in zip(
+                self.sessions, rarest_idx.tolist(), np.exp(rarest_log_liks).tolist()
             )
-
-        if self.session_type == SessionType.cmds_only:
-            rare_tuples = [
-                cmds_only.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
-        elif self.session_type == SessionType.cmds_params_only:
-            rare_tuples = [
-                cmds_params_only.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
-        else:
-            rare_tuples = [
-                cmds_params_values.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    value_cond_param_probs=self.value_cond_param_probs,
-                    modellable_params=self.modellable_params,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
+        ]
 
         if use_geo_mean:
             self.rare_windows_geo[window_len] = [rare[0] for rare in rare_tuples]
@@ -616,6 +693,72 @@ class Model:
             self.rare_windows[window_len] = [rare[0] for rare in rare_tuples]
             self.rare_window_likelihoods[window_len] = [rare[1] for rare in rare_tuples]
 
+    def _get_scorer(self) -> LogLikelihoodScorer:
+        """Return the log likelihood scorer for the trained probabilities."""
+        if self._scorer is not None:
+            return self._scorer
+        saved = self._saved_tables
+        if saved is None and (self.prior_probs is None or self.trans_probs is None):
+            raise MsticpyException(
+                "please train the model first before using this method"
+            )
+        # a loaded model is scored from the saved arrays without restoring the dicts
+        cond_probs: Tuple[Any, Any] = (
+            (
+                saved.cond_probs("param_cond_cmd_probs"),
+                saved.cond_probs("value_cond_param_probs"),
+            )
+            if saved is not None
+            else (self.param_cond_cmd_probs, self.value_cond_param_probs)
+        )
+        param_cond_cmd_probs, value_cond_param_probs = cond_probs
+        cmd_prob_func: Optional[Callable[[str, Union[set, dict]], float]] = None
+        if self.session_type == SessionType.cmds_params_only:
+            cmd_prob_func = partial(
+                cmds_params_only.compute_prob_setofparams_given_cmd,
+                param_cond_cmd_probs=param_cond_cmd_probs,
+                use_geo_mean=True,
+            )
+        elif self.session_type == SessionType.cmds_params_values:
+            cmd_prob_func = partial(
+                cmds_params_values.compute_prob_setofparams_given_cmd,
+                param_cond_cmd_probs=param_cond_cmd_probs,
+                value_cond_param_probs=value_cond_param_probs,
+                modellable_params=cast(set, self.modellable_params),
+                use_geo_mean=True,
+            )
+        scorer_args: Dict[str, Any] = {
+            "start_token": self.start_token,
+            "end_token": self.end_token,
+            "unk_token": self.unk_token,
+            "cmd_prob_func": cmd_prob_func,
+        }
+        if saved is not None:
+            cmd_ids, prior, trans = saved.cmd_tables()
+            self._scorer = LogLikelihoodScorer(cmd_ids, prior, trans, **scorer_args)
+        else:
+            self._scorer = LogLikelihoodScorer.from_probs(
+                self.prior_probs, self.trans_probs, **scorer_args
+            )
+        return self._scorer
+
+    def _get_encoded_sessions(self) -> EncodedSessions:
+        """
+        Return `sessions` encoded as arrays for the log likelihood scorer.
+
+        The encoding is reused by the scoring methods until the model is
+        retrained or `sessions` is set to a different list.
+
+        """
+        if self._encoded_sessions is None or self._encoded_sessions[0] is not (
+            self.sessions
+        ):
+            self._encoded_sessions = (
+                self.sessions,
+                self._get_scorer().encode_sessions(self.sessions),
+            )
+        return self._encoded_sessions[1]
+
     def _compute_probs_cmds(self):
         """Compute the individual and transition command probabilties."""
         if self.seq1_counts is None:
@@ -675,33 +818,160 @@ class Model:
         attribute of the Cmd datatype is a set or a dict.
 
         """
-        session = self.sessions[0]
-        cmd = session[0]
-        if isinstance(cmd, str):
-            self.session_type = SessionType.cmds_only
-        elif self._check_cmd_type():
-            if isinstance(cmd.params, set):
-                self.session_type = SessionType.cmds_params_only
-            elif isinstance(cmd.params, dict):
-                self.session_type = SessionType.cmds_params_values
-            else:
-                raise MsticpyException(
-                    "Params attribute of Cmd data structure should "
-                    + "be either a set or a dict"
-                )
-        else:
+        self.session_type = _get_session_type(self.sessions)
+
+
+def _validate_sessions(sessions: List[List[Union[str, Cmd]]]):
+    """Raise an exception if `sessions` is not a list of non-empty lists."""
+    if not isinstance(sessions, list):
+        raise MsticpyException("`sessions` should be a list")
+    if not sessions:
+        raise MsticpyException("`sessions` should not be an empty list")
+    for i, ses in enumerate(sessions):
+        if not isinstance(ses, list):
+            raise MsticpyException("each session in `sessions` should be a list")
+        if len(ses) == 0:
             raise MsticpyException(
-                "Each element of 'sessions' should be a list of either "
-                + "strings, or Cmd data types"
+                f"session at index {i} of `sessions` is empty. Each session "
+                "should contain at least one command"
             )
 
-    def _check_cmd_type(self):
-        """Check whether the Cmd datatype has the expected attributes."""
-        session = self.sessions[0]
-        cmd = session[0]
-        if "name" in dir(cmd) and "params" in dir(cmd):
-            return True
-        return False
+
+def _get_session_type(sessions: List[List[Union[str, Cmd]]]) -> str:
+    """Return the SessionType of `sessions` based on the first command."""
+    cmd = sessions[0][0]
+    if isinstance(cmd, str):
+        return SessionType.cmds_only
+    if "name" in dir(cmd) and "params" in dir(cmd):
+        if isinstance(cmd.params, set):
+            return SessionType.cmds_params_only
+        if isinstance(cmd.params, dict):
+            return SessionType.cmds_params_values
+        raise MsticpyException(
+            "Params attribute of Cmd data structure should "
+            + "be either a set or a dict"
+        )
+    raise MsticpyException(
+        "Each element of 'sessions' should be a list of either "
+        + "strings, or Cmd data types"
+    )
+
+
+# pylint: disable=too-many-arguments
+def _count_sessions(
+    sessions: List[List[Union[str, Cmd]]],
+    session_type: str,
+    start_token: str,
+    end_token: str,
+    unk_token: str,
+    n_jobs: int = 1,
+) -> tuple:
+    """
+    Compute the counts for `sessions`, optionally using multiple processes.
+
+    Parameters
+    ----------
+    sessions: List[List[Union[str, Cmd]]]
+        list of sessions
+    session_type: str
+        the SessionType of the sessions
+    start_token: str
+        dummy command to signify the start of a session (e.g. "##START##")
+    end_token: str
+        dummy command to signify the end of a session (e.g. "##END##")
+    unk_token: str
+        dummy command to signify an unseen command (e.g. "##UNK##")
+    n_jobs: int, optional
+        Number of processes to use, by default 1.
+        If -1, all available CPUs are used.
+
+    Returns
+    -------
+    tuple
+        the counts returned by the `compute_counts` function for
+        the session type
+
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(max(n_jobs, 1), len(sessions))
+    if n_jobs == 1:
+        return _count_sessions_chunk(
+            sessions, session_type, start_token, end_token, unk_token, as_dict=False
+        )
+
+    chunk_size = -(-len(sessions) // n_jobs)
+    chunks = [
+        sessions[idx : idx + chunk_size]  # noqa: E203
+        for idx in range(0, len(sessions), chunk_size)
+    ]
+    n_counts = _N_COUNTS[session_type]
+    counts: tuple = tuple(
+        defaultdict(lambda: defaultdict(lambda: 0)) if idx % 2 else defaultdict(int)
+        for idx in range(n_counts)
+    )
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk_counts in executor.map(
+            _count_sessions_chunk,
+            chunks,
+            repeat(session_type),
+            repeat(start_token),
+            repeat(end_token),
+            repeat(unk_token),
+        ):
+            for total, chunk_count in zip(counts, chunk_counts):
+                _add_counts(total, chunk_count)
+    return counts
+
+
+# pylint: disable=too-many-arguments
+def _count_sessions_chunk(
+    sessions: List[List[Union[str, Cmd]]],
+    session_type: str,
+    start_token: str,
+    end_token: str,
+    unk_token: str,
+    as_dict: bool = True,
+) -> tuple:
+    """Compute the counts for a chunk of sessions (as plain dicts if `as_dict`)."""
+    counts: tuple
+    if session_type == SessionType.cmds_only:
+        counts = cmds_only.compute_counts(
+            sessions=cast(List[List[str]], sessions),
+            start_token=start_token,
+            end_token=end_token,
+            unk_token=unk_token,
+        )
+    elif session_type == SessionType.cmds_params_only:
+        counts = cmds_params_only.compute_counts(
+            sessions=cast(List[List[Cmd]], sessions),
+            start_token=start_token,
+            end_token=end_token,
+        )
+    else:
+        counts = cmds_params_values.compute_counts(
+            sessions=cast(List[List[Cmd]], sessions),
+            start_token=start_token,
+            end_token=end_token,
+        )
+    if not as_dict:
+        return counts
+    # defaultdicts with lambda factories cannot be pickled
+    return tuple(
+        {key: dict(val) if isinstance(val, dict) else val for key, val in cnt.items()}
+        for cnt in counts
+    )
+
+
+def _add_counts(counts: defaultdict, new_counts: dict):
+    """Add `new_counts` to `counts` (modifies `counts` in place)."""
+    for key, val in new_counts.items():
+        if isinstance(val, dict):
+            cond_counts = counts[key]
+            for cond_key, count in val.items():
+                cond_counts[cond_key] += count
+        else:
+            counts[key] += val
 
 
 class SessionType:
@@ -710,3 +980,11 @@ class SessionType:
     cmds_only = "cmds_only"
     cmds_params_only = "cmds_params_only"
     cmds_params_values = "cmds_params_values"
+
+
+# number of count dictionaries computed for each session type
+_N_COUNTS = {
+    SessionType.cmds_only: 2,
+    SessionType.cmds_params_only: 4,
+    SessionType.cmds_params_values: 6,
+}
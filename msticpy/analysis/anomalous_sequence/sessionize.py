@@ -66,42 +66,28 @@ def sessionize_data(
         max_event_separation_mins=max_event_separation_mins,
     )
 
-    # aggregating will not work properly with nans. Temporarily replace nan values with dummy_str.
-    for col in user_identifier_cols:
-        df_with_sesind[col] = df_with_sesind[col].fillna("dummy_str")
-
-    # aggregate by the session_ind column
-    agg_df = (
-        df_with_sesind.sort_values(["session_ind", time_col])
-        .groupby(["session_ind"] + user_identifier_cols, as_index=False)
-        .agg({time_col: ["min", "max"], event_col: list})
-        .reset_index()
-    )
-
-    # rename some columns
-    outer_cols = agg_df.columns.get_level_values(0)
-    inner_cols = agg_df.columns.get_level_values(1)
-    agg_df.columns = [
-        outer_cols[i] + "_" + inner_cols[i] if inner_cols[i] != "" else outer_cols[i]
-        for i in range(len(outer_cols))
+    # create_session_col returns the events sorted by user_identifier_cols
+    # and time, so each session is a contiguous block of rows.
+    ses_ind = df_with_sesind["session_ind"].to_numpy()
+    starts = np.flatnonzero(np.diff(ses_ind, prepend=-1))
+    ends = np.append(starts[1:], len(ses_ind))
+    events = df_with_sesind[event_col].tolist()
+    event_times = df_with_sesind[time_col].groupby(ses_ind, sort=False)
+
+    agg_df = df_with_sesind[user_identifier_cols].iloc[starts].reset_index(drop=True)
+    agg_df[f"{time_col}_min"] = event_times.min().array
+    agg_df[f"{time_col}_max"] = event_times.max().array
+    agg_df[f"{event_col}_list"] = [
+        events[start:end] for start, end in zip(starts, ends)  # noqa: E203
     ]
 
     # calculate some additional columns
     agg_df["duration"] = agg_df[f"{time_col}_max"] - agg_df[f"{time_col}_min"]
-    agg_df["number_events"] = agg_df[f"{event_col}_list"].apply(len)
-
-    agg_df = agg_df.drop("session_ind", axis=1)
-    if "index" in agg_df.columns:
-        agg_df = agg_df.drop("index", axis=1)
-
-    # replace dummy_str with nan values
-    for col in user_identifier_cols:
-        agg_df[col] = agg_df[col].replace("dummy_str", np.nan)
+    agg_df["number_events"] = ends - starts
 
     return agg_df
 
 
-# pylint: disable=too-many-locals, too-many-branches
 def create_session_col(
     data: pd.DataFrame,
     user_identifier_cols: List[str],
@@ -161,42 +147,69 @@ def create_session_col(
         user_identifier_cols + [time_col]
     ).reset_index(drop=True)
 
-    # initialise first row
-    ses_ind = 0
-    df_with_sesind.loc[0, "time_diff"] = pd.to_timedelta(0)
-    df_with_sesind.loc[0, "cml_time"] = pd.to_timedelta(0)
-    df_with_sesind.loc[0, "session_ind"] = ses_ind
-
-    for i in range(1, len(df_with_sesind)):
-        cur = df_with_sesind.iloc[i]
-        prev = df_with_sesind.iloc[i - 1]
-
-        # if any of the user_identifier_cols values change, a new session should start
-        new_flag = False
-        for col in user_identifier_cols:
-            if cur[col] != prev[col]:
-                new_flag = True
-                break
+    # if any of the user_identifier_cols values change, a new session should start
+    new_session = np.zeros(len(df_with_sesind), dtype=bool)
+    new_session[0] = True
+    for col in user_identifier_cols:
+        new_session |= (df_with_sesind[col] != df_with_sesind[col].shift()).to_numpy()
+
+    # if the max separation between events is exceeded, a new session should start
+    times = df_with_sesind[time_col]
+    new_session |= (times.diff() > max_sep).to_numpy()
 
-        dif = cur[time_col] - prev[time_col]
-        cml = prev["cml_time"] + dif
-        # if the max session length is exceeded or the max separation between events is exceeded,
-        # a new session should start
-        if dif > max_sep or cml > max_ses:
-            new_flag = True
-
-        if new_flag:
-            df_with_sesind.loc[i, "time_diff"] = pd.to_timedelta(0)
-            df_with_sesind.loc[i, "cml_time"] = pd.to_timedelta(0)
-            ses_ind += 1
-            df_with_sesind.loc[i, "session_ind"] = ses_ind
-        else:
-            df_with_sesind.loc[i, "time_diff"] = dif
-            df_with_sesind.loc[i, "cml_time"] = cml
-            df_with_sesind.loc[i, "session_ind"] = ses_ind
+    # if the max session length is exceeded, a new session should start
+    new_session = _split_long_sessions(
+        times=times.ffill().values.view("int64"),
+        new_session=new_session,
+        max_session=max_ses.value,
+    )
+    df_with_sesind["session_ind"] = np.cumsum(new_session) - 1
 
     # replace dummy_str with nan values
     for col in user_identifier_cols:
         df_with_sesind[col] = df_with_sesind[col].replace("dummy_str", np.nan)
 
     return df_with_sesind[final_cols]
+
+
+def _split_long_sessions(
+    times: np.ndarray, new_session: np.ndarray, max_session: int
+) -> np.ndarray:
+    """
+    Start new sessions where a session would exceed `max_session`.
+
+    Parameters
+    ----------
+    times: np.ndarray
+        Sorted (within each session) event times as int64 nanoseconds.
+    new_session: np.ndarray
+        Boolean array marking the first event of each session.
+    max_session: int
+        The maximum length of a session in nanoseconds.
+
+    Returns
+    -------
+    np.ndarray
+        `new_session` with additional session starts marked.
+
+    Notes
+    -----
+    Only sessions that are longer than `max_session` are examined.
+    Within each of these, the start of the next session is found
+    with a binary search, so the loop runs once per new session
+    rather than once per event.
+
+    """
+    start_pos = np.flatnonzero(new_session)
+    end_pos = np.append(start_pos[1:], len(times))
+    long_sessions = np.flatnonzero(times[end_pos - 1] - times[start_pos] > max_session)
+    for ses_idx in long_sessions:
+        pos, end = start_pos[ses_idx], end_pos[ses_idx]
+        while True:
+            pos += np.searchsorted(
+                times[pos:end], times[pos] + max_session, side="right"
+            )
+            if pos >= end:
+                break
+            new_session[pos] = True
+    return new_session
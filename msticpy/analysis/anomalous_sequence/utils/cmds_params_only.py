@@ -13,7 +13,6 @@ of accompanying params.
 
 from collections import defaultdict
 from typing import Tuple, List, Union, DefaultDict
-import copy
 
 import numpy as np
 
@@ -140,8 +139,8 @@ def laplace_smooth_counts(
 
     # apply laplace smoothing for cmds
     seq1_counts_ls, seq2_counts_ls = laplace_smooth_cmd_counts(
-        seq1_counts=copy.deepcopy(seq1_counts),
-        seq2_counts=copy.deepcopy(seq2_counts),
+        seq1_counts=seq1_counts,
+        seq2_counts=seq2_counts,
         start_token=start_token,
         end_token=end_token,
         unk_token=unk_token,
@@ -150,8 +149,8 @@ def laplace_smooth_counts(
     # apply laplace smoothing for params
     param_counts_ls, cmd_param_counts_ls = laplace_smooth_param_counts(
         cmds=cmds,
-        param_counts=copy.deepcopy(param_counts),
-        cmd_param_counts=copy.deepcopy(cmd_param_counts),
+        param_counts=param_counts,
+        cmd_param_counts=cmd_param_counts,
         unk_token=unk_token,
     )
 
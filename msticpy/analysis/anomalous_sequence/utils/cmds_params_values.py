@@ -13,7 +13,6 @@ accompanying params and values.
 
 from collections import defaultdict
 from typing import Tuple, List, Union, DefaultDict
-import copy
 
 import numpy as np
 
@@ -185,8 +184,8 @@ def laplace_smooth_counts(
 
     # apply laplace smoothing to the cmds
     seq1_counts_ls, seq2_counts_ls = laplace_smooth_cmd_counts(
-        seq1_counts=copy.deepcopy(seq1_counts),
-        seq2_counts=copy.deepcopy(seq2_counts),
+        seq1_counts=seq1_counts,
+        seq2_counts=seq2_counts,
         start_token=start_token,
         end_token=end_token,
         unk_token=unk_token,
@@ -197,16 +196,16 @@ def laplace_smooth_counts(
     # apply laplace smoothing to the params
     param_counts_ls, cmd_param_counts_ls = laplace_smooth_param_counts(
         cmds=cmds,
-        param_counts=copy.deepcopy(param_counts),
-        cmd_param_counts=copy.deepcopy(cmd_param_counts),
+        param_counts=param_counts,
+        cmd_param_counts=cmd_param_counts,
         unk_token=unk_token,
     )
 
     # apply laplace smoothing for the values
     value_counts_ls, param_value_counts_ls = laplace_smooth_value_counts(
         params=params,
-        value_counts=copy.deepcopy(value_counts),
-        param_value_counts=copy.deepcopy(param_value_counts),
+        value_counts=value_counts,
+        param_value_counts=param_value_counts,
         unk_token=unk_token,
     )
 
@@ -5,8 +5,8 @@
 # --------------------------------------------------------------------------
 """Helper module for laplace smoothing counts."""
 
+from collections import defaultdict
 from typing import Tuple, List, DefaultDict
-import copy
 
 
 def laplace_smooth_cmd_counts(
@@ -42,8 +42,8 @@ def laplace_smooth_cmd_counts(
         sequence command (length 2) counts
 
     """
-    seq1_counts_ls = copy.deepcopy(seq1_counts)
-    seq2_counts_ls = copy.deepcopy(seq2_counts)
+    seq1_counts_ls = copy_counts(seq1_counts)
+    seq2_counts_ls = copy_cond_counts(seq2_counts)
 
     cmds: List[str] = list(seq1_counts_ls.keys()) + [unk_token]
     for cmd1 in cmds:
@@ -86,8 +86,8 @@ def laplace_smooth_param_counts(
         param conditional on command probabilities
 
     """
-    param_counts_ls = copy.deepcopy(param_counts)
-    cmd_param_counts_ls = copy.deepcopy(cmd_param_counts)
+    param_counts_ls = copy_counts(param_counts)
+    cmd_param_counts_ls = copy_cond_counts(cmd_param_counts)
 
     params: List[str] = list(param_counts.keys()) + [unk_token]
     for cmd in cmds:
@@ -129,8 +129,8 @@ def laplace_smooth_value_counts(
         value conditional on param probabilities
 
     """
-    value_counts_ls = copy.deepcopy(value_counts)
-    param_value_counts_ls = copy.deepcopy(param_value_counts)
+    value_counts_ls = copy_counts(value_counts)
+    param_value_counts_ls = copy_cond_counts(param_value_counts)
 
     values: List[str] = list(value_counts_ls.keys()) + [unk_token]
     for param in params:
@@ -140,3 +140,51 @@ def laplace_smooth_value_counts(
                 param_value_counts_ls[param][value] += 1
 
     return value_counts_ls, param_value_counts_ls
+
+
+def copy_counts(counts: DefaultDict[str, int]) -> DefaultDict[str, int]:
+    """
+    Copy the input counts.
+
+    This is much faster than copy.deepcopy since the values are integers.
+
+    Parameters
+    ----------
+    counts: DefaultDict[str, int]
+        counts to copy
+
+    Returns
+    -------
+    DefaultDict[str, int]
+        copy of the counts
+
+    """
+    return defaultdict(int, counts)
+
+
+def copy_cond_counts(
+    cond_counts: DefaultDict[str, DefaultDict[str, int]]
+) -> DefaultDict[str, DefaultDict[str, int]]:
+    """
+    Copy the input conditional counts.
+
+    This is much faster than copy.deepcopy since only the two
+    levels of dictionaries need to be copied.
+
+    Parameters
+    ----------
+    cond_counts: DefaultDict[str, DefaultDict[str, int]]
+        conditional counts to copy
+
+    Returns
+    -------
+    DefaultDict[str, DefaultDict[str, int]]
+        copy of the conditional counts
+
+    """
+    cond_counts_copy: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
+        lambda: defaultdict(int)
+    )
+    for key, counts in cond_counts.items():
+        cond_counts_copy[key] = defaultdict(int, counts)
+    return cond_counts_copy
@@ -0,0 +1,424 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Helper module for vectorized, log-space likelihood calculations.
+
+The functions in cmds_only, cmds_params_only and cmds_params_values compute
+likelihoods one session (and one window) at a time by multiplying
+probabilities looked up in nested dictionaries. This module converts the
+trained probabilities into arrays indexed by integer command ids so that
+the likelihoods of all sessions and all sliding windows can be calculated
+together with NumPy. The arrays can also be the (memory-mapped) arrays
+of a saved model, so a loaded model is scored without rebuilding its
+dictionaries. Working with log probabilities avoids the underflow
+to 0 that happens when multiplying many probabilities for long sessions.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union, cast
+
+import numpy as np
+
+from ..utils.data_structures import Cmd, StateMatrix
+
+# relative tolerance used when choosing the first of several (near) equal
+# rarest windows - this absorbs the rounding error of the cumulative sums
+_TIE_RTOL = 1e-9
+
+
+class EncodedSessions(NamedTuple):
+    """Sessions converted to flat arrays of command ids."""
+
+    ids: np.ndarray
+    cmd_log_probs: np.ndarray
+    starts: np.ndarray
+
+
+# pylint: disable=too-many-instance-attributes
+class LogLikelihoodScorer:
+    """Compute log likelihoods of sessions and sliding windows."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        cmd_ids: Dict[str, int],
+        prior: Tuple[np.ndarray, np.ndarray],
+        trans: Tuple[np.ndarray, np.ndarray],
+        start_token: str,
+        end_token: str,
+        unk_token: str,
+        cmd_prob_func: Optional[Callable[[str, Union[set, dict]], float]] = None,
+    ):
+        """
+        Create the scorer from arrays of the trained command probabilities.
+
+        Parameters
+        ----------
+        cmd_ids: Dict[str, int]
+            integer ids of the commands and tokens. This can include ids
+            of other (non-command) keys, which are treated as unseen commands.
+        prior: Tuple[np.ndarray, np.ndarray]
+            ids of the commands and their probabilities
+        trans: Tuple[np.ndarray, np.ndarray]
+            sorted keys (prev_id * len(cmd_ids) + cur_id) of the sequences of
+            commands (length 2) and their probabilities. These arrays can be
+            memory-mapped - they are not copied.
+        start_token: str
+            dummy command to signify the start of a session (e.g. "##START##")
+        end_token: str
+            dummy command to signify the end of a session (e.g. "##END##")
+        unk_token: str
+            dummy command to signify an unseen command (e.g. "##UNK##")
+        cmd_prob_func: Callable[[str, Union[set, dict]], float], optional
+            function returning the probability of the params (and values)
+            of a Cmd conditional on the command name. It is passed the
+            name and params of the Cmd. This should be None if the
+            sessions are lists of strings.
+
+        """
+        self.start_token = start_token
+        self.end_token = end_token
+        self.unk_token = unk_token
+        self.cmd_prob_func = cmd_prob_func
+        self._cmd_prob_cache: Dict[tuple, float] = {}
+
+        self.cmd_ids = cmd_ids
+        self.start_id = cmd_ids[start_token]
+        self.end_id = cmd_ids[end_token]
+        self.unk_id = cmd_ids[unk_token]
+        self._n_cmds = len(cmd_ids)
+
+        prior_ids, prior_probs = prior
+        with np.errstate(divide="ignore"):
+            # commands without a prior probability have the unk_token probability
+            self.log_prior = np.full(
+                self._n_cmds, np.log(prior_probs[prior_ids == self.unk_id][0])
+            )
+            self.log_prior[prior_ids] = np.log(prior_probs)
+        self._trans_keys, self._trans_probs = trans
+        self._trans_rows, self.log_trans_unk = _build_trans_rows(
+            self._trans_keys, self._trans_probs, self._n_cmds, self.unk_id
+        )
+
+    @classmethod
+    def from_probs(
+        cls,
+        prior_probs: StateMatrix,
+        trans_probs: StateMatrix,
+        start_token: str,
+        end_token: str,
+        unk_token: str,
+        cmd_prob_func: Optional[Callable[[str, Union[set, dict]], float]] = None,
+    ) -> "LogLikelihoodScorer":
+        """
+        Create the scorer from the trained command probabilities.
+
+        Parameters
+        ----------
+        prior_probs: StateMatrix
+            computed probabilities of individual commands
+        trans_probs: StateMatrix
+            computed probabilities of sequences of commands (length 2)
+        start_token: str
+            dummy command to signify the start of a session (e.g. "##START##")
+        end_token: str
+            dummy command to signify the end of a session (e.g. "##END##")
+        unk_token: str
+            dummy command to signify an unseen command (e.g. "##UNK##")
+        cmd_prob_func: Callable[[str, Union[set, dict]], float], optional
+            function returning the probability of the params (and values)
+            of a Cmd conditional on the command name.
+
+        Returns
+        -------
+        LogLikelihoodScorer
+            the scorer
+
+        """
+        cmd_ids = _build_cmd_ids(
+            prior_probs, trans_probs, (start_token, end_token, unk_token)
+        )
+        prior = (
+            np.array([cmd_ids[cmd] for cmd in prior_probs.states], dtype=np.int64),
+            np.array(list(prior_probs.states.values()), dtype=float),
+        )
+        return cls(
+            cmd_ids=cmd_ids,
+            prior=prior,
+            trans=_build_trans_table(trans_probs, cmd_ids),
+            start_token=start_token,
+            end_token=end_token,
+            unk_token=unk_token,
+            cmd_prob_func=cmd_prob_func,
+        )
+
+    def log_trans(self, prev_ids: np.ndarray, cur_ids: np.ndarray) -> np.ndarray:
+        """
+        Return the log transition probabilities from `prev_ids` to `cur_ids`.
+
+        Parameters
+        ----------
+        prev_ids: np.ndarray
+            ids of the previous commands
+        cur_ids: np.ndarray
+            ids of the current commands
+
+        Returns
+        -------
+        np.ndarray
+            log probabilities of each of the transitions
+
+        """
+        keys = self._trans_rows[prev_ids] * self._n_cmds + cur_ids
+        pos = np.searchsorted(self._trans_keys, keys)
+        pos[pos == len(self._trans_keys)] = 0
+        found = self._trans_keys[pos] == keys
+        with np.errstate(divide="ignore"):
+            log_probs = np.log(self._trans_probs[pos])
+        return np.where(found, log_probs, self.log_trans_unk[prev_ids])
+
+    def encode_sessions(self, sessions: List[List[Union[str, Cmd]]]) -> EncodedSessions:
+        """
+        Convert the sessions to flat arrays of command ids.
+
+        Parameters
+        ----------
+        sessions: List[List[Union[str, Cmd]]]
+            list of non-empty sessions, where each session is a list of
+            commands (strings) or Cmd objects
+
+        Returns
+        -------
+        EncodedSessions
+            command ids of all of the sessions concatenated,
+            log probabilities of the params (and values) of each command,
+            position of the first command of each session
+
+        """
+        lengths = np.fromiter(
+            (len(ses) for ses in sessions), dtype=np.int64, count=len(sessions)
+        )
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+
+        cmds = [cmd for ses in sessions for cmd in ses]
+        names = [cmd.name if isinstance(cmd, Cmd) else cmd for cmd in cmds]
+        if self.cmd_prob_func is None:
+            cmd_log_probs = np.zeros(len(names))
+        else:
+            with np.errstate(divide="ignore"):
+                cmd_log_probs = np.log(
+                    [self._cmd_prob(cmd) for cmd in cast(List[Cmd], cmds)]
+                )
+
+        cmd_ids = self.cmd_ids
+        ids = np.fromiter(
+            (cmd_ids.get(name, self.unk_id) for name in names),
+            dtype=np.int64,
+            count=len(names),
+        )
+        return EncodedSessions(ids, cmd_log_probs, starts)
+
+    def _append_end_tokens(self, encoded: EncodedSessions) -> EncodedSessions:
+        """Return `encoded` with the end_token appended to each session."""
+        ends = np.append(encoded.starts[1:], len(encoded.ids))
+        return EncodedSessions(
+            ids=np.insert(encoded.ids, ends, self.end_id),
+            cmd_log_probs=np.insert(encoded.cmd_log_probs, ends, 0),
+            starts=encoded.starts + np.arange(len(encoded.starts)),
+        )
+
+    def session_log_likelihoods(
+        self, encoded: EncodedSessions, use_start_end_tokens: bool
+    ) -> np.ndarray:
+        """
+        Compute the log likelihood of each of the sessions.
+
+        Parameters
+        ----------
+        encoded: EncodedSessions
+            the sessions encoded with `encode_sessions`
+        use_start_end_tokens: bool
+            if True, then `start_token` and `end_token` will be prepended
+            and appended to each session respectively before the
+            calculations are done
+
+        Returns
+        -------
+        np.ndarray
+            log likelihood of each session
+
+        """
+        ids, cmd_log_probs, starts = encoded
+        prev_ids = np.roll(ids, 1)
+        prev_ids[starts] = self.start_id
+        log_liks = self.log_trans(prev_ids, ids) + cmd_log_probs
+        if not use_start_end_tokens:
+            log_liks[starts] = self.log_prior[ids[starts]] + cmd_log_probs[starts]
+        ses_log_liks = np.add.reduceat(log_liks, starts)
+        if use_start_end_tokens:
+            last_ids = ids[np.append(starts[1:], len(ids)) - 1]
+            ses_log_liks += self.log_trans(
+                last_ids, np.full_like(last_ids, self.end_id)
+            )
+        return ses_log_liks
+
+    # pylint: disable=too-many-locals
+    def rarest_windows(
+        self,
+        encoded: EncodedSessions,
+        window_len: int,
+        use_start_end_tokens: bool,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rarest window of `window_len` in each of the sessions.
+
+        Parameters
+        ----------
+        encoded: EncodedSessions
+            the sessions encoded with `encode_sessions`
+        window_len: int
+            length of sliding window for likelihood calculations
+        use_start_end_tokens: bool
+            if True, then `start_token` and `end_token` will be prepended
+            and appended to each session respectively before the
+            calculations are done
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            index of the start of the rarest window in each session
+            (-1 if the session is shorter than `window_len`),
+            log likelihood of the rarest window (np.nan if the session is
+            shorter than `window_len`)
+
+        Notes
+        -----
+        The log likelihood of a window starting at position i is the log
+        prior of command i plus the sum of the log transition (and param)
+        probabilities of the following window_len - 1 commands. These
+        sums are taken from a cumulative sum, so the cost is linear in
+        the total number of commands rather than commands x window_len.
+        If more than one window has the lowest likelihood, the first of
+        them is returned.
+
+        """
+        if use_start_end_tokens:
+            encoded = self._append_end_tokens(encoded)
+        ids, cmd_log_probs, starts = encoded
+        n_sessions = len(starts)
+        rarest_idx = np.full(n_sessions, -1, dtype=np.int64)
+        rarest_log_liks = np.full(n_sessions, np.nan)
+        lengths = np.diff(np.append(starts, len(ids)))
+        n_windows = np.clip(lengths - window_len + 1, 0, None)
+        if not n_windows.any():
+            return rarest_idx, rarest_log_liks
+
+        # log likelihood of each command given the previous command
+        prev_ids = np.roll(ids, 1)
+        trans_log_liks = self.log_trans(prev_ids, ids) + cmd_log_probs
+        trans_log_liks[starts] = 0
+        cml_log_liks = np.cumsum(trans_log_liks)
+
+        # log likelihood of the first command of each window
+        first_log_liks = self.log_prior[ids] + cmd_log_probs
+        if use_start_end_tokens:
+            start_ids = np.full(len(starts), self.start_id)
+            first_log_liks[starts] = (
+                self.log_trans(start_ids, ids[starts]) + cmd_log_probs[starts]
+            )
+
+        # global positions of all of the windows in the sessions
+        win_sessions = np.repeat(np.arange(n_sessions), n_windows)
+        win_offsets = np.cumsum(n_windows) - n_windows
+        win_local = np.arange(len(win_sessions)) - win_offsets[win_sessions]
+        win_pos = starts[win_sessions] + win_local
+        win_end = win_pos + window_len - 1
+        win_log_liks = (
+            first_log_liks[win_pos] + cml_log_liks[win_end] - cml_log_liks[win_pos]
+        )
+
+        has_windows = n_windows > 0
+        seg_starts = win_offsets[has_windows]
+        min_log_liks = np.minimum.reduceat(win_log_liks, seg_starts)
+        tolerance = _TIE_RTOL * np.maximum(1, np.abs(min_log_liks))
+        win_segments = np.repeat(np.arange(len(seg_starts)), n_windows[has_windows])
+        is_min = win_log_liks <= (min_log_liks + tolerance)[win_segments]
+        first_min = np.minimum.reduceat(
+            np.where(is_min, win_local, np.iinfo(np.int64).max), seg_starts
+        )
+        rarest_idx[has_windows] = first_min
+        rarest_log_liks[has_windows] = min_log_liks
+        return rarest_idx, rarest_log_liks
+
+    def _cmd_prob(self, cmd: Cmd) -> float:
+        """Return the (cached) probability of the params of `cmd`."""
+        cmd_prob_func = self.cmd_prob_func
+        if cmd_prob_func is None:
+            return 1.0
+        params = cmd.params
+        try:
+            key = (
+                cmd.name,
+                frozenset(params.items())
+                if isinstance(params, dict)
+                else frozenset(params),
+            )
+            return self._cmd_prob_cache[key]
+        except TypeError:
+            # unhashable values cannot be cached
+            return cmd_prob_func(cmd.name, params)
+        except KeyError:
+            prob = cmd_prob_func(cmd.name, params)
+            self._cmd_prob_cache[key] = prob
+            return prob
+
+
+def _build_cmd_ids(
+    prior_probs: StateMatrix, trans_probs: StateMatrix, tokens: Tuple[str, ...]
+) -> Dict[str, int]:
+    """Return integer ids for the tokens and all commands in the probabilities."""
+    vocab = dict.fromkeys(tokens)
+    vocab.update(dict.fromkeys(prior_probs.states))
+    for prev, currents in trans_probs.states.items():
+        vocab[prev] = None
+        vocab.update(dict.fromkeys(currents.states))
+    return {cmd: idx for idx, cmd in enumerate(vocab)}
+
+
+def _build_trans_table(
+    trans_probs: StateMatrix, cmd_ids: Dict[str, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the sorted (prev * n_cmds + cur) keys and probabilities of transitions."""
+    n_cmds = len(cmd_ids)
+    keys, probs = [], []
+    for prev, row in trans_probs.states.items():
+        prev_key = cmd_ids[prev] * n_cmds
+        for cur, prob in row.states.items():
+            keys.append(prev_key + cmd_ids[cur])
+            probs.append(prob)
+    order = np.argsort(keys)
+    return (
+        np.asarray(keys, dtype=np.int64)[order],
+        np.asarray(probs, dtype=float)[order],
+    )
+
+
+def _build_trans_rows(
+    trans_keys: np.ndarray, trans_probs: np.ndarray, n_cmds: int, unk_id: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the transition row and log unk_token probability of each command.
+
+    Commands without any transitions use the row of the unk_token.
+    Transitions that are not in the row of the previous command fall back
+    to the unk_token entry of that row.
+
+    """
+    row_keys = np.arange(n_cmds + 1, dtype=np.int64) * n_cmds
+    row_starts = np.searchsorted(trans_keys, row_keys)
+    rows = np.where(row_starts[1:] > row_starts[:-1], np.arange(n_cmds), unk_id)
+    unk_pos = np.searchsorted(trans_keys, rows * n_cmds + unk_id)
+    with np.errstate(divide="ignore"):
+        log_trans_unk = np.log(trans_probs[unk_pos])
+    return rows.astype(np.int64), log_trans_unk
@@ -0,0 +1,474 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Helper module for saving and loading the tables of a trained Model.
+
+The counts and probabilities of a model are dicts (or dicts of dicts) keyed
+by commands, params and values. Rather than pickling these, each table is
+stored as a pair of NumPy arrays: an integer array of keys and an array
+of the counts/probabilities. The keys of flat tables are the ids of the
+entries in a single vocabulary (which is stored, with the rest of the model
+metadata, in a JSON file). The keys of conditional tables are
+`row_id * len(vocab) + col_id`, sorted so that a row is a contiguous
+slice which can be found with a binary search.
+
+Saved models are loaded with the arrays memory-mapped (read only).
+Processes which load the same model share the page cache of the files
+rather than each holding a copy of the tables, and only the parts of the
+arrays which are used for scoring are read from disk. The dict tables of
+a loaded model are only rebuilt from the arrays when they are first used
+(see `SavedTable`).
+"""
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ....common.exceptions import MsticpyException
+from .data_structures import StateMatrix
+
+FORMAT_VERSION = 1
+METADATA_FILE = "model.json"
+
+# names (in the order returned by compute_counts) of the saved
+# non laplace smoothed counts and the model attributes they are stored in
+SAVED_COUNTS = {
+    "seq1_counts": "_seq1_counts",
+    "seq2_counts": "_seq2_counts",
+    "param_counts": "_param_counts",
+    "cmd_param_counts": "_cmd_param_counts",
+    "value_counts": "_value_counts",
+    "param_value_counts": "_param_value_counts",
+}
+SAVED_PROBS = [
+    "prior_probs",
+    "trans_probs",
+    "param_probs",
+    "param_cond_cmd_probs",
+    "value_probs",
+    "value_cond_param_probs",
+]
+
+
+def save_model(model: Any, path: Union[str, Path], counts: tuple):
+    """
+    Save the counts, probabilities and settings of a trained Model.
+
+    Parameters
+    ----------
+    model: Model
+        the trained model
+    path: Union[str, Path]
+        folder to save the model to
+    counts: tuple
+        the non laplace smoothed counts of the model (in the order
+        returned by compute_counts)
+
+    """
+    tables = dict(zip(SAVED_COUNTS, counts))
+    tables.update({name: getattr(model, name) for name in SAVED_PROBS})
+    save_tables(
+        path,
+        tables=tables,
+        metadata={
+            "session_type": model.session_type,
+            "start_token": model.start_token,
+            "end_token": model.end_token,
+            "unk_token": model.unk_token,
+            "modellable_params": (
+                None
+                if model.modellable_params is None
+                else sorted(model.modellable_params)
+            ),
+        },
+    )
+
+
+def load_model(model: Any, path: Union[str, Path], mmap_mode: Optional[str] = None):
+    """
+    Restore the settings saved with `save_model` and attach the saved tables.
+
+    The counts and probabilities are not converted to dicts here. The
+    `SavedTable` attributes of the model restore them from the arrays
+    when they are first used.
+
+    Parameters
+    ----------
+    model: Model
+        the model to restore the saved attributes to
+    path: Union[str, Path]
+        folder the model was saved to
+    mmap_mode: str, optional
+        passed to `np.load` (e.g. "r" to memory-map the arrays)
+
+    """
+    tables, vocab, metadata = load_tables(path, mmap_mode=mmap_mode)
+    for name in ("session_type", "start_token", "end_token", "unk_token"):
+        setattr(model, name, metadata[name])
+    if metadata["modellable_params"] is not None:
+        model.modellable_params = set(metadata["modellable_params"])
+    model._saved_tables = ModelTables(  # pylint: disable=protected-access
+        tables, vocab=vocab, unk_token=metadata["unk_token"]
+    )
+
+
+class SavedTable:
+    """
+    Model attribute which is restored from the saved tables on first use.
+
+    Until it is set (e.g. by retraining), the attribute of a model loaded
+    with `load_model` is converted from the saved arrays when it is first
+    read and then kept as a normal attribute.
+    """
+
+    def __init__(self, table_name: str):
+        """
+        Create the attribute.
+
+        Parameters
+        ----------
+        table_name: str
+            name of the saved table the attribute is restored from
+
+        """
+        self.table_name = table_name
+        self.attr_name = table_name
+
+    def __set_name__(self, owner, name: str):
+        """Record the name of the attribute."""
+        self.attr_name = name
+
+    def __get__(self, model, owner=None):
+        """Return the attribute, restoring it from the saved tables if needed."""
+        if model is None:
+            return self
+        value = model.__dict__.get(self.attr_name)
+        saved = model.__dict__.get("_saved_tables")
+        if value is None and saved is not None and self.table_name in saved.tables:
+            value = saved.restore(self.table_name)
+            model.__dict__[self.attr_name] = value
+        return value
+
+    def __set__(self, model, value):
+        """Set the attribute."""
+        model.__dict__[self.attr_name] = value
+
+
+class ModelTables:
+    """The (memory-mapped) arrays of the tables of a saved model."""
+
+    def __init__(
+        self,
+        tables: Dict[str, Tuple[np.ndarray, np.ndarray, bool]],
+        vocab: List[Any],
+        unk_token: str,
+    ):
+        """
+        Create the tables.
+
+        Parameters
+        ----------
+        tables: Dict[str, Tuple[np.ndarray, np.ndarray, bool]]
+            the (keys, values, nested) arrays of each table keyed by name
+        vocab: List[Any]
+            the vocabulary that the keys refer to
+        unk_token: str
+            dummy command to signify an unseen command (e.g. "##UNK##")
+
+        """
+        self.tables = tables
+        self.vocab = vocab
+        self.vocab_ids = {key: idx for idx, key in enumerate(vocab)}
+        self.unk_token = unk_token
+
+    def restore(self, name: str) -> Union[defaultdict, StateMatrix]:
+        """
+        Convert a saved table back to the counts/probabilities of the model.
+
+        Parameters
+        ----------
+        name: str
+            name of the table
+
+        Returns
+        -------
+        Union[defaultdict, StateMatrix]
+            the counts (as a defaultdict which defaults to 0) or
+            the probabilities
+
+        """
+        keys, values, nested = self.tables[name]
+        table = arrays_to_dict(keys, values, nested, vocab=self.vocab)
+        if name not in SAVED_COUNTS:
+            return StateMatrix(table, self.unk_token)
+        if not nested:
+            return defaultdict(lambda: 0, table)
+        counts: defaultdict = defaultdict(lambda: defaultdict(lambda: 0))
+        for key, val in table.items():
+            counts[key].update(val)
+        return counts
+
+    def cond_probs(self, name: str) -> Optional["MappedStateMatrix"]:
+        """
+        Return the saved conditional probabilities `name` for scoring.
+
+        Parameters
+        ----------
+        name: str
+            name of the table (e.g. "param_cond_cmd_probs")
+
+        Returns
+        -------
+        Optional[MappedStateMatrix]
+            the probabilities, or None if the table was not saved
+
+        """
+        if name not in self.tables:
+            return None
+        keys, values, _ = self.tables[name]
+        return MappedStateMatrix(keys, values, tables=self)
+
+    def cmd_tables(
+        self,
+    ) -> Tuple[
+        Dict[Any, int], Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]
+    ]:
+        """
+        Return the arrays of the command probabilities for LogLikelihoodScorer.
+
+        Returns
+        -------
+        Tuple[Dict[Any, int], Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+            the ids of the vocabulary,
+            the (ids, probs) arrays of the prior probabilities,
+            the (keys, probs) arrays of the transition probabilities
+
+        """
+        prior_ids, prior_probs, _ = self.tables["prior_probs"]
+        trans_keys, trans_probs, _ = self.tables["trans_probs"]
+        return self.vocab_ids, (prior_ids, prior_probs), (trans_keys, trans_probs)
+
+
+class MappedStateMatrix:
+    """
+    Read only conditional probabilities backed by the arrays of a saved table.
+
+    Indexing with a key returns its row as a StateMatrix, which is built
+    from the slice of the arrays for that key (and cached). As with
+    StateMatrix, unseen keys return the row of the unk_token.
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, tables: ModelTables):
+        """
+        Create the probabilities.
+
+        Parameters
+        ----------
+        keys: np.ndarray
+            sorted keys (row_id * len(vocab) + col_id) of the table
+        values: np.ndarray
+            probabilities of the table
+        tables: ModelTables
+            the saved tables of the model
+
+        """
+        self.keys = keys
+        self.values = values
+        self.tables = tables
+        self._rows: Dict[Any, StateMatrix] = {}
+
+    def __getitem__(self, item) -> StateMatrix:
+        """Return the row of `item`."""
+        if item not in self._rows:
+            self._rows[item] = self._get_row(item)
+        return self._rows[item]
+
+    def _get_row(self, item) -> StateMatrix:
+        """Build the row of `item` from the arrays."""
+        row_id = self.tables.vocab_ids.get(item)
+        if row_id is None:
+            return self[self.tables.unk_token]
+        row_key = row_id * len(self.tables.vocab)
+        start, end = np.searchsorted(
+            self.keys, [row_key, row_key + len(self.tables.vocab)]
+        )
+        if start == end:
+            return self[self.tables.unk_token]
+        col_ids = self.keys[start:end] - row_key
+        row = {
+            self.tables.vocab[col]: val
+            for col, val in zip(col_ids.tolist(), self.values[start:end].tolist())
+        }
+        return StateMatrix(row, self.tables.unk_token)
+
+
+def save_tables(
+    path: Union[str, Path], tables: Dict[str, Optional[dict]], metadata: dict
+):
+    """
+    Save the tables and metadata to the folder `path`.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        folder to save the model to. This is created if it does not exist.
+    tables: Dict[str, Optional[dict]]
+        the tables to save, keyed by name. Each table should be a dict of
+        numbers or a dict of dicts of numbers. Tables which are None are
+        not saved.
+    metadata: dict
+        JSON serializable metadata to save with the tables
+
+    """
+    folder = Path(path)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    saved_tables = {name: table for name, table in tables.items() if table is not None}
+    # the keys of conditional tables depend on the size of the vocabulary
+    vocab: Dict[Any, int] = {}
+    for table in saved_tables.values():
+        _add_to_vocab(table, vocab)
+    table_specs = {}
+    for name, table in saved_tables.items():
+        index, values, nested = _table_to_arrays(table, vocab)
+        np.save(folder.joinpath(f"{name}.index.npy"), index, allow_pickle=False)
+        np.save(folder.joinpath(f"{name}.values.npy"), values, allow_pickle=False)
+        table_specs[name] = {"nested": nested}
+
+    model_metadata = {
+        "format_version": FORMAT_VERSION,
+        "vocab": list(vocab),
+        "tables": table_specs,
+        **metadata,
+    }
+    with open(folder.joinpath(METADATA_FILE), "w", encoding="utf-8") as meta_file:
+        json.dump(model_metadata, meta_file)
+
+
+def load_tables(
+    path: Union[str, Path], mmap_mode: Optional[str] = None
+) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray, bool]], List[Any], dict]:
+    """
+    Load the tables and metadata saved with `save_tables`.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        folder the model was saved to
+    mmap_mode: str, optional
+        passed to `np.load`. If "r", the arrays are memory-mapped
+        read only rather than read into memory.
+
+    Returns
+    -------
+    Tuple[Dict[str, Tuple[np.ndarray, np.ndarray, bool]], List[Any], dict]
+        the (keys, values, nested) arrays of each table keyed by name,
+        the vocabulary that the keys refer to,
+        the metadata of the model
+
+    Raises
+    ------
+    MsticpyException
+        If the folder does not contain a saved model or was saved
+        with an unsupported format version.
+
+    """
+    folder = Path(path)
+    meta_path = folder.joinpath(METADATA_FILE)
+    if not meta_path.is_file():
+        raise MsticpyException(f"No saved model found in {folder}")
+    with open(meta_path, "r", encoding="utf-8") as meta_file:
+        metadata = json.load(meta_file)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise MsticpyException(
+            f"Unsupported model format version {metadata.get('format_version')}"
+        )
+
+    tables = {
+        name: (
+            np.load(
+                folder.joinpath(f"{name}.index.npy"),
+                mmap_mode=mmap_mode,  # type: ignore
+                allow_pickle=False,
+            ),
+            np.load(
+                folder.joinpath(f"{name}.values.npy"),
+                mmap_mode=mmap_mode,  # type: ignore
+                allow_pickle=False,
+            ),
+            spec["nested"],
+        )
+        for name, spec in metadata.pop("tables").items()
+    }
+    return tables, metadata.pop("vocab"), metadata
+
+
+def arrays_to_dict(
+    index: np.ndarray, values: np.ndarray, nested: bool, vocab: List[Any]
+) -> dict:
+    """
+    Convert the arrays of a saved table back to a dict (or dict of dicts).
+
+    Parameters
+    ----------
+    index: np.ndarray
+        keys of the table (the ids of the entries for flat tables and
+        row_id * len(vocab) + col_id for nested tables)
+    values: np.ndarray
+        counts/probabilities of the table
+    nested: bool
+        True if the table is a dict of dicts
+    vocab: List[Any]
+        the vocabulary that the ids refer to
+
+    Returns
+    -------
+    dict
+        the table
+
+    """
+    values_list = values.tolist()
+    if not nested:
+        return {vocab[key]: val for key, val in zip(index.tolist(), values_list)}
+    rows, cols = np.divmod(index, len(vocab))
+    table: Dict[Any, dict] = {}
+    for row, col, val in zip(rows.tolist(), cols.tolist(), values_list):
+        row_key = vocab[row]
+        if row_key not in table:
+            table[row_key] = {}
+        table[row_key][vocab[col]] = val
+    return table
+
+
+def _add_to_vocab(table: dict, vocab: Dict[Any, int]):
+    """Add the keys (and the keys of the rows) of `table` to `vocab`."""
+    for key, val in table.items():
+        vocab.setdefault(key, len(vocab))
+        if isinstance(val, dict):
+            for col in val:
+                vocab.setdefault(col, len(vocab))
+
+
+def _table_to_arrays(
+    table: dict, vocab: Dict[Any, int]
+) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """Convert a table to (keys, values, nested) arrays."""
+    nested = any(isinstance(val, dict) for val in table.values())
+    if not nested:
+        keys = np.array([vocab[key] for key in table], dtype=np.int32)
+        return keys, np.array(list(table.values())), nested
+
+    n_vocab = len(vocab)
+    key_list: List[int] = []
+    values: List[Any] = []
+    for row, row_vals in table.items():
+        row_key = vocab[row] * n_vocab
+        key_list.extend(row_key + vocab[col] for col in row_vals)
+        values.extend(row_vals.values())
+    order = np.argsort(key_list, kind="stable")
+    return np.array(key_list, dtype=np.int64)[order], np.array(values)[order], nested
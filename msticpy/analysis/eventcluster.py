@@ -33,7 +33,7 @@ commandline and process path.
 """
 from binascii import crc32
 from functools import lru_cache
-from math import log10, floor
+from math import floor
 import re
 from typing import List, Any, Tuple, Union
 
@@ -47,6 +47,12 @@ from .._version import VERSION
 try:
     from sklearn.cluster import DBSCAN
     from sklearn.preprocessing import Normalizer
+
+    try:
+        from sklearn.cluster import HDBSCAN
+    except ImportError:
+        # HDBSCAN is only available in scikit-learn >= 1.3
+        HDBSCAN = None
     import matplotlib.pyplot as plt
     from matplotlib import cm
 except ImportError as imp_err:
@@ -60,6 +66,9 @@ __version__ = VERSION
 __author__ = "Ian Hellen"
 
 
+_CLUSTER_BACKENDS = ("dbscan", "dedupe", "hdbscan")
+
+
 # pylint: disable=too-many-arguments, too-many-locals
 @export
 def dbcluster_events(
@@ -70,8 +79,9 @@ def dbcluster_events(
     time_column: str = "TimeCreatedUtc",
     max_cluster_distance: float = 0.01,
     min_cluster_samples: int = 2,
+    backend: str = "dbscan",
     **kwargs,
-) -> Tuple[pd.DataFrame, DBSCAN, np.ndarray]:
+) -> Tuple[pd.DataFrame, Any, np.ndarray]:
     """
     Cluster data set according to cluster_columns features.
 
@@ -94,18 +104,37 @@ def dbcluster_events(
         DBSCAN eps (max cluster member distance) (the default is 0.01)
     min_cluster_samples : int, optional
         DBSCAN min_samples (the minimum cluster size) (the default is 2)
+    backend : str, optional
+        The clustering implementation to use (the default is "dbscan"):
+
+        - "dbscan" - scikit-learn DBSCAN over all rows.
+        - "dedupe" - scikit-learn DBSCAN over the unique feature vectors,
+          weighting each vector by the number of rows that share it.
+          This gives the same clusters as "dbscan" but is much faster and
+          uses much less memory when feature vectors repeat (as they
+          usually do with process events).
+        - "hdbscan" - scikit-learn HDBSCAN (requires scikit-learn >= 1.3).
+          `min_cluster_samples` is used as HDBSCAN min_cluster_size and
+          `max_cluster_distance` as cluster_selection_epsilon.
 
     Other Parameters
     ----------------
-    kwargs: Other arguments are passed to DBSCAN constructor
+    kwargs: Other arguments are passed to the DBSCAN (or HDBSCAN) constructor.
+        For large data sets, `algorithm="ball_tree"` and `n_jobs=-1`
+        can be used to speed up the DBSCAN neighbor searches.
 
     Returns
     -------
-    Tuple[pd.DataFrame, DBSCAN, np.ndarray]
+    Tuple[pd.DataFrame, Any, np.ndarray]
         Output dataframe with clustered rows
-        DBSCAN model
+        DBSCAN (or HDBSCAN) model
         Normalized data set
 
+    Raises
+    ------
+    ValueError
+        If `backend` is not one of the supported values.
+
     """
     allowed_types = [np.ndarray, pd.DataFrame]
 
@@ -116,24 +145,31 @@ def dbcluster_events(
         else:
             x_input = data[cluster_columns].values
     elif isinstance(data, np.ndarray):
-        x_input = data if cluster_columns is None else data[:, cluster_columns].values
+        x_input = data if cluster_columns is None else data[:, cluster_columns]
     if x_input is None:
         type_list = ", ".join(str(t) for t in allowed_types)
         raise ValueError(
             f"Input data not in expected format.\n{type(data)}",
             f" is not one of allowed types: {type_list}",
         )
+    if backend not in _CLUSTER_BACKENDS:
+        raise ValueError(
+            f"Unknown backend '{backend}'.",
+            f"backend must be one of {', '.join(_CLUSTER_BACKENDS)}",
+        )
 
-    # Create DBSCAN cluster object
-    db_cluster = DBSCAN(
-        eps=max_cluster_distance, min_samples=min_cluster_samples, **kwargs
+    db_cluster = _create_cluster_model(
+        backend, max_cluster_distance, min_cluster_samples, **kwargs
     )
 
     # Normalize the data (most clustering algorithms don't do well with
     # unnormalized data)
     x_norm = Normalizer().fit_transform(x_input) if normalize else x_input
     # fit the data set
-    db_cluster.fit(x_norm)
+    if backend == "dedupe":
+        _fit_unique_vectors(db_cluster, x_norm)
+    else:
+        db_cluster.fit(x_norm)
     labels = db_cluster.labels_
     cluster_set, counts = np.unique(labels, return_counts=True)
     if verbose:
@@ -156,6 +192,68 @@ def dbcluster_events(
     return clustered_events, db_cluster, x_norm
 
 
+def _create_cluster_model(
+    backend: str, max_cluster_distance: float, min_cluster_samples: int, **kwargs
+) -> Any:
+    """Return the unfitted cluster model for `backend`."""
+    if backend == "hdbscan":
+        if HDBSCAN is None:
+            raise MsticpyImportExtraError(
+                "The hdbscan backend requires scikit-learn 1.3 or later",
+                title="Error importing HDBSCAN from Scikit Learn",
+                extra="ml",
+            )
+        return HDBSCAN(
+            min_cluster_size=min_cluster_samples,
+            cluster_selection_epsilon=max_cluster_distance,
+            **kwargs,
+        )
+    return DBSCAN(eps=max_cluster_distance, min_samples=min_cluster_samples, **kwargs)
+
+
+def _fit_unique_vectors(db_cluster: DBSCAN, x_norm: np.ndarray):
+    """
+    Fit DBSCAN to the unique rows of `x_norm` weighted by their counts.
+
+    Parameters
+    ----------
+    db_cluster : DBSCAN
+        The DBSCAN model to fit.
+    x_norm : np.ndarray
+        The (normalized) feature vectors.
+
+    Notes
+    -----
+    A point with weight n is equivalent to n identical points so this
+    produces the same clusters as fitting the full data set.
+    After fitting, `labels_`, `core_sample_indices_` and `components_`
+    are expanded so that they refer to the rows of `x_norm`. Clusters are
+    numbered in the order of their first core row, as DBSCAN does.
+
+    """
+    x_unique, inverse, weights = np.unique(
+        x_norm, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    db_cluster.fit(x_unique, sample_weight=weights)
+
+    core_mask = np.zeros(len(x_unique), dtype=bool)
+    core_mask[db_cluster.core_sample_indices_] = True
+    core_rows = np.flatnonzero(core_mask[inverse])
+    labels = db_cluster.labels_[inverse]
+
+    # renumber the clusters by the position of their first core row
+    core_labels = labels[core_rows]
+    _, first_idx = np.unique(core_labels, return_index=True)
+    label_order = core_labels[np.sort(first_idx)]
+    label_map = np.full(len(label_order) + 1, -1)
+    label_map[label_order] = np.arange(len(label_order))
+
+    db_cluster.labels_ = label_map[labels]
+    db_cluster.core_sample_indices_ = core_rows
+    db_cluster.components_ = x_norm[core_rows]
+
+
 def _merge_clustered_items(
     cluster_set: np.ndarray,
     labels: np.ndarray,
@@ -184,70 +282,63 @@ def _merge_clustered_items(
     pd.DataFrame
         Merged dataframe
 
+    Notes
+    -----
+    Noise events (cluster -1) are output individually, followed by the
+    first row of each cluster. The time range of each cluster is
+    calculated with a single groupby so the cost is linear in the
+    number of rows rather than rows x clusters.
+
     """
-    if isinstance(data, pd.DataFrame) and data.iloc[0][time_column].tz:
+    if isinstance(data, np.ndarray):
+        data = pd.DataFrame(data)
+    if time_column in data and data[time_column].iloc[0].tz:
         ts_type = "datetime64[ns, UTC]"
     else:
         ts_type = "datetime64[ns]"
 
-    cluster_list = []
-    # Iterate through clusters, adding exemplar to output frame
-    # pylint: disable=consider-using-enumerate
-    # we need to know the index of the item within the loop
-    for idx in range(len(cluster_set)):
-        cluster_id = cluster_set[idx]
-        class_members = labels == cluster_id
-        if isinstance(data, pd.DataFrame):
-            time_ordered = data[class_members].sort_values(time_column, ascending=True)
-            first_event_time = time_ordered[0:][time_column].iat[0]
-            last_event_time = time_ordered[-1:][time_column].iat[0]
-        else:
-            first_event_time = None
-            last_event_time = None
+    # output all noise rows (these are not clustered) and
+    # the first row of each cluster
+    _, first_rows = np.unique(labels, return_index=True)
+    output_rows = np.concatenate(
+        [np.flatnonzero(labels == -1), first_rows[cluster_set != -1]]
+    )
+    output_labels = labels[output_rows]
+    cluster_sizes = np.where(
+        output_labels == -1, 1, counts[np.searchsorted(cluster_set, output_labels)]
+    )
 
-        if cluster_id == -1:
-            # 'Noise' events are individual items that could not be assigned
-            # to a cluster and so are unique
-            cluster_list.append(
-                data[class_members]
-                .assign(
-                    Clustered=False,
-                    ClusterId=cluster_id,
-                    ClusterSize=1,
-                    TimeGenerated=first_event_time,
-                    FirstEventTime=first_event_time,
-                    LastEventTime=last_event_time,
-                )
-                .astype(
-                    dtype={
-                        "TimeGenerated": ts_type,
-                        "FirstEventTime": ts_type,
-                        "LastEventTime": ts_type,
-                    }
-                )
-            )
-        else:
-            # Otherwise, just choose the first example of the cluster set
-            cluster_list.append(
-                data[class_members]
-                .assign(
-                    Clustered=True,
-                    ClusterId=cluster_id,
-                    ClusterSize=counts[idx],
-                    TimeGenerated=first_event_time,
-                    FirstEventTime=first_event_time,
-                    LastEventTime=last_event_time,
-                )[0:1]
-                .astype(
-                    dtype={
-                        "TimeGenerated": ts_type,
-                        "FirstEventTime": ts_type,
-                        "LastEventTime": ts_type,
-                    }
-                )
-            )
-    # pylint: enable=consider-using-enumerate
-    return pd.concat(cluster_list)
+    if time_column in data:
+        event_times = data[time_column].reset_index(drop=True).groupby(labels)
+        output_index = data.index[output_rows]
+        first_event_time = (
+            event_times.min().reindex(output_labels).set_axis(output_index)
+        )
+        last_event_time = (
+            event_times.max().reindex(output_labels).set_axis(output_index)
+        )
+    else:
+        first_event_time = None
+        last_event_time = None
+
+    return (
+        data.iloc[output_rows]
+        .assign(
+            Clustered=output_labels != -1,
+            ClusterId=output_labels,
+            ClusterSize=cluster_sizes,
+            TimeGenerated=first_event_time,
+            FirstEventTime=first_event_time,
+            LastEventTime=last_event_time,
+        )
+        .astype(
+            dtype={
+                "TimeGenerated": ts_type,
+                "FirstEventTime": ts_type,
+                "LastEventTime": ts_type,
+            }
+        )
+    )
 
 
 @export
@@ -334,23 +425,23 @@ def _add_processname_features(
     path_separator : str
         Path separator for OS
 
+    Notes
+    -----
+    Features are computed once for each unique process name
+    and mapped back to the rows of `output_df`.
+
     """
+    proc_codes, proc_names = _factorize_str(output_df["NewProcessName"])
     if "processName" not in output_df or force:
-        output_df["processName"] = output_df.apply(
-            lambda x: x.NewProcessName.split(path_separator)[-1], axis=1
+        output_df["processName"] = (
+            proc_names.str.rsplit(path_separator, n=1).str[-1].values[proc_codes]
         )
     if "pathScore" not in output_df or force:
-        output_df["pathScore"] = output_df.apply(
-            lambda x: char_ord_score(x.NewProcessName), axis=1
-        )
+        output_df["pathScore"] = _ord_scores(proc_names)[proc_codes]
     if "pathLogScore" not in output_df or force:
-        output_df["pathLogScore"] = output_df.apply(
-            lambda x: log10(x.pathScore) if x.pathScore else 0, axis=1
-        )
+        output_df["pathLogScore"] = _log10_or_zero(output_df["pathScore"])
     if "pathHash" not in output_df or force:
-        output_df["pathHash"] = output_df.apply(
-            lambda x: crc32_hash(x.NewProcessName), axis=1
-        )
+        output_df["pathHash"] = _crc32_hashes(proc_names)[proc_codes]
 
 
 def _add_commandline_features(output_df: pd.DataFrame, force: bool):
@@ -364,28 +455,74 @@ def _add_commandline_features(output_df: pd.DataFrame, force: bool):
     force : bool
         If True overwrite existing feature columns
 
+    Notes
+    -----
+    Features are computed once for each unique command line
+    and mapped back to the rows of `output_df`.
+
     """
+    cmd_codes, cmd_lines = _factorize_str(output_df["CommandLine"])
     if "commandlineLen" not in output_df or force:
-        output_df["commandlineLen"] = output_df.apply(
-            lambda x: len(x.CommandLine), axis=1
-        )
+        output_df["commandlineLen"] = cmd_lines.str.len().values[cmd_codes]
     if "commandlineLogLen" not in output_df or force:
-        output_df["commandlineLogLen"] = output_df.apply(
-            lambda x: log10(x.commandlineLen) if x.commandlineLen else 0, axis=1
-        )
-    if "commandlineTokensFull" not in output_df or force:
-        output_df["commandlineTokensFull"] = output_df[["CommandLine"]].apply(
-            lambda x: delim_count(x.CommandLine), axis=1
-        )
+        output_df["commandlineLogLen"] = _log10_or_zero(output_df["commandlineLen"])
+
+    add_tokens = "commandlineTokensFull" not in output_df or force
+    add_tokens_hash = "commandlineTokensHash" not in output_df or force
+    if add_tokens or add_tokens_hash:
+        # a single findall pass supplies both the delimiter count and hash
+        delims = cmd_lines.str.findall(_DELIM_LIST)
+    if add_tokens:
+        output_df["commandlineTokensFull"] = delims.str.len().values[cmd_codes]
 
     if "commandlineScore" not in output_df or force:
-        output_df["commandlineScore"] = output_df.apply(
-            lambda x: char_ord_score(x.CommandLine), axis=1
-        )
-    if "commandlineTokensHash" not in output_df or force:
-        output_df["commandlineTokensHash"] = output_df.apply(
-            lambda x: delim_hash(x.CommandLine), axis=1
-        )
+        output_df["commandlineScore"] = _ord_scores(cmd_lines)[cmd_codes]
+    if add_tokens_hash:
+        output_df["commandlineTokensHash"] = _crc32_hashes(delims.str.join(""))[
+            cmd_codes
+        ]
+
+
+_DELIM_LIST = r'[\s\-\\/\.,"\'|&:;%$()]'
+
+
+def _factorize_str(values: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """Return codes and unique string values for `values`."""
+    codes, uniques = pd.factorize(values.fillna(""), sort=False)
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _ord_scores(values: pd.Series) -> np.ndarray:
+    """Return the sum of character ordinals for each string in `values`."""
+    if values.empty:
+        return np.zeros(0, dtype=np.int64)
+    # UTF-32 gives one uint32 code point per character, so the ordinal
+    # sums can be calculated for all strings in a single reduceat call.
+    lengths = values.str.len().values.astype(np.int64)
+    code_points = np.frombuffer(
+        "".join(values).encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32
+    ).astype(np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    scores = np.zeros(len(values), dtype=np.int64)
+    non_empty = lengths > 0
+    if code_points.size:
+        scores[non_empty] = np.add.reduceat(code_points, offsets[non_empty])
+    return scores
+
+
+def _crc32_hashes(values: pd.Series) -> np.ndarray:
+    """Return the CRC32 hash of each string in `values`."""
+    return np.fromiter(
+        (crc32(value.encode("utf-8")) for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def _log10_or_zero(values: pd.Series) -> np.ndarray:
+    """Return log10 of `values` with 0 for zero values."""
+    values = values.to_numpy(dtype=float)
+    return np.log10(np.where(values > 0, values, 1))
 
 
 @export
@@ -4,23 +4,27 @@
 # license information.
 # --------------------------------------------------------------------------
 """Data provider loader."""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from functools import partial
 from itertools import tee
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import pandas as pd
+from dateutil.parser import ParserError, parse as parse_date  # type: ignore
 from tqdm.auto import tqdm
 
 from .._version import VERSION
 from ..common import pkg_config as config
-from ..common.exceptions import MsticpyDataQueryError
 from ..common.utility import export, valid_pyname
 from ..nbtools.nbwidgets import QueryTime
 from .browsers.query_browser import browse_queries
 from .drivers import import_driver, DriverBase
 from .param_extractor import extract_query_params
+from .query_cache import QueryCache
 from .query_container import QueryContainer
 from .query_defns import DataEnvironment
 from .query_source import QuerySource
@@ -31,6 +35,11 @@ __author__ = "Ian Hellen"
 
 _DB_QUERY_FLAGS = ("print", "debug_query", "print_query")
 
+# Base delay (seconds) before retrying a throttled sub-query - this is
+# doubled for each retry.
+_RETRY_BACKOFF = 2.0
+_THROTTLE_MSSGS = ("429", "throttl", "too many requests", "rate limit")
+
 
 @export
 class QueryProvider:
@@ -47,6 +56,7 @@ class QueryProvider:
         data_environment: Union[str, DataEnvironment],
         driver: DriverBase = None,
         query_paths: List[str] = None,
+        query_cache: Union[QueryCache, bool, None] = None,
         **kwargs,
     ):
         """
@@ -62,6 +72,13 @@ class QueryProvider:
             `DriverBase`)
         query_paths : List[str]
             Additional paths to look for query definitions.
+        query_cache : Union[QueryCache, bool, None], optional
+            Cache query results on local disk, by default None (results
+            are not cached). Use True to create a cache with the default
+            settings or pass a QueryCache instance. Results are only
+            cached for queries with absolute `start` and `end` times
+            (or no time parameters). Use `cache=False` or `refresh=True`
+            when calling a query to bypass or refresh the cache.
         kwargs :
             Other arguments are passed to the data provider driver.
 
@@ -90,6 +107,10 @@ class QueryProvider:
         else:
             self.driver_class = driver.__class__
         self._additional_connections: Dict[str, DriverBase] = {}
+        self._connection_stats: Optional[pd.DataFrame] = None
+        self._query_cache: Optional[QueryCache] = (
+            QueryCache() if query_cache is True else query_cache or None
+        )
         self._query_provider = driver
         self.all_queries = QueryContainer()
 
@@ -330,6 +351,10 @@ class QueryProvider:
         ----------------
         query_options : Dict[str, Any]
             Additional options passed to query driver.
+        max_connection_workers : int, optional
+            Maximum number of connections to query at the same time
+            if additional connections have been added, by default
+            all connections are queried concurrently.
         kwargs : Dict[str, Any]
             Additional options passed to query driver.
 
@@ -339,25 +364,86 @@ class QueryProvider:
             Query results - a DataFrame if successful
             or a KqlResult if unsuccessful.
 
+        Notes
+        -----
+        If additional connections have been added (see `add_connection`)
+        the query is run against all connections and the results are
+        combined. A "QueryConnection" column holding the connection alias
+        is added to the results. The elapsed time and status of the
+        query for each connection is available in `connection_stats`.
+        Connections that fail are reported but do not cause the
+        query to fail (unless all connections fail).
+
         """
+        max_workers = kwargs.pop("max_connection_workers", None)
         query_options = kwargs.pop("query_options", {}) or kwargs
         query_source = kwargs.pop("query_source", None)
-        result = self._query_provider.query(
-            query, query_source=query_source, **query_options
-        )
         if not self._additional_connections:
-            return result
+            return self._query_provider.query(
+                query, query_source=query_source, **query_options
+            )
         # run query against all connections
-        results = [result]
-        print(f"Running query for {len(self._additional_connections)} connections.")
-        for con_name, connection in self._additional_connections.items():
-            print(f"{con_name}...")
+        return self._exec_multi_connection_query(
+            query,
+            max_workers=max_workers,
+            query_source=query_source,
+            **query_options,
+        )
+
+    @property
+    def connection_stats(self) -> Optional[pd.DataFrame]:
+        """
+        Return the statistics of the last multi-connection query.
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            DataFrame with the Connection, Status, Rows and Seconds
+            (elapsed time) of the query for each connection. None if
+            no multi-connection query has been run.
+
+        """
+        return self._connection_stats
+
+    def _exec_multi_connection_query(
+        self, query: str, max_workers: Optional[int], **kwargs
+    ) -> Union[pd.DataFrame, Any]:
+        """Run `query` concurrently against all of the connections."""
+        connections = {"Default": self._query_provider, **self._additional_connections}
+        max_workers = max_workers or len(connections)
+        driver_max = self._query_provider.max_concurrent_queries
+        if driver_max:
+            max_workers = min(max_workers, driver_max)
+        print(f"Running query for {len(connections)} connections.")
+
+        def _timed_query(driver):
+            start = time.perf_counter()
             try:
-                results.append(
-                    connection.query(query, query_source=query_source, **query_options)
-                )
-            except MsticpyDataQueryError:
-                print(f"Query {con_name} failed.")
+                return driver.query(query, **kwargs), None, time.perf_counter() - start
+            except Exception as err:  # pylint: disable=broad-except
+                return None, err, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            con_results = dict(
+                zip(connections, executor.map(_timed_query, connections.values()))
+            )
+
+        results, stats = _collate_connection_results(con_results)
+        self._connection_stats = pd.DataFrame(stats)
+        print(
+            *(
+                f"{stat['Connection']}: {stat['Status']}, {stat['Rows']} rows, "
+                f"{stat['Seconds']:.2f}s"
+                for stat in stats
+            ),
+            sep="\n",
+        )
+        if not results:
+            default_result, default_err, _ = con_results["Default"]
+            if isinstance(default_err, Exception):
+                raise default_err
+            # return the (failed) result of the default connection
+            return default_result
         return pd.concat(results)
 
     def browse_queries(self, **kwargs):
@@ -395,6 +481,8 @@ class QueryProvider:
             )
         query_name = kwargs.pop("query_name")
         family = kwargs.pop("query_path")
+        use_cache = kwargs.pop("cache", True)
+        refresh = kwargs.pop("refresh", False)
 
         query_source = self.query_store.get_query(
             query_path=family, query_name=query_name
@@ -404,6 +492,8 @@ class QueryProvider:
             return None
 
         params, missing = extract_query_params(query_source, *args, **kwargs)
+        # only reuse cached results if absolute times were supplied
+        use_cache = use_cache and _has_absolute_times(query_source, params)
         self._check_for_time_params(params, missing)
         if missing:
             query_source.help()
@@ -416,6 +506,8 @@ class QueryProvider:
                 query_source=query_source,
                 query_params=params,
                 args=args,
+                use_cache=use_cache,
+                refresh=refresh,
                 **kwargs,
             )
             if split_result is not None:
@@ -432,7 +524,62 @@ class QueryProvider:
 
         # Handle any query options passed
         query_options = self._get_query_options(params, kwargs)
-        return self.exec_query(query_str, query_source=query_source, **query_options)
+        return self._exec_cached_query(
+            query_str,
+            partial(
+                self.exec_query, query_str, query_source=query_source, **query_options
+            ),
+            use_cache=use_cache,
+            refresh=refresh,
+        )
+
+    def _exec_cached_query(
+        self, query: str, exec_func: Callable[[], Any], use_cache: bool, refresh: bool
+    ) -> Union[pd.DataFrame, Any]:
+        """
+        Return the cached result for `query` or run `exec_func`.
+
+        Parameters
+        ----------
+        query : str
+            The final query text (used as part of the cache key).
+        exec_func : Callable[[], Any]
+            Function that runs the query.
+        use_cache : bool
+            If False, the cache is not used.
+        refresh : bool
+            If True, the query is run and the cached result replaced.
+
+        Returns
+        -------
+        Union[pd.DataFrame, Any]
+            The query results.
+
+        """
+        if self._query_cache is None or not use_cache:
+            return exec_func()
+        cache_key = QueryCache.make_key(
+            driver=self.driver_class.__name__,
+            connection=self._connection_id,
+            query=query,
+        )
+        if not refresh:
+            result = self._query_cache.get(cache_key)
+            if result is not None:
+                return result
+        result = exec_func()
+        if isinstance(result, pd.DataFrame):
+            self._query_cache.set(cache_key, result)
+        return result
+
+    @property
+    def _connection_id(self) -> str:
+        """Return the identity of the connection(s) used for queries."""
+        connections = {"Default": self._query_provider, **self._additional_connections}
+        return "\n".join(
+            f"{alias}: {driver.current_connection}"
+            for alias, driver in connections.items()
+        )
 
     def _check_for_time_params(self, params, missing):
         """Fall back on builtin query time if no time parameters were supplied."""
@@ -532,7 +679,7 @@ class QueryProvider:
         # queries it should not be noticeable.
         self._add_query_functions()
 
-    def _exec_split_query(
+    def _exec_split_query(  # pylint: disable=too-many-locals
         self,
         split_by: str,
         query_source: QuerySource,
@@ -569,15 +716,104 @@ class QueryProvider:
         ):
             return "\n\n".join(split_queries)
 
+        use_cache = kwargs.pop("use_cache", False)
+        refresh = kwargs.pop("refresh", False)
+        max_workers = kwargs.pop("max_workers", 1) or 1
+        retries = kwargs.pop("split_query_retries", 2)
+        dedup = kwargs.pop("split_query_dedup", True)
         # Retrive any query options passed (other than query params)
         # and send to query function.
         query_options = self._get_query_options(query_params, kwargs)
-        query_dfs = [
-            self.exec_query(query_str, query_source=query_source, **query_options)
-            for query_str in tqdm(split_queries, unit="sub-queries", desc="Running")
-        ]
+        driver_max = self._query_provider.max_concurrent_queries
+        if driver_max:
+            max_workers = min(max_workers, driver_max)
+
+        def _exec_split_queries():
+            query_dfs = self._exec_queries_concurrent(
+                split_queries,
+                max_workers=max_workers,
+                retries=retries,
+                query_source=query_source,
+                **query_options,
+            )
+            if dedup:
+                query_dfs = _drop_boundary_duplicates(query_dfs)
+            return pd.concat(query_dfs)
+
+        return self._exec_cached_query(
+            "\n\n".join(split_queries),
+            _exec_split_queries,
+            use_cache=use_cache,
+            refresh=refresh,
+        )
 
-        return pd.concat(query_dfs)
+    def _exec_queries_concurrent(
+        self, queries: List[str], max_workers: int, retries: int, **kwargs
+    ) -> List[Any]:
+        """
+        Execute queries on a thread pool, returning results in query order.
+
+        Parameters
+        ----------
+        queries : List[str]
+            The queries to run.
+        max_workers : int
+            Maximum number of queries to run at the same time.
+        retries : int
+            Number of times to retry a query that failed because
+            of throttling.
+
+        Other Parameters
+        ----------------
+        kwargs : Dict[str, Any]
+            Additional options passed to `exec_query`.
+
+        Returns
+        -------
+        List[Any]
+            The results of the queries.
+
+        """
+        exec_query = partial(self._exec_query_retry, retries=retries, **kwargs)
+        progress = tqdm(total=len(queries), unit="sub-queries", desc="Running")
+        if max_workers <= 1 or len(queries) <= 1:
+            results = []
+            for query_str in queries:
+                results.append(exec_query(query=query_str))
+                progress.update(1)
+            progress.close()
+            return results
+
+        results = [None] * len(queries)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+            futures = {
+                executor.submit(exec_query, query=query_str): idx
+                for idx, query_str in enumerate(queries)
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    progress.update(1)
+            except Exception:
+                # don't start any queued sub-queries if one fails
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                progress.close()
+        return results
+
+    def _exec_query_retry(self, query: str, retries: int, **kwargs) -> Any:
+        """Execute `query`, retrying with backoff if the query is throttled."""
+        for attempt in range(retries + 1):
+            try:
+                return self.exec_query(query, **kwargs)
+            except Exception as err:  # pylint: disable=broad-except
+                if attempt >= retries or not _is_throttling_error(err):
+                    raise
+                delay = _RETRY_BACKOFF * 2**attempt
+                time.sleep(delay + random.uniform(0, delay / 2))  # nosec
+        return None
 
     @staticmethod
     def _calc_split_ranges(start: datetime, end: datetime, split_delta: pd.Timedelta):
@@ -628,3 +864,113 @@ class QueryProvider:
             print(f"Warning: Custom query definitions path {config_path} not found")
             return None
         return config_path
+
+
+def _collate_connection_results(
+    con_results: Dict[str, Tuple[Any, Any, float]]
+) -> Tuple[List[pd.DataFrame], List[Dict[str, Any]]]:
+    """Return successful results and statistics for each connection query."""
+    results = []
+    stats = []
+    for con_name, (result, error, elapsed) in con_results.items():
+        if error is None and not isinstance(result, pd.DataFrame):
+            error = f"query returned {type(result).__name__}"
+        if error is None:
+            results.append(result.assign(QueryConnection=con_name))
+            status = "OK"
+        else:
+            status = f"Failed: {error}"
+            print(f"Query {con_name} failed. {error}")
+        stats.append(
+            {
+                "Connection": con_name,
+                "Status": status,
+                "Rows": len(result) if error is None else 0,
+                "Seconds": round(elapsed, 3),
+            }
+        )
+    return results, stats
+
+
+def _is_throttling_error(err: Exception) -> bool:
+    """Return True if `err` looks like a throttling (HTTP 429) error."""
+    for obj in (err, getattr(err, "response", None)):
+        if getattr(obj, "status_code", None) == 429:
+            return True
+    err_mssg = str(err).casefold()
+    return any(mssg in err_mssg for mssg in _THROTTLE_MSSGS)
+
+
+def _drop_boundary_duplicates(query_dfs: List[Any]) -> List[Any]:
+    """
+    Remove rows duplicated at the boundaries of split query results.
+
+    Parameters
+    ----------
+    query_dfs : List[Any]
+        The results of the split queries in time order.
+
+    Returns
+    -------
+    List[Any]
+        The results with rows that are identical to a row in the
+        results of the previous time range removed.
+
+    Notes
+    -----
+    Providers that do not support nanosecond precision can return
+    the same event in adjacent time ranges. Only results with
+    a datetime column are checked since identical rows with the
+    same timestamp in adjacent ranges must be the same event.
+
+    """
+    prev_hashes = None
+    deduped = []
+    for result in query_dfs:
+        if not isinstance(result, pd.DataFrame) or result.empty:
+            deduped.append(result)
+            prev_hashes = None
+            continue
+        if not any(
+            pd.api.types.is_datetime64_any_dtype(dtype) for dtype in result.dtypes
+        ):
+            return query_dfs
+        row_hashes = _hash_rows(result)
+        if prev_hashes is not None:
+            result = result[~row_hashes.isin(prev_hashes).to_numpy()]
+        deduped.append(result)
+        prev_hashes = row_hashes
+    return deduped
+
+
+def _hash_rows(data: pd.DataFrame) -> pd.Series:
+    """Return a hash of each row in `data`."""
+    try:
+        return pd.util.hash_pandas_object(data, index=False)
+    except TypeError:
+        # columns with unhashable values (e.g. dicts) are hashed as strings
+        return pd.util.hash_pandas_object(data.astype(str), index=False)
+
+
+def _has_absolute_times(query_source: QuerySource, params: Dict[str, Any]) -> bool:
+    """Return True if all datetime parameters of the query are absolute times."""
+    for p_name, p_props in query_source.params.items():
+        if p_props.get("type") != "datetime":
+            continue
+        value = params.get(p_name)
+        if isinstance(value, datetime):
+            continue
+        if not isinstance(value, str):
+            # missing (default or QueryTime) or numeric offset from now
+            return False
+        try:
+            int(value)
+            return False
+        except ValueError:
+            pass
+        try:
+            parse_date(value)
+        except (ParserError, OverflowError):
+            # time offset string - e.g. "-1d"
+            return False
+    return True
@@ -33,6 +33,9 @@ class DriverBase(ABC):
         self.formatters: Dict[str, Callable] = {}
         self.use_query_paths = True
         self.has_driver_queries = False
+        # Maximum number of queries that the driver can run concurrently
+        # (None for no limit)
+        self.max_concurrent_queries: Optional[int] = None
         self._previous_connection = False
         self.data_environment = kwargs.get("data_environment")
         self._query_filter: Dict[str, Set[str]] = defaultdict(set)
@@ -90,6 +90,8 @@ class KqlDriver(DriverBase):
         super().__init__(**kwargs)
 
         self.formatters = {"datetime": self._format_datetime, "list": self._format_list}
+        # Kqlmagic queries run through the IPython shell and are not thread-safe
+        self.max_concurrent_queries = 1
         self._loaded = self._is_kqlmagic_loaded()
 
         os.environ["KQLMAGIC_LOAD_MODE"] = "silent"
@@ -5,11 +5,12 @@
 # --------------------------------------------------------------------------
 """Local Data Driver class - for testing and demos."""
 from pathlib import Path
-from typing import Union, Any, Dict, Optional, List
+from typing import Union, Any, Dict, Optional, List, Sequence, Tuple
 
 import pandas as pd
 
 from .driver_base import DriverBase, QuerySource
+from ...common.exceptions import MsticpyImportExtraError
 from ...common.pkg_config import settings
 from ...common.utility import export
 from ..._version import VERSION
@@ -17,6 +18,16 @@ from ..._version import VERSION
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
+_TIME_COL = "TimeGenerated"
+_DATA_FILE_PATTERNS = [
+    "**/*.pkl",
+    "**/*.csv",
+    "**/*.parquet",
+    "**/*.feather",
+    "**/*.arrow",
+]
+_COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow")
+
 
 @export
 class LocalDataDriver(DriverBase):
@@ -48,6 +59,9 @@ class LocalDataDriver(DriverBase):
 
         self.data_files: Dict[str, str] = self._get_data_paths()
         self._schema: Dict[str, Any] = {}
+        # DataFrames read from data files keyed by path (with the
+        # modification time of the file when it was read)
+        self._data_cache: Dict[str, Tuple[float, Any]] = {}
         self._loaded = True
         self._connected = True
         self.current_connection = "; ".join(self._paths)
@@ -56,7 +70,7 @@ class LocalDataDriver(DriverBase):
         """Read files in data paths."""
         data_files = {}
         for path in self._paths:
-            for pattern in ["**/*.pkl", "**/*.csv"]:
+            for pattern in _DATA_FILE_PATTERNS:
                 found_files = list(Path(path).resolve().glob(pattern))
                 data_files.update(
                     {
@@ -91,14 +105,22 @@ class LocalDataDriver(DriverBase):
         Dict[str, Dict]
             Data schema of current connection.
 
+        Notes
+        -----
+        The schema of Parquet and Feather files is read from the
+        file metadata. Other files are loaded (and cached).
+
         """
         if self._schema:
             return self._schema
-        for df_fname in self.data_files:
-            test_df = self.query(df_fname)
-            if not isinstance(test_df, pd.DataFrame):
-                continue
-            df_schema = test_df.dtypes
+        for df_fname, file_path in self.data_files.items():
+            if file_path.casefold().endswith(_COLUMNAR_SUFFIXES):
+                df_schema = _read_columnar_schema(file_path)
+            else:
+                test_df = self.query(df_fname)
+                if not isinstance(test_df, pd.DataFrame):
+                    continue
+                df_schema = test_df.dtypes
             self._schema[df_fname] = {
                 key: dtype.name for key, dtype in df_schema.to_dict().items()
             }
@@ -118,32 +140,157 @@ class LocalDataDriver(DriverBase):
         query_source : QuerySource
             The query definition object
 
+        Other Parameters
+        ----------------
+        columns : List[str], optional
+            Only return these columns.
+        time_range : Tuple[Any, Any], optional
+            (start, end) - only return rows with a TimeGenerated value
+            in this range. Either value can be None. For Parquet files,
+            this filter is applied when the data is read, so that row
+            groups outside the range are skipped.
+
         Returns
         -------
         Union[pd.DataFrame, results.ResultSet]
             A DataFrame (if successfull) or
             the underlying provider result if an error.
 
+        Notes
+        -----
+        Data files are cached in memory after they have been read
+        so that subsequent queries do not re-read the file (unless
+        the file has changed).
+
         """
-        del kwargs
         query_name = query_source.name if query_source else query
         file_path = self.data_files.get(query.casefold())
         if not file_path:
             raise FileNotFoundError(
                 f"Data file ({query}) for query {query_name} not found."
             )
-        if file_path.endswith("csv"):
-            try:
-                return pd.read_csv(
-                    file_path, infer_datetime_format=True, parse_dates=["TimeGenerated"]
-                )
-            except ValueError:
-                return pd.read_csv(file_path)
-        data_df = pd.read_pickle(file_path)
-        if isinstance(data_df, pd.DataFrame):
-            return data_df
-        return f"{query} is not a DataFrame ({file_path})."
+        columns = kwargs.get("columns")
+        start, end = kwargs.get("time_range") or (None, None)
+
+        cached_df = self._get_cached_data(file_path)
+        if cached_df is None and file_path.casefold().endswith(".parquet"):
+            if columns or start is not None or end is not None:
+                # read just the required data
+                return _read_parquet(file_path, columns, start, end)
+        data_df = cached_df if cached_df is not None else self._read_file(file_path)
+        if not isinstance(data_df, pd.DataFrame):
+            return f"{query} is not a DataFrame ({file_path})."
+        if (start is not None or end is not None) and _TIME_COL in data_df.columns:
+            data_df = data_df[_time_range_mask(data_df[_TIME_COL], start, end)]
+        if columns:
+            return data_df[list(columns)].copy()
+        return data_df.copy()
 
     def query_with_results(self, query, **kwargs):
         """Return query with fake results."""
         return self.query(query, **kwargs), "OK"
+
+    def _get_cached_data(self, file_path: str) -> Optional[pd.DataFrame]:
+        """Return the cached data for `file_path` if it is up to date."""
+        mtime, data = self._data_cache.get(file_path, (None, None))
+        if mtime is not None and Path(file_path).stat().st_mtime == mtime:
+            return data
+        return None
+
+    def _read_file(self, file_path: str) -> Any:
+        """Read a data file and add it to the cache."""
+        mtime = Path(file_path).stat().st_mtime
+        path_lc = file_path.casefold()
+        if path_lc.endswith("csv"):
+            # only try to parse TimeGenerated if the column exists
+            header = pd.read_csv(file_path, nrows=0)
+            parse_dates = [_TIME_COL] if _TIME_COL in header.columns else None
+            data = pd.read_csv(
+                file_path, infer_datetime_format=True, parse_dates=parse_dates
+            )
+        elif path_lc.endswith(".parquet"):
+            data = _read_parquet(file_path)
+        elif path_lc.endswith((".feather", ".arrow")):
+            _check_pyarrow()
+            data = pd.read_feather(file_path)
+        else:
+            data = pd.read_pickle(file_path)
+        self._data_cache[file_path] = (mtime, data)
+        return data
+
+
+def _check_pyarrow():
+    """Raise an error if pyarrow is not installed."""
+    try:
+        import pyarrow  # noqa: F401 pylint: disable=import-outside-toplevel, unused-import
+    except ImportError as imp_err:
+        raise MsticpyImportExtraError(
+            "Cannot read Parquet or Feather files without pyarrow installed",
+            title="Error importing pyarrow",
+            extra="parquet",
+        ) from imp_err
+
+
+def _read_columnar_schema(file_path: str) -> pd.Series:
+    """Return the dtypes of a Parquet or Feather file from its metadata."""
+    _check_pyarrow()
+    # pylint: disable=import-outside-toplevel
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if file_path.casefold().endswith(".parquet"):
+        schema = pyarrow.parquet.read_schema(file_path)
+    else:
+        with pyarrow.ipc.open_file(file_path) as reader:
+            schema = reader.schema
+    return schema.empty_table().to_pandas().dtypes
+
+
+def _read_parquet(
+    file_path: str,
+    columns: Optional[Sequence[str]] = None,
+    start: Any = None,
+    end: Any = None,
+) -> pd.DataFrame:
+    """Read a Parquet file, filtering on the TimeGenerated column."""
+    _check_pyarrow()
+    filters = []
+    if start is not None or end is not None:
+        # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet
+
+        schema = pyarrow.parquet.read_schema(file_path)
+        if _TIME_COL in schema.names:
+            time_tz = getattr(schema.field(_TIME_COL).type, "tz", None)
+            if start is not None:
+                filters.append((_TIME_COL, ">=", _to_timestamp(start, time_tz)))
+            if end is not None:
+                filters.append((_TIME_COL, "<=", _to_timestamp(end, time_tz)))
+    return pd.read_parquet(
+        file_path, columns=list(columns) if columns else None, filters=filters or None
+    )
+
+
+def _to_timestamp(value: Any, time_tz: Optional[str]) -> pd.Timestamp:
+    """Convert `value` to a Timestamp matching the timezone of the data."""
+    timestamp = pd.Timestamp(value)
+    if time_tz and timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    if not time_tz and timestamp.tzinfo is not None:
+        return timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp
+
+
+def _time_range_mask(time_col: pd.Series, start: Any, end: Any) -> pd.Series:
+    """Return mask of the rows of `time_col` between `start` and `end`."""
+    if not pd.api.types.is_datetime64_any_dtype(time_col):
+        # e.g. CSV time values that could not be parsed when the file was read
+        # - values that cannot be converted are excluded from the time range.
+        time_col = pd.to_datetime(time_col, errors="coerce", utc=True)
+    time_tz = time_col.dt.tz
+    mask = pd.Series(True, index=time_col.index)
+    if start is not None:
+        mask &= time_col >= _to_timestamp(start, time_tz)
+    if end is not None:
+        mask &= time_col <= _to_timestamp(end, time_tz)
+    return mask
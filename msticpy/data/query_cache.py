@@ -0,0 +1,239 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Local disk cache for query results.
+
+Query results (DataFrames) are stored as Parquet files in a cache folder.
+Each result is keyed on a hash of the driver type, the connection and
+the final query text. Results older than the cache time-to-live (TTL)
+are ignored and, if the size of the cache exceeds the configured maximum,
+the least recently used results are deleted.
+"""
+import hashlib
+import os
+import time
+import warnings
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from .._version import VERSION
+from ..common.exceptions import MsticpyImportExtraError
+from ..common.utility import export
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+DEFAULT_CACHE_PATH = "~/.msticpy/query_cache"
+_CACHE_SUFFIX = ".parquet"
+
+
+@export
+class QueryCache:
+    """Parquet file cache of query results."""
+
+    def __init__(
+        self,
+        cache_path: Union[str, Path, None] = None,
+        ttl: Optional[float] = 86400,
+        max_size_mb: Optional[float] = 1024,
+    ):
+        """
+        Create the query result cache.
+
+        Parameters
+        ----------
+        cache_path : Union[str, Path, None], optional
+            Folder to store the cached results in, by default
+            "~/.msticpy/query_cache". This is created if it does
+            not exist.
+        ttl : Optional[float], optional
+            Number of seconds that a cached result is valid for,
+            by default 86400 (1 day). If None, results do not expire.
+        max_size_mb : Optional[float], optional
+            Maximum total size of the cached results in MB, by
+            default 1024. If the cache grows larger than this, the
+            least recently used results are deleted. If None, the
+            size of the cache is not limited.
+
+        Raises
+        ------
+        MsticpyImportExtraError
+            If pyarrow (needed to read and write Parquet files)
+            is not installed.
+
+        """
+        try:
+            import pyarrow  # noqa: F401 pylint: disable=import-outside-toplevel, unused-import
+        except ImportError as imp_err:
+            raise MsticpyImportExtraError(
+                "Cannot use the query cache without pyarrow installed",
+                title="Error importing pyarrow",
+                extra="parquet",
+            ) from imp_err
+        self.cache_path = Path(cache_path or DEFAULT_CACHE_PATH).expanduser()
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size_mb * 1024 * 1024 if max_size_mb else None
+
+    @staticmethod
+    def make_key(driver: str, connection: str, query: str) -> str:
+        """
+        Return the cache key for a query.
+
+        Parameters
+        ----------
+        driver : str
+            Name of the driver (class) that runs the query.
+        connection : str
+            Identity of the connection that the query is run against.
+        query : str
+            The final query text.
+
+        Returns
+        -------
+        str
+            The cache key.
+
+        """
+        key_text = "\x1f".join((driver, connection, query))
+        return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Return the cached result for `key`.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            The cached result or None if there is no (unexpired)
+            result for `key`.
+
+        """
+        cache_file = self._get_file(key)
+        try:
+            stat = cache_file.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if self.ttl is not None and now - stat.st_mtime > self.ttl:
+            self._delete(cache_file)
+            return None
+        try:
+            result = pd.read_parquet(cache_file)
+        except Exception:  # pylint: disable=broad-except
+            # e.g. a file removed or partially written by another process
+            return None
+        # record the access time (for LRU eviction), keeping the
+        # modification time as the time that the result was stored
+        try:
+            os.utime(cache_file, (now, stat.st_mtime))
+        except OSError:
+            pass
+        return result
+
+    def set(self, key: str, result: pd.DataFrame) -> bool:
+        """
+        Store a query result in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        result : pd.DataFrame
+            The query result.
+
+        Returns
+        -------
+        bool
+            True if the result was stored. Results with data
+            that cannot be saved as Parquet are not cached.
+
+        """
+        cache_file = self._get_file(key)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            result.to_parquet(tmp_file)
+            os.replace(tmp_file, cache_file)
+        except Exception as err:  # pylint: disable=broad-except
+            warnings.warn(f"Query result could not be cached: {err}")
+            return False
+        finally:
+            if tmp_file.exists():
+                self._delete(tmp_file)
+        self._evict()
+        return True
+
+    def delete(self, key: str):
+        """
+        Delete the cached result for `key`.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        """
+        self._delete(self._get_file(key))
+
+    def clear(self):
+        """Delete all cached results."""
+        for cache_file in self._cache_files():
+            self._delete(cache_file)
+
+    @property
+    def size(self) -> int:
+        """Return the total size of the cached results in bytes."""
+        return sum(stat.st_size for _, stat in self._cache_file_stats())
+
+    def _get_file(self, key: str) -> Path:
+        return self.cache_path.joinpath(f"{key}{_CACHE_SUFFIX}")
+
+    def _cache_files(self) -> List[Path]:
+        return list(self.cache_path.glob(f"*{_CACHE_SUFFIX}"))
+
+    def _cache_file_stats(self) -> List[tuple]:
+        file_stats = []
+        for cache_file in self._cache_files():
+            try:
+                file_stats.append((cache_file, cache_file.stat()))
+            except FileNotFoundError:
+                continue
+        return file_stats
+
+    def _evict(self):
+        """Delete expired results and the LRU results over the size limit."""
+        now = time.time()
+        file_stats = []
+        for cache_file, stat in self._cache_file_stats():
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                self._delete(cache_file)
+            else:
+                file_stats.append((cache_file, stat))
+        if self.max_size is None:
+            return
+        total_size = sum(stat.st_size for _, stat in file_stats)
+        # least recently used first
+        for cache_file, stat in sorted(
+            file_stats, key=lambda file_stat: file_stat[1].st_atime
+        ):
+            if total_size <= self.max_size:
+                break
+            self._delete(cache_file)
+            total_size -= stat.st_size
+
+    @staticmethod
+    def _delete(cache_file: Path):
+        try:
+            cache_file.unlink()
+        except FileNotFoundError:
+            pass
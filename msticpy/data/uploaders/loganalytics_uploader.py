@@ -4,14 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 """LogAnayltics Uploader class."""
-from typing import Any
-import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Iterator, List
 import datetime
-import sys
 import hashlib
 import hmac
 import base64
+import random
 import re
+import time
 from pathlib import Path
 
 import httpx
@@ -31,18 +32,52 @@ from ..._version import VERSION
 __version__ = VERSION
 __author__ = "Pete Bryan"
 
+# The API limit is 30MB per post - we keep requests below 25MB
+_MAX_BODY_BYTES = 26214400
+# Number of DataFrame rows to serialize to JSON at a time
+_SERIALIZE_ROWS = 10000
+_RETRY_BACKOFF = 1.0
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+
 
 class LAUploader(UploaderBase):
     """Uploader class for LogAnalytics."""
 
     def __init__(self, workspace: str, workspace_secret: str, **kwargs):
-        """Initialize a LogAnalytics Uploader instance."""
+        """
+        Initialize a LogAnalytics Uploader instance.
+
+        Parameters
+        ----------
+        workspace : str
+            The workspace ID to upload data to.
+        workspace_secret : str
+            The shared key of the workspace.
+
+        Other Parameters
+        ----------------
+        debug : bool, optional
+            Print debug messages, by default False.
+        opsinsight_loc : str, optional
+            The Log Analytics data collector domain,
+            by default ".ods.opinsights.azure.com".
+        max_workers : int, optional
+            The maximum number of data chunks posted concurrently,
+            by default 4.
+        max_retries : int, optional
+            The number of times to retry posting a chunk if the
+            request is throttled (429) or fails with a server
+            error (5xx), by default 3.
+
+        """
         super().__init__()
         self._kwargs = kwargs
         self.workspace = workspace
         self.workspace_secret = workspace_secret
         self._debug = kwargs.get("debug", False)
         self.ops_loc = kwargs.get("opsinsight_loc", ".ods.opinsights.azure.com")
+        self.max_workers = max(1, kwargs.get("max_workers", 4))
+        self.max_retries = kwargs.get("max_retries", 3)
 
     def _build_signature(
         self,
@@ -104,13 +139,29 @@ class LAUploader(UploaderBase):
 
         """
         table_name = re.sub("[^A-Za-z0-9_]+", "", table_name)
+        content = body.encode("utf-8")
+        for attempt in range(self.max_retries + 1):
+            response = self._post_request(content, table_name)
+            if self._debug is True:
+                print(f"Upload response code: {response.status_code}")
+            if 200 <= response.status_code <= 299:
+                return
+            if response.status_code not in _RETRY_STATUS or attempt >= self.max_retries:
+                break
+            time.sleep(_get_retry_delay(response, attempt))
+        raise MsticpyConnectionError(
+            f"""LogAnalytics data upload failed with code {response.status_code}.
+            Check Workspace ID and key""",
+            title="Data Upload Failed",
+        )
 
+    def _post_request(self, content: bytes, table_name: str) -> httpx.Response:
+        """Send a signed POST request to the data collector API."""
         resource = "/api/logs"
         content_type = "application/json"
         rfc1123date = datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
-        content_length = len(body)
         signature = self._build_signature(
-            rfc1123date, content_length, "POST", content_type, resource
+            rfc1123date, len(content), "POST", content_type, resource
         )
         uri = (
             "https://"
@@ -126,22 +177,14 @@ class LAUploader(UploaderBase):
             "x-ms-date": rfc1123date,
         }
         try:
-            response = httpx.post(
-                uri, content=body, headers=headers, timeout=self.get_http_timeout()
+            return httpx.post(
+                uri, content=content, headers=headers, timeout=self.get_http_timeout()
             )
         except httpx.ConnectError as req_err:
             raise MsticpyConnectionError(
                 "Unable to connect to workspace, ensure your Workspace ID is correct.",
                 title="Unable to connect to Workspace",
             ) from req_err
-        if self._debug is True:
-            print(f"Upload response code: {response.status_code}")
-        if response.status_code < 200 or response.status_code > 299:
-            raise MsticpyConnectionError(
-                f"""LogAnalytics data upload failed with code {response.status_code}.
-                Check Workspace ID and key""",
-                title="Data Upload Failed",
-            )
 
     def upload_df(self, data: pd.DataFrame, table_name: Any, **kwargs):
         """
@@ -154,25 +197,43 @@ class LAUploader(UploaderBase):
         table_name : str
             Custom table name to upload the data to.
 
+        Notes
+        -----
+        The data is converted to JSON and split into requests of
+        up to 25MB. These requests are posted concurrently (see the
+        `max_workers` parameter of LAUploader).
+
         """
-        events = []
-        for row in data.iterrows():
-            events.append(row[1].astype(str).to_dict())
-            # Due to 30MB limit if data is larger than 25Mb upload that chunk then continue
-            if sys.getsizeof(json.dumps(events)) > 26214400:
-                if self._debug is True:
-                    print("Data larger than 25MB spliting data requests.")
-                body = json.dumps(events)
-                self._post_data(body, table_name)
-                events = []
-
-        if events:
-            body = json.dumps(events)
-            self._post_data(body, table_name)
+        chunks = _get_json_chunks(data, _MAX_BODY_BYTES)
+        n_chunks = self._post_concurrent(chunks, table_name)
+        if self._debug and n_chunks > 1:
+            print(f"Data larger than 25MB, uploaded in {n_chunks} requests.")
 
         if self._debug:
             print(f"Upload to {table_name} complete")
 
+    def _post_concurrent(self, chunks: Iterator[str], table_name: str) -> int:
+        """Post chunks using a thread pool, returning the number of chunks."""
+        n_chunks = 0
+        pending: set = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for body in chunks:
+                    # limit the number of serialized chunks held in memory
+                    if len(pending) >= self.max_workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(self._post_data, body, table_name))
+                    n_chunks += 1
+                for future in pending:
+                    future.result()
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        return n_chunks
+
     def upload_file(
         self, file_path: str, table_name: str = None, delim: str = ",", **kwargs
     ):
@@ -226,3 +287,57 @@ class LAUploader(UploaderBase):
             self.upload_df(data, table_name)
             progress.update(1)
         progress.close()
+
+
+def _get_json_chunks(data: pd.DataFrame, max_bytes: int) -> Iterator[str]:
+    """
+    Return JSON arrays of the DataFrame records.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The data to convert. All values are converted to strings.
+    max_bytes : int
+        The maximum size of each JSON array. (A record larger than
+        this is returned in an array on its own.)
+
+    Yields
+    ------
+    str
+        JSON array of records.
+
+    """
+    records: List[str] = []
+    chunk_size = 2
+    for start in range(0, len(data), _SERIALIZE_ROWS):
+        json_lines = (
+            data.iloc[start : start + _SERIALIZE_ROWS]  # noqa: E203
+            .astype(str)
+            .to_json(orient="records", lines=True)
+        )
+        for record in json_lines.split("\n"):
+            if not record:
+                continue
+            # records are ASCII (non-ASCII characters are escaped)
+            # so the string length is the size in bytes
+            record_size = len(record) + 1
+            if records and chunk_size + record_size > max_bytes:
+                yield f"[{','.join(records)}]"
+                records = []
+                chunk_size = 2
+            records.append(record)
+            chunk_size += record_size
+    if records:
+        yield f"[{','.join(records)}]"
+
+
+def _get_retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Return the time to wait before retrying a request."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    delay = _RETRY_BACKOFF * 2**attempt
+    return delay + random.uniform(0, delay / 2)  # nosec
@@ -4,6 +4,7 @@
 # license information.
 # --------------------------------------------------------------------------
 """Splunk Uploader class."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Optional
 from tqdm.notebook import tqdm
@@ -18,12 +19,52 @@ from ...common.exceptions import MsticpyConnectionError, MsticpyUserError
 __version__ = VERSION
 __author__ = "Pete Bryan"
 
+_UPLOAD_MODES = ("stream", "submit")
 
+
+# pylint: disable=too-many-instance-attributes
 class SplunkUploader(UploaderBase):
     """Uploader class for Splunk."""
 
     def __init__(self, username: str, host: str, password: str, **kwargs):
-        """Initialize a Splunk Uploader instance."""
+        """
+        Initialize a Splunk Uploader instance.
+
+        Parameters
+        ----------
+        username : str
+            The Splunk user name.
+        host : str
+            The Splunk host name.
+        password : str
+            The password for the user.
+
+        Other Parameters
+        ----------------
+        port : int, optional
+            The Splunk management port, by default 8089.
+        connect : bool, optional
+            Connect to the Splunk host, by default True.
+        debug : bool, optional
+            Print debug messages, by default False.
+        upload_mode : str, optional
+            "submit" (the default) posts each row as a separate event.
+            "stream" writes batches of events, one JSON record per line,
+            to a socket opened with the index ``attach`` API - this is
+            much faster for large data sets.
+        batch_size : int, optional
+            The number of rows written to the socket at a time
+            in "stream" mode, by default 10000.
+        max_workers : int, optional
+            The maximum number of files uploaded concurrently
+            by `upload_folder`, by default 4.
+
+        Raises
+        ------
+        ValueError
+            If `upload_mode` is not a supported mode.
+
+        """
         super().__init__()
         self._kwargs = kwargs
         self.workspace = host
@@ -33,6 +74,14 @@ class SplunkUploader(UploaderBase):
         self.port = kwargs.get("port", 8089)
         self._debug = kwargs.get("debug", False)
         self._connect = kwargs.get("connect", True)
+        self.upload_mode = kwargs.get("upload_mode", "submit")
+        if self.upload_mode not in _UPLOAD_MODES:
+            raise ValueError(
+                f"upload_mode must be one of {', '.join(_UPLOAD_MODES)}, "
+                f"not '{self.upload_mode}'"
+            )
+        self.batch_size = max(1, kwargs.get("batch_size", 10000))
+        self.max_workers = max(1, kwargs.get("max_workers", 4))
         self.connected = False
         if self._connect:
             self.connect()
@@ -69,25 +118,40 @@ class SplunkUploader(UploaderBase):
         host : str, optional
             The hostname associated with the uploaded data, by default "Upload".
 
+        Other Parameters
+        ----------------
+        create_index : bool, optional
+            Create the index if it does not exist, by default False.
+        progress : bool, optional
+            Show a progress bar, by default True.
+
         """
-        if not self.connected:
-            raise MsticpyConnectionError(
-                "Splunk host not connected, please call .connect before proceeding.",
-                title="Splunk host not connected",
-            )
+        self._check_connected()
         if not host:
             host = "Upload"
         create_idx = kwargs.get("create_index", False)
         index = self._load_index(index_name, create_idx)
-        progress = tqdm(total=len(data.index), desc="Rows", position=0)
-        for row in data.iterrows():
-            data = row[1].to_csv()
-            try:
-                data.encode(encoding="latin-1")
-            except UnicodeEncodeError:
-                data = data.encode(encoding="utf-8")
-            index.submit(data, sourcetype=table_name, host=host)
-            progress.update(1)
+        progress = tqdm(
+            total=len(data.index),
+            desc="Rows",
+            position=0,
+            disable=not kwargs.get("progress", True),
+        )
+        if self.upload_mode == "submit":
+            for row in data.iterrows():
+                data = row[1].to_csv()
+                try:
+                    data.encode(encoding="latin-1")
+                except UnicodeEncodeError:
+                    data = data.encode(encoding="utf-8")
+                index.submit(data, sourcetype=table_name, host=host)
+                progress.update(1)
+        else:
+            with index.attached_socket(sourcetype=table_name, host=host) as sock:
+                for start in range(0, len(data), self.batch_size):
+                    batch = data.iloc[start : start + self.batch_size]  # noqa: E203
+                    sock.sendall(_to_event_lines(batch))
+                    progress.update(len(batch))
         progress.close()
         if self._debug is True:
             print("Upload complete")
@@ -212,38 +276,78 @@ class SplunkUploader(UploaderBase):
             Host name to upload data with, default will be 'Upload'
         create_index : bool, optional
             Set this to true to create the index if it doesn't already exist. Default is False.
+        glob : str, optional
+            Pattern of files in the folder to upload, by default "*".
+
+        Notes
+        -----
+        Files are uploaded concurrently (see the `max_workers`
+        parameter of SplunkUploader).
 
         """
         host = kwargs.get("host", None)
         glob_pat = kwargs.get("glob", "*")
         if not index_name:
             raise ValueError("parameter `index_name` must be specified")
-        input_files = Path(folder_path).glob(glob_pat)
-        f_progress = tqdm(total=len(list(input_files)), desc="Files", position=0)
-        for path in input_files:
-            try:
-                data = pd.read_csv(path, delimiter=delim)
-            except (ParserError, UnicodeDecodeError) as parse_err:
-                raise MsticpyUserError(
-                    "The file specified is not a seperated value file.",
-                    title="Incorrect file type.",
-                ) from parse_err
-            if not table_name:
-                table_name = path.stem
-            self._post_data(
-                data=data,
-                table_name=table_name,
-                index_name=index_name,
-                host=host,
-                create_index=create_index,
-            )
-            f_progress.update(1)
-            if self._debug is True:
-                print(f"{str(path)} uploaded to {table_name}")
+        input_files = list(Path(folder_path).glob(glob_pat))
+        # check (or create) the index before uploading files concurrently
+        self._check_connected()
+        self._load_index(index_name, create_index)
+        f_progress = tqdm(total=len(input_files), desc="Files", position=0)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._upload_folder_file,
+                    path=path,
+                    delim=delim,
+                    table_name=table_name or path.stem,
+                    index_name=index_name,
+                    host=host,
+                ): path
+                for path in input_files
+            }
+            for future in as_completed(futures):
+                file_table = future.result()
+                f_progress.update(1)
+                if self._debug is True:
+                    print(f"{str(futures[future])} uploaded to {file_table}")
         f_progress.close()
 
+    def _upload_folder_file(
+        self,
+        path: Path,
+        delim: str,
+        table_name: str,
+        index_name: str,
+        host: Optional[str],
+    ) -> str:
+        """Upload a file from a folder, returning the table name."""
+        try:
+            data = pd.read_csv(path, delimiter=delim)
+        except (ParserError, UnicodeDecodeError) as parse_err:
+            raise MsticpyUserError(
+                "The file specified is not a seperated value file.",
+                title="Incorrect file type.",
+            ) from parse_err
+        self._post_data(
+            data=data,
+            table_name=table_name,
+            index_name=index_name,
+            host=host,
+            progress=False,
+        )
+        return table_name
+
     # pylint: enable=arguments-differ
 
+    def _check_connected(self):
+        """Raise an error if not connected to the Splunk host."""
+        if not self.connected:
+            raise MsticpyConnectionError(
+                "Splunk host not connected, please call .connect before proceeding.",
+                title="Splunk host not connected",
+            )
+
     def _check_index(self, index_name: str):
         """Check if index exists in Splunk host."""
         service_list = [item.name for item in self.driver.service.indexes]
@@ -259,3 +363,9 @@ class SplunkUploader(UploaderBase):
             return self.driver.service.indexes.create(index_name)
 
         raise MsticpyConnectionError("Index not present in Splunk host.")
+
+
+def _to_event_lines(data: pd.DataFrame) -> bytes:
+    """Return the DataFrame rows as newline-delimited JSON events."""
+    events = data.to_json(orient="records", lines=True, date_format="iso")
+    return f"{events.rstrip()}\n".encode("utf-8")
@@ -0,0 +1,300 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Persistent cache for base64unpack decoding results.
+
+Results of decoding (and unpacking and hashing) a base64 string are
+stored as JSON in a sqlite database, keyed by the SHA256 hash of the string.
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .._version import VERSION
+from ..common.utility import export
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+DEFAULT_CACHE_PATH = Path("~").expanduser().joinpath(".msticpy", "b64_cache.db")
+
+
+def _get_utf16_setting() -> Callable[..., bool]:
+    """Closure for holding utf16 decoding setting."""
+    _utf16 = False
+
+    def _utf16_enabled(utf16: Optional[bool] = None) -> bool:
+        nonlocal _utf16
+        if utf16 is not None:
+            _utf16 = utf16
+        return _utf16
+
+    return _utf16_enabled
+
+
+# utf16 decoding setting (used by base64unpack and to build cache keys)
+GET_UTF16 = _get_utf16_setting()
+
+
+class DecodeCache:
+    """
+    Persistent cache of decoded base64 strings.
+
+    Strings that could not be decoded are stored with empty results.
+    When the total size of the stored items (keys and results) exceeds
+    `max_size` bytes, the least recently used items are removed.
+    """
+
+    def __init__(self, cache_path: Union[str, Path], max_size: int):
+        """Initialize the cache, creating the database if needed."""
+        self.cache_path = Path(cache_path)
+        self.max_size = max_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = 0
+        self._total_size = 0
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def settings(self) -> Tuple[str, int]:
+        """Return cache path and size - used to re-create in other processes."""
+        return str(self.cache_path), self.max_size
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Return database connection for this process."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.cache_path), timeout=30)
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS b64_decoded "
+                "(key TEXT PRIMARY KEY, results TEXT, size INTEGER, accessed REAL)"
+            )
+            self._conn_pid = os.getpid()
+            self._total_size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM b64_decoded"
+            ).fetchone()[0]
+            if self._total_size > self.max_size:
+                self._evict()
+        return self._conn
+
+    @staticmethod
+    def key(input_string: str) -> str:
+        """Return the cache key for `input_string`."""
+        # utf16 decoding changes the results, so is included in the key
+        utf16 = "utf16" if GET_UTF16() else "utf8"
+        return f"{hashlib.sha256(input_string.encode()).hexdigest()}-{utf16}"
+
+    def get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return found status and cached results for `key`."""
+        row = self.conn.execute(
+            "SELECT results FROM b64_decoded WHERE key = ?", (key,)
+        ).fetchone()
+        try:
+            results = _from_json(row[0]) if row and row[0] else None
+        except (TypeError, ValueError):
+            # not created by this version - treat as not found
+            row = None
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute(
+                "UPDATE b64_decoded SET accessed = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return True, results
+
+    def put(self, key: str, results: Optional[Dict[str, Any]]):
+        """Add `results` for `key` to the cache."""
+        json_results = _to_json(results) if results else None
+        size = len(key) + (len(json_results) if json_results else 0)
+        old_row = self.conn.execute(
+            "SELECT size FROM b64_decoded WHERE key = ?", (key,)
+        ).fetchone()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO b64_decoded VALUES (?, ?, ?, ?)",
+                (key, json_results, size, time.time()),
+            )
+        self._total_size += size - (old_row[0] if old_row else 0)
+        if self._total_size > self.max_size:
+            self._evict()
+
+    def is_undecodable(self, input_string: str) -> bool:
+        """Return True if `input_string` is cached as undecodable."""
+        row = self.conn.execute(
+            "SELECT results IS NULL FROM b64_decoded WHERE key = ?",
+            (self.key(input_string),),
+        ).fetchone()
+        return bool(row and row[0])
+
+    def clear(self):
+        """Remove all items from the cache."""
+        with self.conn:
+            self.conn.execute("DELETE FROM b64_decoded")
+        self._total_size = 0
+
+    def _evict(self):
+        """Remove least recently used items to reduce size below max_size."""
+        # remove items down to 90% of max size to avoid evicting on every put
+        target_size = self.max_size * 0.9
+        total_size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM b64_decoded"
+        ).fetchone()[0]
+        evict_keys = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM b64_decoded ORDER BY accessed"
+        ).fetchall():
+            if total_size <= target_size:
+                break
+            evict_keys.append((key,))
+            total_size -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM b64_decoded WHERE key = ?", evict_keys)
+        self._total_size = total_size
+
+
+def _to_json(results: Dict[str, Any]) -> str:
+    """Return JSON string of `results`, encoding bytes values as base64."""
+    return json.dumps(results, default=_encode_bytes)
+
+
+def _from_json(json_results: str) -> Dict[str, Any]:
+    """Return results from JSON string created by `_to_json`."""
+    return json.loads(json_results, object_hook=_decode_bytes)
+
+
+def _encode_bytes(value: Any) -> Dict[str, str]:
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_bytes(value: Dict[str, Any]) -> Any:
+    if set(value) == {"__bytes__"}:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def _get_cache_setting() -> Callable[..., Optional[DecodeCache]]:
+    """Closure for holding decode cache setting."""
+    _cache: Optional[DecodeCache] = None
+
+    def _cache_enabled(
+        cache: Union[DecodeCache, bool, None] = None
+    ) -> Optional[DecodeCache]:
+        nonlocal _cache
+        if cache is False:
+            _cache = None
+        elif isinstance(cache, DecodeCache):
+            _cache = cache
+        return _cache
+
+    return _cache_enabled
+
+
+# The current decode cache (None if caching is not enabled)
+GET_CACHE = _get_cache_setting()
+
+
+@export
+def enable_decode_cache(
+    cache_path: Union[str, Path, None] = None, max_size_mb: int = 256
+):
+    """
+    Enable a persistent cache of base64 decoding results.
+
+    Parameters
+    ----------
+    cache_path : Union[str, Path, None], optional
+        Path of the cache database file, by default
+        ".msticpy/b64_cache.db" in the user's home folder.
+    max_size_mb : int, optional
+        Maximum size of cached results in MB (the default is 256).
+        The least recently used results are removed when the cache
+        exceeds this size.
+
+    Notes
+    -----
+    The results of decoding, unpacking and hashing each base64 string
+    are stored keyed by the SHA256 hash of the string, as are the
+    strings that could not be decoded. Subsequent calls to
+    `unpack`, `unpack_items` and `unpack_df` (including from other
+    processes and sessions) will use the cached results.
+
+    """
+    GET_CACHE(DecodeCache(cache_path or DEFAULT_CACHE_PATH, max_size_mb * 1024 * 1024))
+
+
+@export
+def disable_decode_cache(clear: bool = False):
+    """
+    Disable the persistent cache of base64 decoding results.
+
+    Parameters
+    ----------
+    clear : bool, optional
+        If True, remove all items from the cache before disabling
+        it (the default is False).
+
+    """
+    decode_cache = GET_CACHE()
+    if decode_cache and clear:
+        decode_cache.clear()
+    GET_CACHE(False)
+
+
+def set_worker_cache(cache_settings: Optional[Tuple[str, int]]):
+    """Set the cache in a worker process to match the caller's cache settings."""
+    decode_cache = GET_CACHE()
+    if cache_settings and (not decode_cache or decode_cache.settings != cache_settings):
+        GET_CACHE(DecodeCache(*cache_settings))
+    elif not cache_settings:
+        GET_CACHE(False)
+
+
+def decode_cached(
+    input_string: str, decode_func: Callable[[str], Optional[Dict[str, Any]]]
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Return results for `input_string` from the cache or from `decode_func`.
+
+    Parameters
+    ----------
+    input_string : str
+        The base64 string to decode.
+    decode_func : Callable[[str], Optional[Dict[str, Any]]]
+        Function to decode the string if it is not in the cache.
+
+    Returns
+    -------
+    Tuple[bool, Optional[Dict[str, Any]]]
+        True if the results were found in the cache and the results.
+
+    """
+    decode_cache = GET_CACHE()
+    if decode_cache is None:
+        return False, decode_func(input_string)
+    cache_key = decode_cache.key(input_string)
+    found, results = decode_cache.get(cache_key)
+    if not found:
+        results = decode_func(input_string)
+        decode_cache.put(cache_key, results)
+    return found, results
+
+
+def is_cached_undecodable(input_string: str) -> bool:
+    """Return True if the decode cache has `input_string` as undecodable."""
+    decode_cache = GET_CACHE()
+    return decode_cache is not None and decode_cache.is_undecodable(input_string)
@@ -29,8 +29,11 @@ import binascii
 import gzip
 import hashlib
 import io
+import math
+import os
 import re
 import tarfile
+from concurrent.futures import ProcessPoolExecutor
 
 # pylint: disable=unused-import
 from typing import Tuple, Any, Set, Optional, List, Iterable, Dict, Callable, Union
@@ -41,6 +44,15 @@ import pandas as pd
 
 from ..common.utility import export
 from .._version import VERSION
+from .base64_cache import (  # noqa: F401
+    GET_CACHE as _GET_CACHE,
+    GET_UTF16 as _GET_UTF16,
+    decode_cached,
+    disable_decode_cache,
+    enable_decode_cache,
+    is_cached_undecodable,
+    set_worker_cache,
+)
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -120,22 +132,6 @@ def _get_trace_setting() -> Callable[[Optional[bool]], bool]:
 _GET_TRACE = _get_trace_setting()
 
 
-def _get_utf16_setting() -> Callable[[Optional[bool]], bool]:
-    """Closure for holding utf16 decoding setting."""
-    _utf16 = False
-
-    def _utf16_enabled(utf16: Optional[bool] = None) -> bool:
-        nonlocal _utf16
-        if utf16 is not None:
-            _utf16 = utf16
-        return _utf16
-
-    return _utf16_enabled
-
-
-_GET_UTF16 = _get_utf16_setting()
-
-
 @export
 def unpack_items(
     input_string: str = None,
@@ -259,7 +255,11 @@ def unpack(
 
 
 def unpack_df(
-    data: pd.DataFrame, column: str, trace: bool = False, utf16: bool = False
+    data: pd.DataFrame,
+    column: str,
+    trace: bool = False,
+    utf16: bool = False,
+    n_jobs: int = 1,
 ) -> pd.DataFrame:
     """
     Base64 decode strings taken from a pandas dataframe.
@@ -274,6 +274,9 @@ def unpack_df(
         Show additional status (the default is None)
     utf16 : bool, optional
         Attempt to decode UTF16 byte strings
+    n_jobs : int, optional
+        Number of worker processes to use to decode the
+        input strings (the default is 1, -1 uses all CPUs).
 
     Returns
     -------
@@ -310,26 +313,85 @@ def unpack_df(
     - src_index - the index of the source row in the input
       frame.
 
+    Each distinct input string is only decoded once, with the
+    results copied to each of the source rows containing that string.
+
     """
     _GET_TRACE(trace)
     _GET_UTF16(utf16)
 
-    output_df = pd.DataFrame(columns=BinaryRecord._fields)
-    row_results: List[pd.DataFrame] = []
     rows_with_b64_match = data[data[column].str.contains(_BASE64_REGEX_NG)]
-    for input_row in rows_with_b64_match[[column]].itertuples():
-        (decoded_string, output_frame) = _decode_b64_string_recursive(input_row[1])
-        output_frame["src_index"] = input_row.Index
-        output_frame[column] = input_row._asdict()[column]
-        output_frame["full_decoded_string"] = decoded_string
-        row_results.append(output_frame)
+    if rows_with_b64_match.empty:
+        return pd.DataFrame(columns=BinaryRecord._fields)
+
+    unique_strings = rows_with_b64_match[column].unique()
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(unique_strings) > 1:
+        decoded_items = _decode_strings_parallel(unique_strings, n_jobs, trace, utf16)
+    else:
+        decoded_items = _decode_strings(unique_strings)
+    decoded_results = dict(zip(unique_strings, decoded_items))
+
+    output_records: List[Dict[str, Any]] = []
+    for src_index, input_string in rows_with_b64_match[column].items():
+        decoded_string, records = decoded_results[input_string]
+        output_records.extend(
+            {
+                **record,
+                "src_index": src_index,
+                column: input_string,
+                "full_decoded_string": decoded_string,
+            }
+            for record in records
+        )
+    output_cols = dict.fromkeys(
+        [*BinaryRecord._fields, "src_index", column, "full_decoded_string"]
+    )
+    return pd.DataFrame(output_records, columns=list(output_cols))
+
+
+def _decode_strings(
+    input_strings: Iterable[str],
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Return decoded string and result records for each input string."""
+    return [_decode_b64_string_records(input_str) for input_str in input_strings]
+
+
+def _decode_strings_parallel(
+    input_strings: List[str], n_jobs: int, trace: bool, utf16: bool
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Decode input strings in chunks using a process pool."""
+    chunk_size = math.ceil(len(input_strings) / (n_jobs * 4))
+    chunks = [
+        input_strings[start : start + chunk_size]  # noqa: E203
+        for start in range(0, len(input_strings), chunk_size)
+    ]
+    decode_cache = _GET_CACHE()
+    with ProcessPoolExecutor(max_workers=n_jobs) as proc_pool:
+        chunk_results = proc_pool.map(
+            _decode_strings_worker,
+            chunks,
+            [trace] * len(chunks),
+            [utf16] * len(chunks),
+            [decode_cache.settings if decode_cache else None] * len(chunks),
+        )
+        return [result for chunk_result in chunk_results for result in chunk_result]
 
-    if row_results:
-        output_df = pd.concat(row_results, ignore_index=True)
-    return output_df
+
+def _decode_strings_worker(
+    input_strings: List[str],
+    trace: bool,
+    utf16: bool,
+    cache_settings: Optional[Tuple[str, int]],
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Decode strings in a worker process using the caller's settings."""
+    _GET_TRACE(trace)
+    _GET_UTF16(utf16)
+    set_worker_cache(cache_settings)
+    return _decode_strings(input_strings)
 
 
-# pylint: disable=too-many-locals
 def _decode_b64_string_recursive(
     input_string: str,
     max_recursion: int = 20,
@@ -337,12 +399,29 @@ def _decode_b64_string_recursive(
     item_prefix: str = "",
 ) -> Tuple[str, pd.DataFrame]:
     """Recursively decode and unpack an encoded string."""
+    decoded_string, records = _decode_b64_string_records(
+        input_string,
+        max_recursion=max_recursion,
+        current_depth=current_depth,
+        item_prefix=item_prefix,
+    )
+    return decoded_string, pd.DataFrame(records, columns=BinaryRecord._fields)
+
+
+# pylint: disable=too-many-locals
+def _decode_b64_string_records(
+    input_string: str,
+    max_recursion: int = 20,
+    current_depth: int = 1,
+    item_prefix: str = "",
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Recursively decode and unpack an encoded string, returning result records."""
     _debug_print_trace("_decode_b64_string_recursive: ", max_recursion)
     _debug_print_trace("processing input: ", input_string[:200])
 
     decoded_string = input_string
 
-    df_results = pd.DataFrame(columns=BinaryRecord._fields)
+    results: List[Dict[str, Any]] = []
     fragment_index = 0
     match_pos = 0
     decode_success = False
@@ -361,7 +440,9 @@ def _decode_b64_string_recursive(
         b64_candidate = b64match.groupdict()["b64"]
         _debug_print_trace("regex found: ", b64_candidate)
         # if we already know that this string won't decode, skip
-        if b64_candidate in _UNDECODABLE_STRINGS:
+        if b64_candidate in _UNDECODABLE_STRINGS or is_cached_undecodable(
+            b64_candidate
+        ):
             match_pos = b64match.end()
             continue
 
@@ -378,15 +459,14 @@ def _decode_b64_string_recursive(
         if decode_success:
             # we did decode something so lets put our result this in the output string
             if binary_items:
-                new_records = _add_to_results(
-                    binary_items,
-                    b64_candidate,
-                    current_depth,
-                    item_prefix,
-                    fragment_index,
-                )
-                df_results = pd.concat(
-                    [df_results, pd.DataFrame(new_records)], ignore_index=True
+                results.extend(
+                    _add_to_results(
+                        binary_items,
+                        b64_candidate,
+                        current_depth,
+                        item_prefix,
+                        fragment_index,
+                    )
                 )
             # replace the decoded fragment in our current results string
             # (decode_string)
@@ -410,7 +490,7 @@ def _decode_b64_string_recursive(
     # if we reach our max recursion depth bail out here
     if max_recursion == 0:
         _debug_print_trace("max recursion reached")
-        return decoded_string, df_results
+        return decoded_string, results
 
     if decode_success:
         # stuff that we have already decoded may also contain further
@@ -418,19 +498,16 @@ def _decode_b64_string_recursive(
         prefix = (
             f"{item_prefix}.{fragment_index}." if item_prefix else f"{fragment_index}."
         )
-        next_level_string, child_records = _decode_b64_string_recursive(
+        next_level_string, child_records = _decode_b64_string_records(
             decoded_string,
             item_prefix=prefix,
             max_recursion=max_recursion - 1,
             current_depth=(current_depth + 1),
         )
-        return (
-            next_level_string,
-            pd.concat([df_results, child_records], ignore_index=True),
-        )
+        return next_level_string, results + child_records
 
     _debug_print_trace("Nothing left to decode")
-    return decoded_string, df_results
+    return decoded_string, results
 
 
 def _add_to_results(
@@ -476,7 +553,7 @@ def _decode_and_format_b64_string(
     # Check if we recognize this as a known file type
     (_, f_type) = _is_known_b64_prefix(b64encoded_string)
     _debug_print_trace("Found type: ", f_type)
-    output_files = _decode_b64_binary(b64encoded_string, f_type)
+    output_files = _decode_b64_binary_cached(b64encoded_string, f_type)
     if not output_files:
         return b64encoded_string, None
 
@@ -646,6 +723,23 @@ def _decode_b64_binary(
         return None
 
 
+def _decode_b64_binary_cached(
+    input_string: str, file_type: str = None
+) -> Optional[Dict[str, BinaryRecord]]:
+    """Return decoded results from the decode cache or decode and cache them."""
+    found, output_files = decode_cached(
+        input_string,
+        lambda b64_str: {
+            idx: dict(record._asdict())
+            for idx, record in (_decode_b64_binary(b64_str, file_type) or {}).items()
+        },
+    )
+    _debug_print_trace("Decode results found in cache: ", found)
+    if not output_files:
+        return None
+    return {idx: BinaryRecord(**record) for idx, record in output_files.items()}
+
+
 def _unpack_and_hash_b64_binary(
     input_bytes: bytes, file_type: str = None
 ) -> Optional[Dict[str, BinaryRecord]]:
@@ -863,6 +957,9 @@ class B64ExtractAccessor:
             Show additional status (the default is None)
         utf16 : bool, optional
             Attempt to decode UTF16 byte strings
+        n_jobs : int, optional
+            Number of worker processes to use to decode the
+            input strings (the default is 1, -1 uses all CPUs).
 
         Returns
         -------
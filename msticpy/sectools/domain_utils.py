@@ -12,10 +12,12 @@ with a domain or url, such as getting a screenshot or validating the TLD.
 """
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 import json
+import re
 import ssl
 import time
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 from urllib.error import HTTPError, URLError
 
 import cryptography as crypto
@@ -128,6 +130,46 @@ else:
     _dns_resolve = getattr(_dns_resolver, "query")
 
 
+# Max number of top level domains for which validation results are cached.
+# This is larger than the number of TLDs in the public suffix list.
+TLD_CACHE_SIZE = 2048
+# Characters indicating that the input to validate_tld is not a plain domain
+_NON_DOMAIN_CHARS = re.compile(r"[/:@?#\s\\]")
+
+
+@lru_cache(maxsize=1)
+def _get_tld_labels() -> Optional[FrozenSet[str]]:
+    """Return the set of valid top-level labels from the public suffix list."""
+    try:
+        suffixes = tldextract.tldextract.TLD_EXTRACTOR.tlds
+    except Exception:  # pylint: disable=broad-except
+        return None
+    tld_labels = set()
+    for suffix in suffixes:
+        # include wildcard rules such as "*.ck", which have no rule
+        # for the TLD itself
+        if suffix.startswith("*."):
+            suffix = suffix[2:]
+        if "." not in suffix:
+            tld_labels.add(suffix.lower())
+    return frozenset(tld_labels)
+
+
+@lru_cache(maxsize=TLD_CACHE_SIZE)
+def _is_valid_tld(tld: str) -> bool:
+    """Return True if the lower-case top-level label `tld` is valid."""
+    tld_labels = _get_tld_labels()
+    if tld_labels:
+        if tld.startswith("xn--"):
+            # public suffix list holds internationalized TLDs in unicode
+            try:
+                tld = tld.encode("ascii").decode("idna")
+            except UnicodeError:
+                return False
+        return tld in tld_labels
+    return bool(tldextract.extract(f"domain.{tld}").suffix)
+
+
 @export
 class DomainValidator:
     """Assess a domain's validity."""
@@ -169,10 +211,32 @@ class DomainValidator:
         result:
             True if valid public TLD, False if not.
 
+        Notes
+        -----
+        Results for plain domain names are cached by top level domain
+        (see `tld_cache_info`), so this is cheap to call repeatedly.
+
         """
-        _, _, tld = tldextract.extract(url_domain.lower())
+        domain = url_domain.lower()
+        if domain and not domain.endswith(".") and not _NON_DOMAIN_CHARS.search(domain):
+            return _is_valid_tld(domain.rsplit(".", maxsplit=1)[-1])
+        _, _, tld = tldextract.extract(domain)
         return bool(tld)
 
+    @staticmethod
+    def tld_cache_info():
+        """
+        Return hit/miss statistics for the TLD validation cache.
+
+        Returns
+        -------
+        CacheInfo
+            functools.lru_cache statistics - hits, misses, maxsize
+            and currsize.
+
+        """
+        return _is_valid_tld.cache_info()
+
     @staticmethod
     def is_resolvable(url_domain: str) -> bool:  # pylint: disable=no-self-use
         """
@@ -30,7 +30,7 @@ from datetime import datetime, timedelta, timezone
 from json import JSONDecodeError
 from pathlib import Path
 from time import sleep
-from typing import Any, Dict, List, Mapping, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
 import geoip2.database  # type: ignore
 import pandas as pd
@@ -45,6 +45,7 @@ from ..common.provider_settings import ProviderSettings, get_provider_settings
 from ..common.pkg_config import current_config_path, get_http_timeout
 from ..common.utility import export
 from ..datamodel.entities import GeoLocation, IpAddress
+from .ip_range_index import GeoLiteDfLookup
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -376,6 +377,7 @@ Alternatively, you can pass this to the IPStackLookup class when creating it:
 
 
 @export
+# pylint: disable=too-many-instance-attributes
 class GeoLiteLookup(GeoIpLookup):
     """
     GeoIP Lookup using MaxMindDB database.
@@ -395,6 +397,8 @@ class GeoLiteLookup(GeoIpLookup):
     _DB_HOME = str(Path.joinpath(Path("~").expanduser(), ".msticpy", "GeoLite2"))
     _DB_ARCHIVE = "GeoLite2-City.mmdb.{rand}.tar.gz"
     _DB_FILE = "GeoLite2-City.mmdb"
+    # optional ASN database used by lookup_ips_df if found in the DB folder
+    _ASN_DB_FILE = "GeoLite2-ASN.mmdb"
 
     _LICENSE_HTML = """
 This product includes GeoLite2 data created by MaxMind, available from
@@ -417,6 +421,7 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
 >>> iplookup = GeoLiteLookup(api_key="your_api_key")
 """
 
+    # pylint: disable=too-many-arguments
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -424,6 +429,8 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
         force_update: bool = False,
         auto_update: bool = True,
         debug: bool = False,
+        db_mode: int = geoip2.database.MODE_AUTO,
+        engine: str = "mmdb",
     ):
         r"""
         Return new instance of GeoLiteLookup class.
@@ -451,9 +458,27 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
             new download request will be initiated if age criteria is matched.
         debug : bool, optional
             Print additional debugging information, default is False.
+        db_mode : int, optional
+            The mode used to open the database, by default MODE_AUTO
+            (use the maxminddb C extension if it is installed). Use
+            geoip2.database.MODE_MMAP to memory-map the database file.
+        engine : str, optional
+            The engine used by `lookup_ips_df`, by default "mmdb"
+            (read each address from the database). "index" builds
+            an in-memory IP range index from the database and
+            saves it next to the database file - this is slow to
+            build the first time but much faster for large
+            numbers of addresses.
+
+        Raises
+        ------
+        ValueError
+            If `engine` is not one of the supported values.
 
         """
         super().__init__()
+        if engine not in ("mmdb", "index"):
+            raise ValueError(f"engine must be 'mmdb' or 'index', not '{engine}'")
 
         self._debug = debug
         if self._debug:
@@ -468,15 +493,19 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
         self._force_update = force_update
         self._auto_update = auto_update
         self._db_path: Optional[str] = None
+        self._db_mode = db_mode
         self._reader: Any = None
+        self._engine = engine
+        self._df_lookup: Optional[GeoLiteDfLookup] = None
 
     def close(self):
         """Close an open GeoIP DB."""
-        if self._reader:
-            try:
-                self._reader.close()
-            except Exception as err:  # pylint: disable=broad-except
-                print(f"Exception when trying to close GeoIP DB {err}")
+        for reader in (self._reader, self._df_lookup):
+            if reader:
+                try:
+                    reader.close()
+                except Exception as err:  # pylint: disable=broad-except
+                    print(f"Exception when trying to close GeoIP DB {err}")
 
     def lookup_ip(
         self,
@@ -518,11 +547,14 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
         output_entities = []
         ip_cache: Dict[str, Any] = {}
         for ip_input in ip_list:
-            geo_match = None
-            try:
-                geo_match = ip_cache.get(ip_input, self._reader.city(ip_input).raw)
-            except (AddressNotFoundError, AttributeError, ValueError):
-                continue
+            if ip_input in ip_cache:
+                geo_match = ip_cache[ip_input]
+            else:
+                try:
+                    geo_match = self._reader.city(ip_input).raw
+                except (AddressNotFoundError, AttributeError, ValueError):
+                    geo_match = None
+                ip_cache[ip_input] = geo_match
             if geo_match:
                 output_raw.append(geo_match)
                 output_entities.append(
@@ -531,6 +563,58 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
 
         return output_raw, output_entities
 
+    def lookup_ips_df(
+        self, ip_addresses: Union[pd.Series, Iterable, str]
+    ) -> pd.DataFrame:
+        """
+        Lookup the locations of IP addresses, returning a DataFrame.
+
+        Parameters
+        ----------
+        ip_addresses : Union[pd.Series, Iterable, str]
+            The IP address(es) to lookup (e.g. a DataFrame column)
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with a row for each unique IP address and
+            IpAddress, CountryCode, CountryName, State, City,
+            Longitude, Latitude, ASN and ASNOrganization columns.
+            The values are empty for addresses that were not found.
+
+        Notes
+        -----
+        This is much faster than `lookup_ip` and `lookup_ips` for large
+        numbers of addresses - each unique address is read from the
+        database once and no IpAddress/GeoLocation entities are created.
+        If the class was created with `engine="index"` the addresses are
+        resolved in bulk using an IP range index built from the database.
+        Use `df_lookup_ip` or pd.merge to join the results to your data.
+        The ASN columns are only populated if the GeoLite2-ASN.mmdb
+        database is in the database folder (it is not downloaded
+        automatically).
+
+        """
+        self._check_db_open()
+        if isinstance(ip_addresses, str):
+            ip_addresses = [ip_addresses]
+        ip_series = pd.Series(ip_addresses, dtype="object").dropna()
+        unique_ips = pd.unique(ip_series.astype(str).str.strip())
+        if self._df_lookup is None:
+            self._df_lookup = GeoLiteDfLookup(
+                self._db_path,  # type: ignore
+                asn_db_path=self.asn_db_path,
+                engine=self._engine,
+                db_mode=self._db_mode,
+            )
+        return self._df_lookup.lookup(unique_ips)
+
+    @property
+    def asn_db_path(self) -> Optional[str]:
+        """Return the path of the GeoLite2-ASN database (if present)."""
+        asn_db_path = Path(self._db_folder).joinpath(self._ASN_DB_FILE)
+        return str(asn_db_path) if asn_db_path.is_file() else None
+
     @staticmethod
     def _create_ip_entity(
         ip_address: str, geo_match: Mapping[str, Any], ip_entity: IpAddress = None
@@ -563,7 +647,7 @@ Alternatively, you can pass this to the GeoLiteLookup class when creating it:
 
         if not self._db_path:
             self._raise_no_db_error()
-        self._reader = geoip2.database.Reader(self._db_path)
+        self._reader = geoip2.database.Reader(self._db_path, mode=self._db_mode)
 
     def _check_and_update_db(self):
         """
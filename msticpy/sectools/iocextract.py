@@ -23,10 +23,12 @@ The following types are built-in:
 
 """
 
+import os
 import re
 from collections import defaultdict, namedtuple
 from enum import Enum
-from typing import Any, Dict, List, Set, Tuple, Union
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Union
 from urllib.parse import unquote
 
 import pandas as pd
@@ -34,6 +36,12 @@ import pandas as pd
 from .._version import VERSION
 from ..common.utility import check_kwargs, export
 from .domain_utils import DomainValidator
+from .iocextract_engine import (
+    _RESULT_COLS,
+    extract_df_parallel,
+    read_file_chunks,
+    scan_df_columnar,
+)
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -43,9 +51,19 @@ def _compile_regex(regex):
     return re.compile(regex, re.I | re.X | re.M)
 
 
-IoCPattern = namedtuple("IoCPattern", ["ioc_type", "comp_regex", "priority", "group"])
+IoCPattern = namedtuple(
+    "IoCPattern", ["ioc_type", "comp_regex", "priority", "group", "required"]
+)
 
-_RESULT_COLS = ["IoCType", "Observable", "SourceIndex", "Input"]
+_EXTRACT_DF_KWARGS = [
+    "ioc_types",
+    "include_paths",
+    "ignore_tlds",
+    "columnar",
+    "n_jobs",
+    "executor",
+    "chunk_size",
+]
 
 
 @export
@@ -157,23 +175,27 @@ class IoCExtract:
     def __init__(self):
         """Initialize new instance of IoCExtract."""
         # IP Addresses
-        self.add_ioc_type(IoCType.ipv4.name, self.IPV4_REGEX, 0, "ipaddress")
-        self.add_ioc_type(IoCType.ipv6.name, self.IPV6_REGEX, 0)
+        self.add_ioc_type(
+            IoCType.ipv4.name, self.IPV4_REGEX, 0, "ipaddress", required="."
+        )
+        self.add_ioc_type(IoCType.ipv6.name, self.IPV6_REGEX, 0, required=":")
 
         # Dns Domains
         # This also matches IP addresses but IPs have higher
         # priority both matching on the same substring will defer
         # to the IP regex
-        self.add_ioc_type(IoCType.dns.name, self.DNS_REGEX, 1)
+        self.add_ioc_type(IoCType.dns.name, self.DNS_REGEX, 1, required=".")
 
         # Http requests
-        self.add_ioc_type(IoCType.url.name, self.URL_REGEX, 0)
+        self.add_ioc_type(IoCType.url.name, self.URL_REGEX, 0, required="://")
 
         # File paths
         # Windows
-        self.add_ioc_type(IoCType.windows_path.name, self.WINPATH_REGEX, 2)
+        self.add_ioc_type(
+            IoCType.windows_path.name, self.WINPATH_REGEX, 2, required="\\"
+        )
 
-        self.add_ioc_type(IoCType.linux_path.name, self.LXPATH_REGEX, 2)
+        self.add_ioc_type(IoCType.linux_path.name, self.LXPATH_REGEX, 2, required="/")
 
         # MD5, SHA1, SHA256 hashes
         self.add_ioc_type(IoCType.md5_hash.name, self.MD5_REGEX, 1, "hash")
@@ -185,7 +207,12 @@ class IoCExtract:
 
     # Public members
     def add_ioc_type(
-        self, ioc_type: str, ioc_regex: str, priority: int = 0, group: str = None
+        self,
+        ioc_type: str,
+        ioc_regex: str,
+        priority: int = 0,
+        group: str = None,
+        required: str = None,
     ):
         """
         Add an IoC type and regular expression to use to the built-in set.
@@ -202,6 +229,13 @@ class IoCExtract:
         group : str, optional
             The regex group to match (the default is None,
             which will match on the whole expression)
+        required : str, optional
+            A substring that must be present in the input for
+            `ioc_regex` to match (the default is None).
+            If supplied, input strings that do not contain this
+            substring are not searched with the regular expression,
+            which is much quicker than running the full match.
+            Note: this check is case-sensitive.
 
         Notes
         -----
@@ -223,6 +257,7 @@ class IoCExtract:
             comp_regex=_compile_regex(regex=ioc_regex),
             priority=priority,
             group=group,
+            required=required,
         )
 
     @property
@@ -275,6 +310,15 @@ class IoCExtract:
             If True, ignore the official Top Level Domains
             list when determining whether a domain name is
             a legal domain.
+        columnar : bool, optional
+            If True, and `data` is supplied, use the columnar
+            extraction engine (see `extract_df`), by default False.
+        n_jobs : int, optional
+            If `data` is supplied, the number of worker processes
+            to use (see `extract_df`), by default 1.
+        executor : concurrent.futures.Executor, optional
+            If `data` is supplied, an existing executor used to
+            run the extraction (see `extract_df`).
 
         Returns
         -------
@@ -302,38 +346,22 @@ class IoCExtract:
         is True or explicitly included in `ioc_paths`.
 
         """
-        check_kwargs(kwargs, ["ioc_types", "include_paths", "ignore_tlds"])
+        check_kwargs(kwargs, _EXTRACT_DF_KWARGS)
         ioc_types = kwargs.get("ioc_types", None)
-        include_paths = kwargs.get("include_paths", False)
         ignore_tld_current = self._ignore_tld
         self._ignore_tld = kwargs.get("ignore_tlds", False)
 
         if src and src.strip():
             return self._scan_for_iocs(src=src, ioc_types=ioc_types)
 
+        self._ignore_tld = ignore_tld_current
         if data is None:
             raise Exception("No source data was supplied to extract")
 
         if columns is None:
             raise Exception("No values were supplied for the columns parameter")
 
-        ioc_types_to_use = self._get_ioc_types_to_use(ioc_types, include_paths)
-
-        col_set = set(columns)
-        if col_set > set(data.columns):
-            missing_cols = [elem for elem in col_set if elem not in data.columns]
-            raise Exception(
-                f"Source column(s) {', '.join(missing_cols)} not found",
-                " in supplied DataFrame",
-            )
-
-        result_rows: List[pd.Series] = []
-        for idx, datarow in data.iterrows():
-            result_rows.extend(
-                self._search_in_row(datarow, idx, columns, ioc_types_to_use)
-            )
-        self._ignore_tld = ignore_tld_current
-        return pd.DataFrame(data=result_rows, columns=_RESULT_COLS)
+        return self.extract_df(data=data, columns=columns, **kwargs)
 
     # pylint: disable=too-many-arguments
     def _search_in_row(
@@ -342,19 +370,16 @@ class IoCExtract:
         idx: Any,
         columns: List[str],
         ioc_types_to_use: List[str],
-    ) -> List[pd.Series]:
-        """Return results for a single input row."""
-        result_rows = []
+    ) -> List[List[Any]]:
+        """Return results (in the order of _RESULT_COLS) for a single input row."""
+        result_rows: List[List[Any]] = []
         for col in columns:
             ioc_results = self._scan_for_iocs(datarow[col], ioc_types_to_use)
             for result_type, result_set in ioc_results.items():
-                if result_set:
-                    for observable in result_set:
-                        result_row = pd.Series(
-                            data=[result_type, observable, idx, datarow[col]],
-                            index=_RESULT_COLS,
-                        )
-                        result_rows.append(result_row)
+                result_rows.extend(
+                    [result_type, observable, idx, datarow[col]]
+                    for observable in result_set
+                )
         return result_rows
 
     def extract_df(
@@ -385,6 +410,23 @@ class IoCExtract:
             If True, ignore the official Top Level Domains
             list when determining whether a domain name is
             a legal domain.
+        columnar : bool, optional
+            If True, scan each column as a batch of unique values,
+            running each IoC pattern once per column rather than
+            once per cell, by default False.
+            This is much faster for large DataFrames, particularly
+            if the input columns contain many repeated values.
+        n_jobs : int, optional
+            The number of worker processes to use, by default 1.
+            If greater than 1 (or -1 to use all CPUs), the input is
+            split into chunks of rows that are processed in parallel.
+        executor : concurrent.futures.Executor, optional
+            An existing executor (e.g. a ProcessPoolExecutor) to use
+            to process chunks of the input. If supplied, `n_jobs`
+            is used only to determine the number of chunks.
+        chunk_size : int, optional
+            The number of rows in each chunk sent to a worker.
+            The default divides the data into 4 chunks per worker.
 
         Returns
         -------
@@ -409,7 +451,7 @@ class IoCExtract:
         is True or explicitly included in `ioc_paths`.
 
         """
-        check_kwargs(kwargs, ["ioc_types", "include_paths", "ignore_tlds"])
+        check_kwargs(kwargs, _EXTRACT_DF_KWARGS)
         ioc_types = kwargs.get("ioc_types", None)
         include_paths = kwargs.get("include_paths", False)
         ignore_tld_current = self._ignore_tld
@@ -426,14 +468,110 @@ class IoCExtract:
                 " in supplied DataFrame",
             )
 
+        columnar = kwargs.get("columnar", False)
+        n_jobs = kwargs.get("n_jobs", 1)
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        executor = kwargs.get("executor")
+        if (n_jobs > 1 or executor is not None) and len(data) > 1:
+            results = extract_df_parallel(
+                self,
+                data,
+                columns,
+                ioc_types_to_use,
+                columnar=columnar,
+                n_jobs=n_jobs,
+                executor=executor,
+                chunk_size=kwargs.get("chunk_size"),
+            )
+        elif columnar:
+            results = self._scan_df_columnar(data, columns, ioc_types_to_use)
+        else:
+            results = self._scan_df_rows(data, columns, ioc_types_to_use)
+        self._ignore_tld = ignore_tld_current
+        return results
+
+    def extract_stream(
+        self,
+        data: Union[str, Path, Iterable[pd.DataFrame]],
+        columns: Union[str, List[str]],
+        file_chunk_size: int = 100_000,
+        **kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Extract IoCs incrementally from chunks of data.
+
+        Parameters
+        ----------
+        data : Union[str, Path, Iterable[pd.DataFrame]]
+            Either an iterable of DataFrames (e.g. from
+            `pd.read_csv(..., chunksize=n)`) or the path to a
+            CSV (.csv) or JSON lines (.json, .jsonl, .ndjson) file.
+        columns : Union[str, List[str]]
+            A single column name as a string or a
+            a list of columns to use as source strings,
+        file_chunk_size : int, optional
+            The number of rows to read from a file for each chunk,
+            by default 100,000. Ignored if `data` is not a file path.
+
+        Other Parameters
+        ----------------
+        kwargs :
+            Other parameters are passed to `extract_df`. See
+            `extract_df` for details. (Note that the `chunk_size`
+            parameter of `extract_df` sets the number of rows
+            sent to each worker process.)
+
+        Yields
+        ------
+        pd.DataFrame
+            DataFrame of observables for each chunk of input that
+            has results.
+
+        Raises
+        ------
+        ValueError
+            If `data` is a path to a file of an unsupported type.
+
+        Notes
+        -----
+        Only one chunk of the input is held in memory at any time.
+        When reading from a file, only the requested columns are read
+        and the SourceIndex values are the row numbers in the file.
+
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        if isinstance(data, (str, Path)):
+            data = read_file_chunks(Path(data), columns, file_chunk_size)
+        for data_chunk in data:
+            results = self.extract_df(data=data_chunk, columns=columns, **kwargs)
+            if not results.empty:
+                yield results
+
+    def _scan_df_rows(
+        self, data: pd.DataFrame, columns: List[str], ioc_types_to_use: List[str]
+    ) -> pd.DataFrame:
+        """Return results for DataFrame, scanning each row in turn."""
         result_rows = []
         for idx, datarow in data.iterrows():
             result_rows.extend(
                 self._search_in_row(datarow, idx, columns, ioc_types_to_use)
             )
-        self._ignore_tld = ignore_tld_current
         return pd.DataFrame(data=result_rows, columns=_RESULT_COLS)
 
+    def _scan_df_columnar(
+        self, data: pd.DataFrame, columns: List[str], ioc_types_to_use: List[str]
+    ) -> pd.DataFrame:
+        """Return results for DataFrame, scanning unique values of each column."""
+        return scan_df_columnar(
+            data,
+            columns,
+            ioc_types_to_use,
+            self._content_regex,
+            validate_tld=None if self._ignore_tld else self._validate_tld,
+        )
+
     def _get_ioc_types_to_use(
         self, ioc_types: List[str], include_paths: bool
     ) -> List[str]:
@@ -565,6 +703,8 @@ class IoCExtract:
         for (ioc_type, rgx_def) in self._content_regex.items():
             if ioc_types and ioc_type not in ioc_types:
                 continue
+            if rgx_def.required and rgx_def.required not in src:
+                continue
 
             match_pos = 0
             for rgx_match in rgx_def.comp_regex.finditer(src, match_pos):
@@ -646,6 +786,14 @@ class IoCExtractAccessor:
             (the default is false - excludes 'windows_path'
             and 'linux_path'). If `ioc_types` is specified
             this parameter is ignored.
+        columnar : bool, optional
+            If True, scan each column as a batch of unique values,
+            by default False.
+        n_jobs : int, optional
+            The number of worker processes to use, by default 1.
+            (-1 to use all CPUs)
+        executor : concurrent.futures.Executor, optional
+            An existing executor to use to process chunks of the input.
 
         Returns
         -------
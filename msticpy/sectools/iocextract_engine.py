@@ -0,0 +1,330 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Columnar and parallel DataFrame scanning for IoCExtract.
+
+The columnar engine runs each IoC pattern once over the unique values
+of each input column (using pandas vectorized string matching) rather
+than once per cell. The parallel engine splits the input DataFrame into
+chunks of rows that are processed by worker processes.
+"""
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from .._version import VERSION
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+_RESULT_COLS = ["IoCType", "Observable", "SourceIndex", "Input"]
+# Name of the group wrapped around each pattern for columnar matching
+_MATCH_GROUP = "_ioc_extract_match"
+# IoC type names with special handling (see IoCType)
+_DNS_TYPE = "dns"
+_URL_TYPE = "url"
+
+
+def scan_df_columnar(
+    data: pd.DataFrame,
+    columns: List[str],
+    ioc_types_to_use: List[str],
+    content_regex: Dict[str, Any],
+    validate_tld: Optional[Callable[[str], bool]] = None,
+) -> pd.DataFrame:
+    """
+    Return IoC results for DataFrame, scanning unique values of each column.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The input data.
+    columns : List[str]
+        The columns to scan.
+    ioc_types_to_use : List[str]
+        The IoC types to match (all types in `content_regex` if empty).
+    content_regex : Dict[str, Any]
+        The IoCPattern definitions, keyed by IoC type.
+    validate_tld : Optional[Callable[[str], bool]], optional
+        Function to check the TLD of "dns" matches. If None,
+        TLDs are not checked.
+
+    Returns
+    -------
+    pd.DataFrame
+        IoC results (with the same columns as IoCExtract.extract_df).
+
+    """
+    col_results = []
+    for col_pos, col in enumerate(columns):
+        src_col = data[col]
+        valid_rows = src_col.notna().to_numpy()
+        codes, unique_vals = pd.factorize(src_col[valid_rows].astype(str))
+        if unique_vals.empty:
+            continue
+        matches = _match_unique_values(
+            pd.Series(unique_vals), ioc_types_to_use, content_regex, validate_tld
+        )
+        if matches.empty:
+            continue
+        src_rows = pd.DataFrame(
+            {
+                "ValueIdx": codes,
+                "SourceIndex": data.index[valid_rows],
+                "RowPos": np.flatnonzero(valid_rows),
+            }
+        )
+        col_result = src_rows.merge(matches, on="ValueIdx")
+        col_result["Input"] = src_col.to_numpy()[col_result["RowPos"].to_numpy()]
+        col_result["ColPos"] = col_pos
+        col_results.append(col_result)
+    if not col_results:
+        return pd.DataFrame(columns=_RESULT_COLS)
+    return (
+        pd.concat(col_results, ignore_index=True)
+        .sort_values(["RowPos", "ColPos"], kind="stable")[_RESULT_COLS]
+        .reset_index(drop=True)
+    )
+
+
+def _match_unique_values(
+    values: pd.Series,
+    ioc_types_to_use: List[str],
+    content_regex: Dict[str, Any],
+    validate_tld: Optional[Callable[[str], bool]],
+) -> pd.DataFrame:
+    """Return highest priority matches for each of a series of unique values."""
+    type_results = []
+    for type_pos, (ioc_type, rgx_def) in enumerate(content_regex.items()):
+        if ioc_types_to_use and ioc_type not in ioc_types_to_use:
+            continue
+        type_matches = _extract_all(values, rgx_def)
+        if ioc_type == _DNS_TYPE and validate_tld is not None:
+            type_matches = type_matches[
+                _validate_tlds(type_matches["Observable"], validate_tld)
+            ]
+        type_results.append(
+            type_matches.assign(
+                IoCType=ioc_type, Priority=rgx_def.priority, TypePos=type_pos
+            )
+        )
+        if ioc_type == _URL_TYPE and not type_matches.empty:
+            type_results.extend(
+                _decoded_url_matches(
+                    type_matches, rgx_def, content_regex[_DNS_TYPE], type_pos
+                )
+            )
+    if not type_results:
+        return pd.DataFrame(columns=["ValueIdx", "IoCType", "Observable"])
+    # Where multiple types match the same substring, keep the type with
+    # the highest priority (or the first type defined for equal priority)
+    return (
+        pd.concat(type_results, ignore_index=True)
+        .sort_values(["Priority", "TypePos"], kind="stable")
+        .drop_duplicates(subset=["ValueIdx", "Observable"])
+        .sort_values(["ValueIdx", "TypePos"], kind="stable")[
+            ["ValueIdx", "IoCType", "Observable"]
+        ]
+    )
+
+
+def _decoded_url_matches(
+    url_matches: pd.DataFrame, rgx_def: Any, dns_def: Any, type_pos: int
+) -> List[pd.DataFrame]:
+    """Get any other URL and host IoCs from decoded URLs."""
+    url_codes, unique_urls = pd.factorize(url_matches["Observable"])
+    decoded = _extract_groups(pd.Series(unique_urls).map(unquote), rgx_def)
+    decoded_df = pd.DataFrame(
+        {
+            "UrlIdx": decoded.index.get_level_values(0),
+            "url": decoded[_MATCH_GROUP].to_numpy(),
+            "host": decoded["host"].to_numpy(),
+        }
+    )
+    joined = pd.DataFrame(
+        {"UrlIdx": url_codes, "ValueIdx": url_matches["ValueIdx"].to_numpy()}
+    ).merge(decoded_df, on="UrlIdx")
+    return [
+        _match_frame(joined["ValueIdx"], joined["url"]).assign(
+            IoCType=rgx_def.ioc_type, Priority=rgx_def.priority, TypePos=type_pos
+        ),
+        _match_frame(joined["ValueIdx"], joined["host"]).assign(
+            IoCType=dns_def.ioc_type, Priority=dns_def.priority, TypePos=type_pos
+        ),
+    ]
+
+
+def _extract_all(values: pd.Series, rgx_def: Any) -> pd.DataFrame:
+    """Return ValueIdx and Observable for all matches of pattern in values."""
+    if rgx_def.required:
+        values = values[values.str.contains(rgx_def.required, regex=False)]
+    matches = _extract_groups(values, rgx_def)
+    return _match_frame(
+        matches.index.get_level_values(0), matches[rgx_def.group or _MATCH_GROUP]
+    )
+
+
+def _validate_tlds(
+    domains: pd.Series, validate_tld: Callable[[str], bool]
+) -> pd.Series:
+    """Return boolean mask of `domains` with valid TLDs."""
+    valid_tlds = {domain: validate_tld(domain) for domain in domains.unique()}
+    return domains.map(valid_tlds).astype(bool)
+
+
+def _extract_groups(values: pd.Series, rgx_def: Any) -> pd.DataFrame:
+    """Return all regex groups for every match of `rgx_def` in `values`."""
+    # wrap the whole pattern in a named group so that we can retrieve
+    # the full match string for patterns that do not specify a group.
+    # (all patterns are compiled with re.X so the newline is ignored)
+    pattern = f"(?P<{_MATCH_GROUP}>{rgx_def.comp_regex.pattern}\n)"
+    return values.str.extractall(pattern, flags=rgx_def.comp_regex.flags)
+
+
+def _match_frame(value_idx: Any, observables: Any) -> pd.DataFrame:
+    """Return DataFrame of ValueIdx, Observable, dropping empty matches."""
+    match_df = pd.DataFrame(
+        {"ValueIdx": np.asarray(value_idx), "Observable": np.asarray(observables)}
+    )
+    return match_df[match_df["Observable"].notna() & (match_df["Observable"] != "")]
+
+
+# pylint: disable=too-many-arguments
+def extract_df_parallel(
+    extractor: Any,
+    data: pd.DataFrame,
+    columns: List[str],
+    ioc_types_to_use: List[str],
+    columnar: bool,
+    n_jobs: int,
+    executor: Optional[Executor] = None,
+    chunk_size: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Split data into chunks of rows and extract from each in parallel.
+
+    Parameters
+    ----------
+    extractor : IoCExtract
+        The extractor with the IoC patterns and settings to use.
+    data : pd.DataFrame
+        The input data.
+    columns : List[str]
+        The columns to scan.
+    ioc_types_to_use : List[str]
+        The IoC types to match.
+    columnar : bool
+        Use the columnar engine to process each chunk.
+    n_jobs : int
+        The number of worker processes.
+    executor : Optional[Executor], optional
+        An existing executor to use, by default None.
+    chunk_size : Optional[int], optional
+        The number of rows in each chunk, by default 4 chunks
+        per worker.
+
+    Returns
+    -------
+    pd.DataFrame
+        IoC results (with the same columns as IoCExtract.extract_df).
+
+    """
+    chunk_size = chunk_size or math.ceil(len(data) / (max(n_jobs, 1) * 4))
+    chunks = [
+        data.iloc[start : start + chunk_size, :]  # noqa: E203
+        for start in range(0, len(data), chunk_size)
+    ]
+    # pass the extractor class and pattern definitions rather than the
+    # extractor instance so that each worker can rebuild its own
+    # extractor once.
+    ioc_defs = tuple(
+        (
+            rgx_def.ioc_type,
+            rgx_def.comp_regex.pattern,
+            rgx_def.priority,
+            rgx_def.group,
+            rgx_def.required,
+        )
+        for rgx_def in extractor.ioc_types.values()
+    )
+    chunk_args = (
+        [type(extractor)] * len(chunks),
+        [columns] * len(chunks),
+        [ioc_types_to_use] * len(chunks),
+        [ioc_defs] * len(chunks),
+        [extractor._ignore_tld] * len(chunks),  # pylint: disable=protected-access
+        [columnar] * len(chunks),
+    )
+    if executor is not None:
+        chunk_results = list(executor.map(_extract_chunk, chunks, *chunk_args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as proc_pool:
+            chunk_results = list(proc_pool.map(_extract_chunk, chunks, *chunk_args))
+    chunk_results = [result for result in chunk_results if not result.empty]
+    if not chunk_results:
+        return pd.DataFrame(columns=_RESULT_COLS)
+    return pd.concat(chunk_results, ignore_index=True)
+
+
+def read_file_chunks(
+    file_path: Path, columns: List[str], chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    """Return iterator of DataFrame chunks read from a CSV or JSON lines file."""
+    suffix = file_path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+    if suffix in (".json", ".jsonl", ".ndjson"):
+        return (
+            chunk[columns]
+            for chunk in pd.read_json(file_path, lines=True, chunksize=chunk_size)
+        )
+    raise ValueError(
+        f"Unsupported file type '{suffix}'.",
+        "Use a .csv or JSON lines (.json, .jsonl, .ndjson) file.",
+    )
+
+
+# Extractor instance used by worker processes, keyed by the
+# extractor class and the pattern definitions that it was built with.
+_WORKER_EXTRACTOR: Dict[tuple, Any] = {}
+
+
+def _get_worker_extractor(extractor_cls: type, ioc_defs: tuple) -> Any:
+    """Return an extractor for `ioc_defs`, created once per worker process."""
+    key = (extractor_cls, ioc_defs)
+    if key not in _WORKER_EXTRACTOR:
+        _WORKER_EXTRACTOR.clear()
+        extractor = extractor_cls()
+        for ioc_type, ioc_regex, priority, group, required in ioc_defs:
+            extractor.add_ioc_type(ioc_type, ioc_regex, priority, group, required)
+        _WORKER_EXTRACTOR[key] = extractor
+    return _WORKER_EXTRACTOR[key]
+
+
+# pylint: disable=protected-access
+def _extract_chunk(
+    data: pd.DataFrame,
+    extractor_cls: type,
+    columns: List[str],
+    ioc_types_to_use: List[str],
+    ioc_defs: tuple,
+    ignore_tld: bool,
+    columnar: bool,
+) -> pd.DataFrame:
+    """Extract IoCs from a chunk of rows - run in a worker process."""
+    extractor = _get_worker_extractor(extractor_cls, ioc_defs)
+    extractor._ignore_tld = ignore_tld
+    if columnar:
+        return extractor._scan_df_columnar(data, columns, ioc_types_to_use)
+    return extractor._scan_df_rows(data, columns, ioc_types_to_use)
+
+
+# pylint: enable=too-many-arguments, protected-access
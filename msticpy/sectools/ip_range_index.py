@@ -0,0 +1,579 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+In-memory IP range index for bulk GeoIP and ASN lookups.
+
+The networks of a MaxMind database (or a CSV export of one) are converted
+into sorted arrays of the start and end addresses of each network and an
+array of ids of the record (e.g. the location) of each network. Many IP
+addresses can then be resolved at once with `np.searchsorted` rather than
+walking the database tree for each address.
+
+IPv4 ranges are stored as integers. IPv6 ranges are stored as 16 byte
+big-endian strings, which sort in the same order as the addresses.
+
+Building the index from a database takes a while, so `load_or_build`
+saves the index to a file next to the database and only rebuilds it
+if the database file changes.
+"""
+import ipaddress
+import json
+import os
+import socket
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple, Union
+
+import maxminddb  # type: ignore
+import numpy as np
+import pandas as pd
+
+from .._version import VERSION
+from ..common.exceptions import MsticpyException
+from ..common.utility import export
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+FORMAT_VERSION = 1
+INDEX_SUFFIX = ".idx.npz"
+
+# names of the fields returned by city_fields and asn_fields
+CITY_COLUMNS = ["CountryCode", "CountryName", "State", "City", "Longitude", "Latitude"]
+ASN_COLUMNS = ["ASN", "ASNOrganization"]
+
+_NetworkType = Union[str, ipaddress.IPv4Network, ipaddress.IPv6Network]
+RecordFieldsFunc = Callable[[Optional[Mapping[str, Any]]], Tuple[Any, ...]]
+
+
+@export
+class IPRangeIndex:
+    """Sorted IP range index for bulk lookups of IP addresses."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        columns: List[str],
+        records: List[Tuple[Any, ...]],
+        v4_ranges: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        v6_ranges: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        source_stamp: Optional[List[int]] = None,
+    ):
+        """
+        Create the index from sorted range arrays.
+
+        Use `from_records`, `from_mmdb`, `from_csv` or `load_or_build`
+        rather than creating the index directly.
+
+        Parameters
+        ----------
+        columns : List[str]
+            The names of the fields of each record.
+        records : List[Tuple[Any, ...]]
+            The unique records referred to by the ranges.
+        v4_ranges : Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The (starts, ends, record ids) of the IPv4 ranges, sorted by start.
+        v6_ranges : Tuple[np.ndarray, np.ndarray, np.ndarray]
+            The (starts, ends, record ids) of the IPv6 ranges, sorted by start.
+        source_stamp : Optional[List[int]], optional
+            The size and modification time of the file that the index
+            was built from, by default None.
+
+        """
+        self.columns = list(columns)
+        self.records = records
+        self.v4_ranges = v4_ranges
+        self.v6_ranges = v6_ranges
+        self.source_stamp = source_stamp
+        # the final row of the records frame is returned for addresses
+        # that are not found
+        self._records_df = pd.DataFrame(
+            [*records, (None,) * len(self.columns)], columns=self.columns
+        )
+
+    def __len__(self) -> int:
+        """Return the number of ranges in the index."""
+        return len(self.v4_ranges[0]) + len(self.v6_ranges[0])
+
+    @classmethod
+    def from_records(
+        cls,
+        networks: Iterable[Tuple[_NetworkType, Any]],
+        columns: List[str],
+        record_fields: Optional[RecordFieldsFunc] = None,
+    ) -> "IPRangeIndex":
+        """
+        Build the index from (network, record) pairs.
+
+        Parameters
+        ----------
+        networks : Iterable[Tuple[_NetworkType, Any]]
+            The networks and their records. The networks must not overlap.
+        columns : List[str]
+            The names of the fields of the records.
+        record_fields : Optional[RecordFieldsFunc], optional
+            Function to convert each record into a tuple of the
+            fields in `columns`, by default None (the records are
+            already tuples).
+
+        Returns
+        -------
+        IPRangeIndex
+            The index.
+
+        """
+        record_ids: dict = {}
+        ranges: dict = {4: ([], [], []), 6: ([], [], [])}
+        for network, record in networks:
+            if not isinstance(network, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+                network = ipaddress.ip_network(str(network).strip(), strict=False)
+            fields = record_fields(record) if record_fields else tuple(record)
+            rec_id = record_ids.setdefault(fields, len(record_ids))
+            starts, ends, ids = ranges[network.version]
+            starts.append(int(network.network_address))
+            ends.append(int(network.broadcast_address))
+            ids.append(rec_id)
+
+        return cls(
+            columns=columns,
+            records=list(record_ids),
+            v4_ranges=_sorted_ranges(ranges[4], dtype=np.uint32),
+            v6_ranges=_sorted_ranges(
+                (_to_bytes(ranges[6][0]), _to_bytes(ranges[6][1]), ranges[6][2]),
+                dtype="S16",
+            ),
+        )
+
+    @classmethod
+    def from_mmdb(
+        cls,
+        db_path: Union[str, Path],
+        columns: List[str],
+        record_fields: RecordFieldsFunc,
+    ) -> "IPRangeIndex":
+        """
+        Build the index from a MaxMind (.mmdb) database.
+
+        Parameters
+        ----------
+        db_path : Union[str, Path]
+            Path to the database.
+        columns : List[str]
+            The names of the fields returned by `record_fields`.
+        record_fields : RecordFieldsFunc
+            Function to convert each database record into a tuple of
+            the fields in `columns`.
+
+        Returns
+        -------
+        IPRangeIndex
+            The index.
+
+        """
+        with maxminddb.open_database(str(db_path)) as reader:
+            index = cls.from_records(reader, columns, record_fields)
+        index.source_stamp = _get_source_stamp(db_path)
+        return index
+
+    @classmethod
+    def from_csv(
+        cls,
+        data: Union[str, Path, pd.DataFrame],
+        columns: Optional[List[str]] = None,
+        network_col: str = "network",
+    ) -> "IPRangeIndex":
+        """
+        Build the index from a CSV file or DataFrame of networks.
+
+        Parameters
+        ----------
+        data : Union[str, Path, pd.DataFrame]
+            Path to the CSV file (e.g. GeoLite2-ASN-Blocks-IPv4.csv)
+            or a DataFrame with the same data.
+        columns : Optional[List[str]], optional
+            The columns to include in the index, by default all
+            columns other than `network_col`.
+        network_col : str, optional
+            The column holding the network (CIDR), by default "network".
+
+        Returns
+        -------
+        IPRangeIndex
+            The index.
+
+        Notes
+        -----
+        The GeoLite2 City CSV export holds the locations in a separate
+        file (GeoLite2-City-Locations-en.csv). Merge this with the
+        blocks on the "geoname_id" column before building the index.
+
+        """
+        if isinstance(data, pd.DataFrame):
+            data_df = data
+        else:
+            data_df = pd.read_csv(data)
+        if network_col not in data_df.columns:
+            raise MsticpyException(f"Column {network_col} not found in data.")
+        columns = columns or [col for col in data_df.columns if col != network_col]
+        values = data_df[columns].astype("object")
+        values = values.where(values.notna(), None)
+        return cls.from_records(
+            zip(data_df[network_col], values.itertuples(index=False, name=None)),
+            columns=columns,
+        )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        db_path: Union[str, Path],
+        columns: List[str],
+        record_fields: RecordFieldsFunc,
+    ) -> "IPRangeIndex":
+        """
+        Load the saved index for a database, building it if needed.
+
+        Parameters
+        ----------
+        db_path : Union[str, Path]
+            Path to the MaxMind database.
+        columns : List[str]
+            The names of the fields returned by `record_fields`.
+        record_fields : RecordFieldsFunc
+            Function to convert each database record into a tuple of
+            the fields in `columns`.
+
+        Returns
+        -------
+        IPRangeIndex
+            The index.
+
+        Notes
+        -----
+        The index is saved next to the database with the suffix
+        ".idx.npz". It is rebuilt if the size or modification time
+        of the database differs from the one it was built from or
+        if it was built with different `columns`.
+
+        """
+        index_path = get_index_path(db_path)
+        if index_path.is_file():
+            try:
+                index = cls.load(index_path)
+                if index.source_stamp == _get_source_stamp(
+                    db_path
+                ) and index.columns == list(columns):
+                    return index
+            except (MsticpyException, OSError, ValueError, KeyError):
+                pass
+        index = cls.from_mmdb(db_path, columns, record_fields)
+        try:
+            index.save(index_path)
+        except OSError as err:
+            warnings.warn(f"Could not save IP range index to {index_path}: {err}")
+        return index
+
+    def save(self, path: Union[str, Path]):
+        """
+        Save the index to a file.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            Path of the file to save to.
+
+        """
+        path = Path(path)
+        metadata = {
+            "format_version": FORMAT_VERSION,
+            "columns": self.columns,
+            "source_stamp": self.source_stamp,
+            "records": self.records,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as idx_file:
+                np.savez(
+                    idx_file,
+                    metadata=np.array(json.dumps(metadata)),
+                    v4_starts=self.v4_ranges[0],
+                    v4_ends=self.v4_ranges[1],
+                    v4_ids=self.v4_ranges[2],
+                    v6_starts=self.v6_ranges[0],
+                    v6_ends=self.v6_ranges[1],
+                    v6_ids=self.v6_ranges[2],
+                )
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IPRangeIndex":
+        """
+        Load an index saved with `save`.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            Path of the saved index.
+
+        Returns
+        -------
+        IPRangeIndex
+            The index.
+
+        Raises
+        ------
+        MsticpyException
+            If the file was saved with an unsupported format version.
+
+        """
+        with np.load(path, allow_pickle=False) as idx_data:
+            metadata = json.loads(str(idx_data["metadata"]))
+            if metadata.get("format_version") != FORMAT_VERSION:
+                raise MsticpyException(
+                    "Unsupported IP range index format version "
+                    f"{metadata.get('format_version')}"
+                )
+            return cls(
+                columns=metadata["columns"],
+                records=[tuple(rec) for rec in metadata["records"]],
+                v4_ranges=(
+                    idx_data["v4_starts"],
+                    idx_data["v4_ends"],
+                    idx_data["v4_ids"],
+                ),
+                v6_ranges=(
+                    idx_data["v6_starts"],
+                    idx_data["v6_ends"],
+                    idx_data["v6_ids"],
+                ),
+                source_stamp=metadata["source_stamp"],
+            )
+
+    def lookup(self, ip_addresses: Iterable[str]) -> pd.DataFrame:
+        """
+        Lookup the records of IP addresses.
+
+        Parameters
+        ----------
+        ip_addresses : Iterable[str]
+            The IP addresses to lookup.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with an "IpAddress" column and the columns of the
+            index for each address (in the same order as `ip_addresses`).
+            The values are None for addresses that are not found or
+            are not valid IP addresses.
+
+        """
+        ip_addresses = list(ip_addresses)
+        rec_ids = np.full(len(ip_addresses), len(self.records), dtype=np.int64)
+        v4_pos, v4_keys, v6_pos, v6_keys = [], [], [], []
+        for pos, ip_addr in enumerate(ip_addresses):
+            ip_str = str(ip_addr).strip()
+            # inet_pton is much faster than ipaddress.ip_address
+            try:
+                v4_keys.append(socket.inet_pton(socket.AF_INET, ip_str))
+                v4_pos.append(pos)
+                continue
+            except OSError:
+                pass
+            try:
+                v6_keys.append(socket.inet_pton(socket.AF_INET6, ip_str))
+                v6_pos.append(pos)
+            except OSError:
+                continue
+
+        if v4_pos:
+            rec_ids[v4_pos] = self._search(
+                self.v4_ranges, np.frombuffer(b"".join(v4_keys), dtype=">u4")
+            )
+        if v6_pos:
+            rec_ids[v6_pos] = self._search(
+                self.v6_ranges, np.array(v6_keys, dtype="S16")
+            )
+        results = self._records_df.iloc[rec_ids].reset_index(drop=True)
+        results.insert(0, "IpAddress", ip_addresses)
+        return results
+
+    def _search(
+        self, ranges: Tuple[np.ndarray, np.ndarray, np.ndarray], keys: np.ndarray
+    ) -> np.ndarray:
+        """Return the record ids of the ranges containing `keys`."""
+        starts, ends, ids = ranges
+        not_found = len(self.records)
+        if starts.size == 0:
+            return np.full(len(keys), not_found, dtype=np.int64)
+        pos = np.searchsorted(starts, keys, side="right") - 1
+        in_range = pos >= 0
+        pos[~in_range] = 0
+        in_range &= keys <= ends[pos]
+        return np.where(in_range, ids[pos], not_found)
+
+
+def get_index_path(db_path: Union[str, Path]) -> Path:
+    """Return the path of the saved index for the database `db_path`."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}{INDEX_SUFFIX}")
+
+
+def get_record(reader: Any, ip_address: str) -> Optional[Mapping[str, Any]]:
+    """Return the raw database record for `ip_address` (if any)."""
+    if reader is None:
+        return None
+    try:
+        return reader.get(ip_address)
+    except ValueError:
+        # not a valid IP address
+        return None
+
+
+def city_fields(geo_match: Optional[Mapping[str, Any]]) -> Tuple[Any, ...]:
+    """Return the location fields (CITY_COLUMNS) of a GeoLite2-City record."""
+    if not geo_match:
+        return (None,) * 6
+    country = geo_match.get("country", {})
+    subdivs = geo_match.get("subdivisions", [])
+    location = geo_match.get("location", {})
+    return (
+        country.get("iso_code"),
+        country.get("names", {}).get("en"),
+        subdivs[0].get("names", {}).get("en") if subdivs else None,
+        geo_match.get("city", {}).get("names", {}).get("en"),
+        location.get("longitude"),
+        location.get("latitude"),
+    )
+
+
+def asn_fields(asn_match: Optional[Mapping[str, Any]]) -> Tuple[Any, Any]:
+    """Return the ASN fields (ASN_COLUMNS) of a GeoLite2-ASN record."""
+    if not asn_match:
+        return None, None
+    return (
+        asn_match.get("autonomous_system_number"),
+        asn_match.get("autonomous_system_organization"),
+    )
+
+
+class GeoLiteDfLookup:
+    """Bulk lookups of IP addresses in GeoLite2 City and ASN databases."""
+
+    def __init__(
+        self,
+        city_db_path: str,
+        asn_db_path: Optional[str] = None,
+        engine: str = "mmdb",
+        db_mode: int = maxminddb.MODE_AUTO,
+    ):
+        """
+        Create the lookup for the GeoLite2 databases.
+
+        Parameters
+        ----------
+        city_db_path : str
+            Path to the GeoLite2-City database.
+        asn_db_path : Optional[str], optional
+            Path to the GeoLite2-ASN database, by default None.
+            If None, the ASN columns of the results are empty.
+        engine : str, optional
+            "mmdb" (the default) to read each address from the
+            databases or "index" to use an IPRangeIndex built from
+            (and saved next to) each database.
+        db_mode : int, optional
+            The mode used to open the databases with the "mmdb"
+            engine, by default MODE_AUTO.
+
+        """
+        self.city_db_path = city_db_path
+        self.asn_db_path = asn_db_path
+        self.engine = engine
+        self.db_mode = db_mode
+        self._city_source: Any = None
+        self._asn_source: Any = None
+
+    def lookup(self, ip_addresses: Iterable[str]) -> pd.DataFrame:
+        """
+        Return the City and ASN fields of IP addresses.
+
+        Parameters
+        ----------
+        ip_addresses : Iterable[str]
+            The (unique) IP addresses to lookup.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with IpAddress, CITY_COLUMNS and ASN_COLUMNS columns.
+
+        """
+        if self._city_source is None:
+            self._city_source = self._open(self.city_db_path, CITY_COLUMNS, city_fields)
+        if self._asn_source is None and self.asn_db_path:
+            self._asn_source = self._open(self.asn_db_path, ASN_COLUMNS, asn_fields)
+        if self.engine != "index":
+            rows = [
+                (
+                    ip_addr,
+                    *city_fields(get_record(self._city_source, ip_addr)),
+                    *asn_fields(get_record(self._asn_source, ip_addr)),
+                )
+                for ip_addr in ip_addresses
+            ]
+            return pd.DataFrame(
+                rows, columns=["IpAddress", *CITY_COLUMNS, *ASN_COLUMNS]
+            )
+        results = self._city_source.lookup(ip_addresses)
+        if self._asn_source is None:
+            return results.assign(**{col: None for col in ASN_COLUMNS})
+        asn_results = self._asn_source.lookup(ip_addresses)
+        for col in ASN_COLUMNS:
+            results[col] = asn_results[col]
+        return results
+
+    def close(self):
+        """Close any open database readers."""
+        for source in (self._city_source, self._asn_source):
+            if source is not None and self.engine != "index":
+                source.close()
+        self._city_source = self._asn_source = None
+
+    def _open(
+        self, db_path: str, columns: List[str], record_fields: RecordFieldsFunc
+    ) -> Any:
+        """Return a database reader or range index for `db_path`."""
+        if self.engine == "index":
+            return IPRangeIndex.load_or_build(
+                db_path, columns=columns, record_fields=record_fields
+            )
+        return maxminddb.open_database(db_path, self.db_mode)
+
+
+def _get_source_stamp(db_path: Union[str, Path]) -> List[int]:
+    """Return the size and modification time of `db_path`."""
+    stat = Path(db_path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _to_bytes(addresses: List[int]) -> List[bytes]:
+    """Convert IPv6 integer addresses to 16 byte big-endian strings."""
+    return [addr.to_bytes(16, "big") for addr in addresses]
+
+
+def _sorted_ranges(
+    ranges: Tuple[list, list, list], dtype: Any
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the (starts, ends, ids) range arrays sorted by the start of each range."""
+    starts, ends, ids = ranges
+    starts_arr = np.array(starts, dtype=dtype)
+    order = np.argsort(starts_arr, kind="stable")
+    return (
+        starts_arr[order],
+        np.array(ends, dtype=dtype)[order],
+        np.array(ids, dtype=np.int32)[order],
+    )
@@ -29,9 +29,11 @@ from ipwhois import (
 )
 
 from .._version import VERSION
+from ..common.exceptions import MsticpyUserConfigError
 from ..common.utility import arg_to_list, export
 from ..datamodel.entities import GeoLocation, IpAddress
 from .geoip import GeoLiteLookup
+from .ip_range_index import ASN_COLUMNS, IPRangeIndex, asn_fields
 
 __version__ = VERSION
 __author__ = "Ashwin Patil"
@@ -61,6 +63,26 @@ def _get_geolite_lookup() -> Callable:
 _GET_IP_LOOKUP = _get_geolite_lookup()
 
 
+def _get_asn_index_lookup() -> Callable[[], Optional[IPRangeIndex]]:
+    """Closure for loading the GeoLite2-ASN IP range index."""
+    asn_index: Optional[IPRangeIndex] = None
+
+    def _get_asn_index() -> Optional[IPRangeIndex]:
+        nonlocal asn_index
+        if asn_index is None:
+            asn_db_path = GeoLiteLookup().asn_db_path
+            if asn_db_path:
+                asn_index = IPRangeIndex.load_or_build(
+                    asn_db_path, columns=ASN_COLUMNS, record_fields=asn_fields
+                )
+        return asn_index
+
+    return _get_asn_index
+
+
+_GET_ASN_INDEX = _get_asn_index_lookup()
+
+
 def convert_to_ip_entities(  # noqa: MC0001
     ip_str: Optional[str] = None,
     data: Optional[pd.DataFrame] = None,
@@ -237,6 +259,7 @@ def get_whois_df(
     asn_col: str = "AsnDescription",
     whois_col: Optional[str] = None,
     show_progress: bool = False,
+    engine: str = "whois",
 ) -> pd.DataFrame:
     """
     Retrieve Whois ASN information for DataFrame of IP Addresses.
@@ -259,13 +282,28 @@ def get_whois_df(
         Ignored if `all_columns` is True.
     show_progress : bool, optional
         Show progress for each query, by default False
+    engine : str, optional
+        The lookup engine to use, by default "whois" (query whois
+        for each IP address). "geolite" looks up the ASN of all
+        of the addresses in bulk from the GeoLite2-ASN database
+        using an in-memory IP range index. This is much faster but
+        only returns the ASN number and organization.
 
     Returns
     -------
     pd.DataFrame
         Output DataFrame with results in added columns.
 
+    Raises
+    ------
+    ValueError
+        If `engine` is not a supported value.
+
     """
+    if engine == "geolite":
+        return _get_geolite_whois_df(data, ip_column, all_columns, asn_col, whois_col)
+    if engine != "whois":
+        raise ValueError(f"engine must be 'whois' or 'geolite', not '{engine}'")
     if all_columns:
         return data.apply(
             lambda x: get_whois_info(x[ip_column], show_progress=show_progress)[1],
@@ -287,6 +325,51 @@ def get_whois_df(
     return data
 
 
+def _get_geolite_whois_df(
+    data: pd.DataFrame,
+    ip_column: str,
+    all_columns: bool,
+    asn_col: str,
+    whois_col: Optional[str],
+) -> pd.DataFrame:
+    """Return the ASN data for `data` using the GeoLite2 ASN IP range index."""
+    asn_index = _GET_ASN_INDEX()
+    if asn_index is None:
+        raise MsticpyUserConfigError(
+            "GeoLite2-ASN.mmdb database not found.",
+            "Download the GeoLite2-ASN database from https://www.maxmind.com",
+            "and copy it to the same folder as the GeoLite2-City database.",
+            title="GeoLite2 ASN database not found",
+        )
+    ip_addrs = data[ip_column].astype(str).str.strip()
+    asn_data = (
+        asn_index.lookup(pd.unique(ip_addrs))
+        .set_index("IpAddress")
+        .reindex(ip_addrs)
+        .set_index(data.index)
+    )
+    asn_data = asn_data.astype("object").where(asn_data.notna(), None)
+    whois_data = pd.DataFrame(
+        {
+            "asn": asn_data["ASN"].map(
+                lambda asn: None if asn is None else str(int(asn))
+            ),
+            "asn_description": asn_data["ASNOrganization"],
+        },
+        index=data.index,
+    )
+    if all_columns:
+        return whois_data
+    data = data.copy()
+    data[asn_col] = whois_data["asn_description"]
+    if whois_col is not None:
+        data[whois_col] = [
+            rec if rec["asn"] is not None else {}
+            for rec in whois_data.to_dict(orient="records")
+        ]
+    return data
+
+
 # pylint: disable=too-few-public-methods
 @pd.api.extensions.register_dataframe_accessor("mp_whois")
 class IpWhoisAccessor:
@@ -315,6 +398,10 @@ class IpWhoisAccessor:
             by default "WhoIsData"
         show_progress : bool, optional
             Show progress for each query, by default False
+        engine : str, optional
+            The lookup engine to use, by default "whois".
+            "geolite" looks up the ASNs in bulk from the GeoLite2-ASN
+            database.
 
         Returns
         -------
@@ -12,11 +12,13 @@ processing performance may be limited to a specific number of
 requests per minute for the account type that you have.
 
 """
+import asyncio
 import sys  # noqa
 import warnings
 from collections import ChainMap
 from inspect import isclass
-from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 import attr
 import pandas as pd
@@ -31,7 +33,15 @@ from . import tiproviders
 # used in dynamic instantiation of providers
 # pylint: disable=unused-wildcard-import, wildcard-import
 from .tiproviders import *  # noqa:F401, F403
-from .tiproviders.ti_provider_base import LookupResult, TILookupStatus, TIProvider
+from .tiproviders.ti_cache import SQLiteTICache, TICache, get_ti_cache
+from .tiproviders.ti_provider_base import (
+    LookupResult,
+    TILookupStatus,
+    TIProvider,
+    dedup_items,
+    fan_out_results,
+    run_coroutine,
+)
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -41,6 +51,9 @@ _NO_PROVIDERS_MSSG = """
 No TI Providers are loaded - please check that
 you have correctly configured your msticpyconfig.yaml settings.
 """
+# results with these status values are cached - 404 is a negative result
+_CACHEABLE_STATUS = {TILookupStatus.ok.value, 404}
+
 _TI_HELP_URI = (
     "https://msticpy.readthedocs.io/en/latest/data_acquisition/"
     "TIProviders.html#configuration-file"
@@ -56,6 +69,7 @@ class TILookup:
         primary_providers: Optional[List[TIProvider]] = None,
         secondary_providers: Optional[List[TIProvider]] = None,
         providers: Optional[List[str]] = None,
+        cache: Union[None, bool, str, Path, TICache] = None,
     ):
         """
         Initialize TILookup instance.
@@ -72,8 +86,18 @@ class TILookup:
             call `TILookup.list_available_providers()`.
             Note: if primary_provides or secondary_providers is specified
             This will override the providers list.
+        cache : Union[None, bool, str, Path, TICache], optional
+            Cache for lookup results, by default None - results are
+            cached in memory for the lifetime of this instance.
+            Use True for the persistent SQLite cache shared by all
+            sessions (~/.msticpy/ti_cache.db), a path for a SQLite cache
+            at that location, a TICache instance (e.g. a FileTICache
+            or a cache shared with VTLookup) or False to disable caching.
 
         """
+        self.cache: Optional[TICache] = (
+            SQLiteTICache(":memory:") if cache is None else get_ti_cache(cache)
+        )
         self._providers: Dict[str, TIProvider] = {}
         self._secondary_providers: Dict[str, TIProvider] = {}
         self._providers_to_load = providers
@@ -110,19 +134,30 @@ class TILookup:
         Returns
         -------
         Iterable[str]
-            List of providers and descriptions.
+            List of providers and descriptions (and the cache
+            hits and misses for providers that have been queried).
 
         """
         prim = [
-            f"{prov_name} - {prov.description} (primary)"
+            f"{prov_name} - {prov.description} (primary){self._cache_status(prov_name)}"
             for prov_name, prov in self._providers.items()
         ]
         sec = [
             f"{prov_name} - {prov.description} (secondary)"
+            + self._cache_status(prov_name)
             for prov_name, prov in self._secondary_providers.items()
         ]
         return prim + sec
 
+    def _cache_status(self, prov_name: str) -> str:
+        """Return the cache statistics for the provider status."""
+        if self.cache is None:
+            return ""
+        prov_stats = self.cache.stats.get(prov_name)
+        if not prov_stats:
+            return ""
+        return f" [cache hits: {prov_stats['hits']}, misses: {prov_stats['misses']}]"
+
     @property
     def configured_providers(self) -> List[str]:
         """
@@ -442,9 +477,25 @@ class TILookup:
 
         ioc_type = ioc_type or TIProvider.resolve_ioc_type(observable)
         for prov_name, provider in selected_providers.items():
-            provider_result: LookupResult = provider.lookup_ioc(
-                ioc=observable, ioc_type=ioc_type, query_type=ioc_query_type, **kwargs
+            cache = self.cache if provider.cache_results else None
+            cached = (
+                cache.get(prov_name, ioc_type, ioc_query_type, observable)
+                if cache is not None
+                else None
             )
+            if cached is not None:
+                provider_result = LookupResult(**cached)
+            else:
+                provider_result = provider.lookup_ioc(
+                    ioc=observable,
+                    ioc_type=ioc_type,
+                    query_type=ioc_query_type,
+                    **kwargs,
+                )
+                if cache is not None:
+                    self._cache_results(
+                        prov_name, [attr.asdict(provider_result)], ioc_query_type
+                    )
             result_list.append((prov_name, provider_result))
         overall_result = any(res.result for _, res in result_list)
         return overall_result, result_list
@@ -489,6 +540,74 @@ class TILookup:
         pd.DataFrame
             DataFrame of results
 
+        Notes
+        -----
+        The providers are queried concurrently - see `lookup_iocs_async`.
+
+        """
+        return run_coroutine(
+            self.lookup_iocs_async(
+                data=data,
+                obs_col=obs_col,
+                ioc_type_col=ioc_type_col,
+                ioc_query_type=ioc_query_type,
+                providers=providers,
+                prov_scope=prov_scope,
+                **kwargs,
+            )
+        )
+
+    async def lookup_iocs_async(
+        self,
+        data: Union[pd.DataFrame, Mapping[str, str], Iterable[str]],
+        obs_col: str = None,
+        ioc_type_col: str = None,
+        ioc_query_type: str = None,
+        providers: List[str] = None,
+        prov_scope: str = "primary",
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup a collection of IoCs asynchronously.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Mapping[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `obs_col` parameter)
+            2. Mapping (e.g. a dict) of [observable, IoCType]
+            3. Iterable of observables - IoCTypes will be inferred
+        obs_col : str, optional
+            DataFrame column to use for observables, by default None
+            ("col" and "column" are also aliases for this parameter)
+        ioc_type_col : str, optional
+            DataFrame column to use for IoCTypes, by default None
+        ioc_query_type: str, optional
+            The ioc query type (e.g. rep, info, malware)
+        providers: List[str]
+            Explicit list of providers to use
+        prov_scope : str, optional
+            Use "primary", "secondary" or "all" providers, by default "primary"
+        kwargs :
+            Additional arguments passed to the underlying provider(s)
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results
+
+        Notes
+        -----
+        The selected providers are queried concurrently using each
+        provider's `lookup_iocs_async` method. HTTP providers also
+        send concurrent requests for the observables, limited by
+        their MaxConcurrency and RequestsPerMinute settings.
+        Duplicate observables in `data` are looked up once by each
+        provider and the results are joined back to each of the input
+        items - the SourceIndex column of the results is the index of
+        the input row (or the position of the item in `data`).
+
         """
         obs_col = obs_col or kwargs.pop("col", kwargs.pop("column", None))
 
@@ -500,15 +619,23 @@ class TILookup:
                 title="No Threat Intel Provider configuration found.",
                 help_uri=_TI_HELP_URI,
             )
-
-        for prov_name, provider in selected_providers.items():
-            provider_result = provider.lookup_iocs(
-                data=data,
-                obs_col=obs_col,
-                ioc_type_col=ioc_type_col,
-                query_type=ioc_query_type,
-                **kwargs,
+        # each unique observable is looked up once by each provider
+        items, unique_items = dedup_items(data, obs_col, ioc_type_col)
+
+        provider_results = await asyncio.gather(
+            *(
+                self._lookup_provider_iocs(
+                    prov_name,
+                    provider,
+                    unique_items,
+                    query_type=ioc_query_type,
+                    **kwargs,
+                )
+                for prov_name, provider in selected_providers.items()
             )
+        )
+        for prov_name, provider_result in zip(selected_providers, provider_results):
+            provider_result = fan_out_results(provider_result, items, unique_items)
             if provider_result is None or provider_result.empty:
                 continue
             if not kwargs.get("show_not_supported", False):
@@ -526,6 +653,89 @@ class TILookup:
             print("No IoC matches")
         return pd.concat(result_list, sort=False)
 
+    # pylint: disable=too-many-arguments, too-many-locals
+    async def _lookup_provider_iocs(
+        self,
+        prov_name: str,
+        provider: TIProvider,
+        unique_items: pd.DataFrame,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Lookup the unique IoCs that are not in the cache with `provider`."""
+        if self.cache is None or not provider.cache_results:
+            return await provider.lookup_iocs_async(
+                data=unique_items[["Ioc", "IocType"]],
+                obs_col="Ioc",
+                ioc_type_col="IocType",
+                query_type=query_type,
+                **kwargs,
+            )
+
+        keys = [
+            (ioc_type, query_type, observable)
+            for observable, ioc_type in zip(
+                unique_items["Ioc"], unique_items["IocType"]
+            )
+        ]
+        results = self.cache.get_many(prov_name, keys)
+        missing = dict.fromkeys(key for key in keys if key not in results)
+        unmatched: List[Dict[str, Any]] = []
+        if missing:
+            provider_df = await provider.lookup_iocs_async(
+                data=pd.DataFrame(
+                    [(observable, ioc_type) for ioc_type, _, observable in missing],
+                    columns=["Ioc", "IocType"],
+                ),
+                obs_col="Ioc",
+                ioc_type_col="IocType",
+                query_type=query_type,
+                **kwargs,
+            )
+            if provider_df is not None and not provider_df.empty:
+                field_names = {
+                    col: name for name, col in LookupResult.column_map().items()
+                }
+                provider_results = (
+                    provider_df[[col for col in field_names if col in provider_df]]
+                    .rename(columns=field_names)
+                    .to_dict(orient="records")
+                )
+                self._cache_results(prov_name, provider_results, query_type)
+                for result in provider_results:
+                    key = (result.get("ioc_type"), query_type, result.get("ioc"))
+                    if key in missing:
+                        results[key] = result
+                    else:
+                        # keep results that do not match the requested keys
+                        unmatched.append(result)
+
+        return pd.DataFrame(
+            [results[key] for key in keys if key in results] + unmatched,
+            columns=list(attr.fields_dict(LookupResult)),
+        ).rename(columns=LookupResult.column_map())
+
+    def _cache_results(
+        self, prov_name: str, results: List[Dict[str, Any]], query_type: Optional[str]
+    ):
+        """Add successful lookup results (dicts of LookupResult fields) to the cache."""
+        if self.cache is None:
+            return
+        self.cache.set_many(
+            prov_name,
+            (
+                (
+                    (result["ioc_type"], query_type, result["ioc"]),
+                    result,
+                    not result["result"],
+                )
+                for result in results
+                if result.get("status") in _CACHEABLE_STATUS
+                and "ioc" in result
+                and "ioc_type" in result
+            ),
+        )
+
     @staticmethod
     def result_to_df(
         ioc_lookup: Tuple[bool, List[Tuple[str, LookupResult]]]
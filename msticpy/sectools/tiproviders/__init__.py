@@ -10,6 +10,7 @@ from .greynoise import GreyNoise  # noqa:F401
 from .http_base import HttpProvider  # noqa:F401
 from .ibm_xforce import XForce  # noqa:F401
 from .open_page_rank import OPR  # noqa:F401
+from .ti_cache import FileTICache, SQLiteTICache, TICache  # noqa:F401
 from .ti_provider_base import (  # noqa:F401
     LookupResult,
     TIProvider,
@@ -33,10 +33,13 @@ class GreyNoise(HttpProvider):
             path="/v3/community/{observable}",
             headers={"key": "{API_KEY}"},
         ),
-        # Enterprise API Quick Lookup
+        # Enterprise API Quick Lookup (batches of IPs)
         "ipv4-quick": IoCLookupParams(
-            path="/v2/noise/quick/{observable}",
+            path="/v2/noise/multi/quick",
+            params={"ips": "{observable}"},
             headers={"key": "{API_KEY}"},
+            batch_size=1000,
+            batch_result_key="ip",
         ),
         # Enterprise API Full Lookup
         "ipv4-full": IoCLookupParams(
@@ -96,6 +99,6 @@ class GreyNoise(HttpProvider):
             result_dict = response.raw_result
 
         severity = TISeverity.information
-        if response.raw_result["classification"] == "malicious":
+        if response.raw_result.get("classification") == "malicious":
             severity = TISeverity.high
         return result, severity, result_dict
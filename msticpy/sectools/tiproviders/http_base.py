@@ -13,21 +13,32 @@ requests per minute for the account type that you have.
 
 """
 import abc
+import asyncio
+import time
 import traceback
-from functools import lru_cache
+from collections import defaultdict
 from http import client
 from json import JSONDecodeError
-from typing import Any, Dict, List, Tuple
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple, Union
 
 import attr
 import httpx
+import pandas as pd
 from attr import Factory
 
 from ..._version import VERSION
 from ...common.exceptions import MsticpyConfigException
 from ...common.pkg_config import get_http_timeout
 from ...common.utility import export, _MSTICPY_USER_AGENT
-from .ti_provider_base import LookupResult, TILookupStatus, TIProvider, TISeverity
+from .ti_provider_base import (
+    LookupResult,
+    TILookupStatus,
+    TIProvider,
+    TISeverity,
+    dedup_items,
+    fan_out_results,
+    run_coroutine,
+)
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -36,7 +47,31 @@ __author__ = "Ian Hellen"
 # pylint: disable=too-few-public-methods
 @attr.s(auto_attribs=True)
 class IoCLookupParams:
-    """IoC HTTP Lookup Params definition."""
+    """
+    IoC HTTP Lookup Params definition.
+
+    Notes
+    -----
+    If `batch_size` is greater than 1 the query is a batch endpoint
+    and observables are sent in batches of up to `batch_size` items:
+
+    - "{observable}" in the path, params, headers and data is replaced
+      by the observables joined with `batch_delimiter`.
+    - params keys containing "{index}" are repeated for each
+      observable (e.g. {"domains[{index}]": "{observable}"}).
+    - a `json_body` value of "{observables}" is replaced by the
+      list of observables.
+
+    The response is split into the results for each observable by
+    `HttpProvider.split_batch_results`. By default, this takes the
+    list of results from the `batch_result_path` key of the response
+    (or the response itself) and matches each item to an observable
+    using the `batch_result_key` field of the item. If no
+    `batch_result_key` is given, a response dictionary keyed by
+    observable, or a list of results in the same order as the
+    observables, is expected.
+
+    """
 
     path: str = ""
     verb: str = "GET"
@@ -44,14 +79,79 @@ class IoCLookupParams:
     headers: Dict[str, str] = Factory(dict)
     params: Dict[str, str] = Factory(dict)
     data: Dict[str, str] = Factory(dict)
+    json_body: Dict[str, Any] = Factory(dict)
     auth_type: str = ""
     auth_str: List[str] = Factory(list)
     sub_type: str = ""
+    batch_size: int = 1
+    batch_delimiter: str = ","
+    batch_result_path: str = ""
+    batch_result_key: str = ""
+
+
+# errors that are returned in the LookupResult rather than raised
+_LOOKUP_ERRORS = (
+    LookupError,
+    JSONDecodeError,
+    NotImplementedError,
+    ConnectionError,
+    httpx.HTTPError,
+)
+
+
+class _TokenBucket:
+    """Token bucket rate limiter for asynchronous requests."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Create the rate limiter.
+
+        Parameters
+        ----------
+        rate : float
+            Number of tokens (requests) added per second.
+        capacity : float, optional
+            Maximum number of tokens that can be accumulated (the
+            size of a burst of requests), by default max(1, `rate`).
+
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 @export
 class HttpProvider(TIProvider):
-    """HTTP TI provider base class."""
+    """
+    HTTP TI provider base class.
+
+    Notes
+    -----
+    The following (optional) provider settings control the
+    lookups made by `lookup_iocs` and `lookup_iocs_async`:
+
+    - MaxConcurrency - maximum number of concurrent requests
+      to the provider (default is 10)
+    - RequestsPerMinute - maximum request rate for your account
+      type (default is no limit)
+
+    """
 
     _BASE_URL = ""
 
@@ -59,6 +159,9 @@ class HttpProvider(TIProvider):
 
     _REQUIRED_PARAMS: List[str] = []
 
+    _MAX_CONCURRENCY = 10
+    _REQUESTS_PER_MINUTE: Optional[float] = None
+
     def __init__(self, **kwargs):
         """Initialize a new instance of the class."""
         super().__init__(**kwargs)
@@ -69,6 +172,11 @@ class HttpProvider(TIProvider):
             self._request_params["API_ID"] = kwargs.pop("ApiID")
         if "AuthKey" in kwargs:
             self._request_params["API_KEY"] = kwargs.pop("AuthKey")
+        self.max_concurrency = int(kwargs.pop("MaxConcurrency", self._MAX_CONCURRENCY))
+        requests_per_minute = kwargs.pop("RequestsPerMinute", self._REQUESTS_PER_MINUTE)
+        self.requests_per_minute = (
+            float(requests_per_minute) if requests_per_minute else None
+        )
 
         missing_params = [
             param
@@ -83,7 +191,6 @@ class HttpProvider(TIProvider):
             )
 
     # pylint: disable=too-many-branches, duplicate-code
-    @lru_cache(maxsize=256)
     def lookup_ioc(  # type: ignore
         self, ioc: str, ioc_type: str = None, query_type: str = None, **kwargs
     ) -> LookupResult:
@@ -118,9 +225,9 @@ class HttpProvider(TIProvider):
 
         Notes
         -----
-        Note: this method uses memoization (lru_cache) to cache results
-        for a particular observable to try avoid repeated network calls for
-        the same item.
+        Results are not cached by this method. Use `TILookup`, which
+        caches results (optionally in a persistent, shared cache) to
+        avoid repeated network calls for the same item.
 
         """
         result = self._check_ioc_type(
@@ -132,51 +239,404 @@ class HttpProvider(TIProvider):
             return result
 
         req_params: Dict[str, Any] = {}
+        src = self._get_query_params(result.ioc_type, query_type)
+        batch = [result.safe_ioc] if src and src.batch_size > 1 else None
         try:
             verb, req_params = self._substitute_parms(
-                result.safe_ioc, result.ioc_type, query_type
+                result.safe_ioc, result.ioc_type, query_type, batch=batch
             )
             if verb == "GET":
                 response = self._httpx_client.get(
                     **req_params, timeout=get_http_timeout(**kwargs)
                 )
+            elif verb == "POST":
+                response = self._httpx_client.post(
+                    **req_params, timeout=get_http_timeout(**kwargs)
+                )
             else:
                 raise NotImplementedError(f"Unsupported verb {verb}")
-            result.status = response.status_code
-            result.reference = req_params["url"]
-            if result.status == 200:
-                try:
-                    result.raw_result = response.json()
-                    result.result, severity, result.details = self.parse_results(result)
-                except JSONDecodeError:
-                    result.raw_result = f"""There was a problem parsing results from this lookup:
-                                        {response.text}"""
-                    result.result = False
-                    severity = TISeverity.information
-                    result.details = {}
-                result.set_severity(severity)
-                result.status = TILookupStatus.ok.value
+            if src and batch:
+                return self._process_batch_response(
+                    [result], response, req_params, src
+                )[0]
+            return self._process_response(result, response, req_params)
+        except _LOOKUP_ERRORS as err:  # pylint: disable=duplicate-code
+            return self._process_error(result, err, req_params)
+
+    def lookup_iocs(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        obs_col: str = None,
+        ioc_type_col: str = None,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup collection of IoC observables.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Dict[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `obs_col` parameter)
+            2. Dict of observable, IoCType
+            3. Iterable of observables - IoCTypes will be inferred
+        obs_col : str, optional
+            DataFrame column to use for observables, by default None
+        ioc_type_col : str, optional
+            DataFrame column to use for IoCTypes, by default None
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the IoC type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results.
+
+        Notes
+        -----
+        The observables are looked up concurrently - see
+        `lookup_iocs_async`. Observables for queries that use a
+        batch endpoint are sent in batches.
+
+        """
+        return run_coroutine(
+            self.lookup_iocs_async(
+                data=data,
+                obs_col=obs_col,
+                ioc_type_col=ioc_type_col,
+                query_type=query_type,
+                **kwargs,
+            )
+        )
+
+    async def lookup_iocs_async(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        obs_col: str = None,
+        ioc_type_col: str = None,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup collection of IoC observables asynchronously.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Dict[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `obs_col` parameter)
+            2. Dict of observable, IoCType
+            3. Iterable of observables - IoCTypes will be inferred
+        obs_col : str, optional
+            DataFrame column to use for observables, by default None
+        ioc_type_col : str, optional
+            DataFrame column to use for IoCTypes, by default None
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the IoC type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results.
+
+        Notes
+        -----
+        Requests are sent using an httpx.AsyncClient. The number
+        of concurrent requests is limited to the `max_concurrency`
+        attribute and, if the `requests_per_minute` attribute is set,
+        the request rate is limited using a token bucket. These are
+        set from the MaxConcurrency and RequestsPerMinute provider
+        settings.
+        Observables for queries that use a batch endpoint (see
+        `IoCLookupParams`) are grouped into batches, each of which
+        is sent as a single request.
+        Duplicate observables in `data` are looked up once and the
+        results have a row (and a SourceIndex column) for each
+        observable in `data` - see `dedup_items`.
+
+        """
+        items, unique_items = dedup_items(data, obs_col, ioc_type_col)
+        results: List[LookupResult] = []
+        for observable, ioc_type in zip(unique_items["Ioc"], unique_items["IocType"]):
+            result = self._check_ioc_type(
+                ioc=observable, ioc_type=ioc_type, query_subtype=query_type
+            )
+            result.provider = kwargs.get("provider_name", self.__class__.__name__)
+            results.append(result)
+
+        async with self._create_async_client(**kwargs) as async_client:
+            # the lookups update the results in place
+            await asyncio.gather(
+                *self._get_lookups(
+                    async_client,
+                    [result for result in results if not result.status],
+                    query_type,
+                    **kwargs,
+                )
+            )
+        results_df = pd.DataFrame(
+            data=[pd.Series(attr.asdict(result)) for result in results],
+            columns=list(attr.fields_dict(LookupResult)),
+        ).rename(columns=LookupResult.column_map())
+        return fan_out_results(results_df, items, unique_items)
+
+    def _get_lookups(
+        self,
+        async_client: httpx.AsyncClient,
+        results: List[LookupResult],
+        query_type: str = None,
+        **kwargs,
+    ) -> List[Awaitable[Any]]:
+        """Return the lookup coroutines for the (validated) IoCs in `results`."""
+        semaphore = asyncio.Semaphore(max(self.max_concurrency, 1))
+        rate_limiter = (
+            _TokenBucket(self.requests_per_minute / 60)
+            if self.requests_per_minute
+            else None
+        )
+        lookups: List[Awaitable[Any]] = []
+        batch_items: Dict[str, List[LookupResult]] = defaultdict(list)
+        batch_srcs: Dict[str, IoCLookupParams] = {}
+        for result in results:
+            src = self._get_query_params(result.ioc_type, query_type)
+            if src and src.batch_size > 1:
+                batch_items[result.ioc_type].append(result)
+                batch_srcs[result.ioc_type] = src
             else:
-                result.raw_result = str(response)
+                lookups.append(
+                    self._send_lookup_async(
+                        async_client,
+                        semaphore,
+                        rate_limiter,
+                        result,
+                        query_type,
+                        **kwargs,
+                    )
+                )
+        for ioc_type, type_results in batch_items.items():
+            src = batch_srcs[ioc_type]
+            lookups.extend(
+                self._lookup_batch_async(
+                    async_client,
+                    semaphore,
+                    rate_limiter,
+                    type_results[start : start + src.batch_size],  # noqa: E203
+                    src,
+                    query_type,
+                    **kwargs,
+                )
+                for start in range(0, len(type_results), src.batch_size)
+            )
+        return lookups
+
+    def _create_async_client(self, **kwargs) -> httpx.AsyncClient:
+        """Return a new async client for `lookup_iocs_async`."""
+        return httpx.AsyncClient(timeout=get_http_timeout(**kwargs))
+
+    # pylint: disable=too-many-arguments
+    async def _send_lookup_async(
+        self,
+        async_client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        rate_limiter: Optional[_TokenBucket],
+        result: LookupResult,
+        query_type: str = None,
+        **kwargs,
+    ) -> LookupResult:
+        """Send the request for the (validated) IoC in `result`."""
+        req_params: Dict[str, Any] = {}
+        try:
+            verb, req_params = self._substitute_parms(
+                result.safe_ioc, result.ioc_type, query_type
+            )
+            response = await self._send_request_async(
+                async_client, semaphore, rate_limiter, verb, req_params, **kwargs
+            )
+            return self._process_response(result, response, req_params)
+        except _LOOKUP_ERRORS as err:
+            return self._process_error(result, err, req_params)
+
+    # pylint: disable=too-many-arguments
+    async def _lookup_batch_async(
+        self,
+        async_client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        rate_limiter: Optional[_TokenBucket],
+        results: List[LookupResult],
+        src: IoCLookupParams,
+        query_type: str = None,
+        **kwargs,
+    ) -> List[LookupResult]:
+        """Send a batch request for the (validated) IoCs in `results`."""
+        req_params: Dict[str, Any] = {}
+        ioc_type = results[0].ioc_type
+        try:
+            verb, req_params = self._substitute_parms(
+                results[0].safe_ioc,
+                ioc_type,
+                query_type,
+                batch=[result.safe_ioc for result in results],
+            )
+            response = await self._send_request_async(
+                async_client, semaphore, rate_limiter, verb, req_params, **kwargs
+            )
+            return self._process_batch_response(results, response, req_params, src)
+        except _LOOKUP_ERRORS as err:
+            return [self._process_error(result, err, req_params) for result in results]
+
+    # pylint: disable=too-many-arguments
+    @staticmethod
+    async def _send_request_async(
+        async_client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        rate_limiter: Optional[_TokenBucket],
+        verb: str,
+        req_params: Dict[str, Any],
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a request, subject to the concurrency and rate limits."""
+        if verb not in ("GET", "POST"):
+            raise NotImplementedError(f"Unsupported verb {verb}")
+        async with semaphore:
+            if rate_limiter:
+                await rate_limiter.acquire()
+            if verb == "GET":
+                return await async_client.get(
+                    **req_params, timeout=get_http_timeout(**kwargs)
+                )
+            return await async_client.post(
+                **req_params, timeout=get_http_timeout(**kwargs)
+            )
+
+    def _process_response(
+        self, result: LookupResult, response: httpx.Response, req_params: Dict[str, Any]
+    ) -> LookupResult:
+        """Populate `result` from the HTTP response."""
+        result.status = response.status_code
+        result.reference = req_params["url"]
+        if result.status == 200:
+            try:
+                result.raw_result = response.json()
+                result.result, severity, result.details = self.parse_results(result)
+            except JSONDecodeError:
+                result.raw_result = f"""There was a problem parsing results from this lookup:
+                                    {response.text}"""
                 result.result = False
-                result.details = self._response_message(result.status)
-            return result
-        except (  # pylint: disable=duplicate-code
-            LookupError,
-            JSONDecodeError,
-            NotImplementedError,
-            ConnectionError,
-        ) as err:
-            self._err_to_results(result, err)
-            if not isinstance(err, LookupError):
-                url = req_params.get("url", None) if req_params else None
-                result.reference = url
-            return result
+                severity = TISeverity.information
+                result.details = {}
+            result.set_severity(severity)
+            result.status = TILookupStatus.ok.value
+        else:
+            result.raw_result = str(response)
+            result.result = False
+            result.details = self._response_message(result.status)
+        return result
+
+    def _process_batch_response(
+        self,
+        results: List[LookupResult],
+        response: httpx.Response,
+        req_params: Dict[str, Any],
+        src: IoCLookupParams,
+    ) -> List[LookupResult]:
+        """Populate each of the `results` from the batch HTTP response."""
+        if response.status_code != 200:
+            return [
+                self._process_response(result, response, req_params)
+                for result in results
+            ]
+        try:
+            item_results = self.split_batch_results(
+                response.json(), [result.safe_ioc for result in results], src
+            )
+        except JSONDecodeError:
+            item_results = {}
+        for result in results:
+            result.status = response.status_code
+            result.reference = req_params["url"]
+            # observables missing from the response are treated as not found
+            result.raw_result = item_results.get(result.safe_ioc)
+            result.result, severity, result.details = self.parse_results(result)
+            result.set_severity(severity)
+            result.status = TILookupStatus.ok.value
+        return results
+
+    # pylint: disable=no-self-use
+    def split_batch_results(
+        self, raw_result: Any, observables: List[str], src: IoCLookupParams
+    ) -> Dict[str, Any]:
+        """
+        Split the response to a batch request into results for each observable.
+
+        Parameters
+        ----------
+        raw_result : Any
+            The (decoded JSON) response to the batch request
+        observables : List[str]
+            The observables in the batch
+        src : IoCLookupParams
+            The query definition
+
+        Returns
+        -------
+        Dict[str, Any]
+            Raw result for each observable keyed by observable.
+            Each result is passed to `parse_results`.
+
+        Notes
+        -----
+        Override this in providers with batch responses that are not
+        handled by the `batch_result_path` and `batch_result_key`
+        settings of `IoCLookupParams`.
+
+        """
+        items = raw_result
+        if src.batch_result_path and isinstance(raw_result, dict):
+            items = raw_result.get(src.batch_result_path)
+        if src.batch_result_key and isinstance(items, list):
+            return {
+                item[src.batch_result_key]: item
+                for item in items
+                if isinstance(item, dict) and src.batch_result_key in item
+            }
+        if isinstance(items, dict):
+            return items
+        if isinstance(items, list) and len(items) == len(observables):
+            return dict(zip(observables, items))
+        return {}
+
+    def _process_error(
+        self, result: LookupResult, err: Exception, req_params: Dict[str, Any]
+    ) -> LookupResult:
+        """Populate `result` with the details of a failed lookup."""
+        self._err_to_results(result, err)
+        if not isinstance(err, LookupError):
+            url = req_params.get("url", None) if req_params else None
+            result.reference = url
+        return result
 
     # pylint: enable=duplicate-code
     # pylint: disable=too-many-branches
+    def _get_query_params(
+        self, ioc_type: str, query_type: str = None
+    ) -> Optional[IoCLookupParams]:
+        """Return the query definition for the IoC type and query type."""
+        ioc_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
+        return self._IOC_QUERIES.get(ioc_key, None)
+
     def _substitute_parms(
-        self, ioc: str, ioc_type: str, query_type: str = None
+        self,
+        ioc: str,
+        ioc_type: str,
+        query_type: str = None,
+        batch: Optional[List[str]] = None,
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Create requests parameters collection.
@@ -191,6 +651,9 @@ class HttpProvider(TIProvider):
             Specify the data subtype to be queried, by default None.
             If not specified the default record type for the IoC type
             will be returned.
+        batch : Optional[List[str]], optional
+            The observables to send in a batch request, by default None.
+            If supplied, `ioc` is ignored.
 
         Returns
         -------
@@ -198,12 +661,14 @@ class HttpProvider(TIProvider):
             HTTP method, dictionary of parameter keys/values
 
         """
-        req_params = {"observable": ioc}
-        req_params.update(self._request_params)
-        ioc_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
-        src = self._IOC_QUERIES.get(ioc_key, None)
+        src = self._get_query_params(ioc_type, query_type)
         if not src:
+            ioc_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
             raise LookupError(f"Provider does not support IoC type {ioc_key}.")
+        if batch is not None:
+            ioc = src.batch_delimiter.join(batch)
+        req_params = {"observable": ioc}
+        req_params.update(self._request_params)
 
         # create a parameter dictionary to pass to requests
         # substitute any parameter value from our req_params dict
@@ -222,15 +687,21 @@ class HttpProvider(TIProvider):
         if "User-Agent" not in req_dict["headers"]:
             req_dict["headers"]["User-Agent"] = _MSTICPY_USER_AGENT
         if src.params:
-            q_params: Dict[str, Any] = {
-                key: val.format(**req_params) for key, val in src.params.items()
-            }
-            req_dict["params"] = q_params
+            req_dict["params"] = _format_query_params(
+                src.params, req_params, batch or [ioc]
+            )
         if src.data:
             q_data: Dict[str, Any] = {
                 key: val.format(**req_params) for key, val in src.data.items()
             }
             req_dict["data"] = q_data
+        if src.json_body:
+            req_dict["json"] = {
+                key: list(batch or [ioc])
+                if val == "{observables}"
+                else (val.format(**req_params) if isinstance(val, str) else val)
+                for key, val in src.json_body.items()
+            }
         if src.auth_type and src.auth_str:
             auth_strs: Tuple = tuple(p.format(**req_params) for p in src.auth_str)
             if src.auth_type == "HTTPBasic":
@@ -296,3 +767,19 @@ class HttpProvider(TIProvider):
         if status_code == 403:
             return "Request forbidden. Allowed query rate may have been exceeded."
         return client.responses.get(status_code, "Unknown HTTP status code.")
+
+
+def _format_query_params(
+    params: Dict[str, str], req_params: Dict[str, Any], observables: List[str]
+) -> Dict[str, Any]:
+    """Return query params, repeating "{index}" params for each observable."""
+    q_params: Dict[str, Any] = {}
+    for key, val in params.items():
+        if "{index}" not in key:
+            q_params[key] = val.format(**req_params)
+            continue
+        for idx, item in enumerate(observables):
+            q_params[key.format(index=idx)] = val.format(
+                **{**req_params, "observable": item}
+            )
+    return q_params
@@ -42,6 +42,8 @@ class KqlTIProvider(TIProvider):
     """KQL TI provider base class."""
 
     _IOC_QUERIES: Dict[str, tuple] = {}
+    # results depend on the query time range so are not cached
+    cache_results = False
 
     _CONNECT_STR = (
         "loganalytics://code().tenant('{TENANT_ID}').workspace('{WORKSPACE_ID}')"
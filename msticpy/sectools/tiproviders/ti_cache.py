@@ -0,0 +1,533 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Persistent cache for Threat Intelligence lookup results.
+
+Results are keyed by provider, IoC type, query type and observable.
+Positive results and negative results (the provider returned no match
+for the observable) are kept for separate, configurable times.
+The SQLite cache (the default) can be shared by multiple processes and
+notebook sessions. The file cache stores each result as a JSON file
+in a folder.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..._version import VERSION
+from ...common.utility import export
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+DEFAULT_CACHE_PATH = Path("~").expanduser().joinpath(".msticpy", "ti_cache.db")
+
+# (ioc_type, query_type, observable)
+CacheKey = Tuple[str, Optional[str], str]
+
+_STAT_NAMES = ["hits", "misses", "expired", "writes"]
+
+
+@export
+class TICache(ABC):
+    """Base class for TI lookup result caches."""
+
+    def __init__(
+        self,
+        ttl: float = 24 * 60 * 60,
+        negative_ttl: float = 60 * 60,
+        provider_ttl: Optional[Dict[str, float]] = None,
+        provider_negative_ttl: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Parameters
+        ----------
+        ttl : float, optional
+            Time (in seconds) that positive results are valid for,
+            by default 1 day.
+        negative_ttl : float, optional
+            Time (in seconds) that negative results are valid for,
+            by default 1 hour.
+        provider_ttl : Optional[Dict[str, float]], optional
+            Provider-specific overrides of `ttl`, keyed by provider name.
+        provider_negative_ttl : Optional[Dict[str, float]], optional
+            Provider-specific overrides of `negative_ttl`, keyed by
+            provider name.
+
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.provider_ttl = provider_ttl or {}
+        self.provider_negative_ttl = provider_negative_ttl or {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(_STAT_NAMES, 0)
+        )
+        self._stats_lock = Lock()
+
+    def get_ttl(self, provider: str, negative: bool = False) -> float:
+        """
+        Return the time (in seconds) that results from `provider` are valid.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        negative : bool, optional
+            If True, return the time for negative results, by default False
+
+        Returns
+        -------
+        float
+            The time to live of the results in seconds.
+
+        """
+        if negative:
+            return self.provider_negative_ttl.get(provider, self.negative_ttl)
+        return self.provider_ttl.get(provider, self.ttl)
+
+    def get(
+        self,
+        provider: str,
+        ioc_type: str,
+        query_type: Optional[str],
+        observable: str,
+    ) -> Optional[Any]:
+        """
+        Return the cached result or None if there is no valid cached result.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        ioc_type : str
+            IoC type of the observable
+        query_type : Optional[str]
+            Query sub-type (or None)
+        observable : str
+            The observable
+
+        Returns
+        -------
+        Optional[Any]
+            The cached result.
+
+        """
+        return self.get_many(provider, [(ioc_type, query_type, observable)]).get(
+            (ioc_type, query_type, observable)
+        )
+
+    def get_many(self, provider: str, keys: Iterable[CacheKey]) -> Dict[CacheKey, Any]:
+        """
+        Return the valid cached results for `keys`.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        keys : Iterable[CacheKey]
+            The (ioc_type, query_type, observable) keys to retrieve.
+
+        Returns
+        -------
+        Dict[CacheKey, Any]
+            The cached results for the keys that were found and
+            have not expired.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        results = {}
+        expired = 0
+        for key, (value, negative, created) in self._read_entries(
+            provider, keys
+        ).items():
+            if now - created > self.get_ttl(provider, negative):
+                expired += 1
+                continue
+            results[key] = value
+        self._add_stats(
+            provider,
+            hits=len(results),
+            misses=len(keys) - len(results),
+            expired=expired,
+        )
+        return results
+
+    def set(
+        self,
+        provider: str,
+        ioc_type: str,
+        query_type: Optional[str],
+        observable: str,
+        value: Any,
+        negative: bool = False,
+    ):
+        """
+        Add a result to the cache.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        ioc_type : str
+            IoC type of the observable
+        query_type : Optional[str]
+            Query sub-type (or None)
+        observable : str
+            The observable
+        value : Any
+            The (JSON serializable) result to cache
+        negative : bool, optional
+            True if this is a negative result, by default False
+
+        """
+        self.set_many(provider, [((ioc_type, query_type, observable), value, negative)])
+
+    def set_many(self, provider: str, entries: Iterable[Tuple[CacheKey, Any, bool]]):
+        """
+        Add multiple results to the cache.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        entries : Iterable[Tuple[CacheKey, Any, bool]]
+            The (key, value, negative) tuples to cache.
+
+        """
+        now = time.time()
+        rows = [
+            (key, _to_json(value), bool(negative), now)
+            for key, value, negative in entries
+        ]
+        if rows:
+            self._write_entries(provider, rows)
+            self._add_stats(provider, writes=len(rows))
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the cache statistics of this instance for each provider.
+
+        Returns
+        -------
+        Dict[str, Dict[str, int]]
+            Count of the hits, misses, expired entries and writes
+            keyed by provider name.
+
+        """
+        with self._stats_lock:
+            return {prov: dict(prov_stats) for prov, prov_stats in self._stats.items()}
+
+    def reset_stats(self):
+        """Reset the cache statistics."""
+        with self._stats_lock:
+            self._stats.clear()
+
+    @abstractmethod
+    def clear(self, provider: Optional[str] = None):
+        """
+        Remove cached results.
+
+        Parameters
+        ----------
+        provider : Optional[str], optional
+            Provider name, by default None (remove all results).
+
+        """
+
+    @abstractmethod
+    def _read_entries(
+        self, provider: str, keys: List[CacheKey]
+    ) -> Dict[CacheKey, Tuple[Any, bool, float]]:
+        """Return the (value, negative, created) entries found for `keys`."""
+
+    @abstractmethod
+    def _write_entries(
+        self, provider: str, rows: List[Tuple[CacheKey, str, bool, float]]
+    ):
+        """Write the (key, json_value, negative, created) rows."""
+
+    def _add_stats(self, provider: str, **counts: int):
+        with self._stats_lock:
+            prov_stats = self._stats[provider]
+            for name, count in counts.items():
+                prov_stats[name] += count
+
+
+@export
+class SQLiteTICache(TICache):
+    """TI lookup result cache stored in a SQLite database."""
+
+    _CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS ti_results (
+            provider TEXT NOT NULL,
+            ioc_type TEXT NOT NULL,
+            query_type TEXT NOT NULL,
+            observable TEXT NOT NULL,
+            value TEXT,
+            negative INTEGER NOT NULL,
+            created REAL NOT NULL,
+            PRIMARY KEY (provider, ioc_type, query_type, observable)
+        )
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, **kwargs):
+        """
+        Initialize the cache.
+
+        Parameters
+        ----------
+        path : Union[str, Path, None], optional
+            Path of the database file, by default ~/.msticpy/ti_cache.db.
+            Use ":memory:" for a (non-persistent) in-memory cache.
+
+        Other Parameters
+        ----------------
+        kwargs :
+            TTL settings passed to `TICache`.
+
+        """
+        super().__init__(**kwargs)
+        self.path = str(path or DEFAULT_CACHE_PATH)
+        if self.path != ":memory:":
+            Path(self.path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+            self.path = str(Path(self.path).expanduser())
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            if self.path != ":memory:":
+                # allow readers in other processes while writing
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self._CREATE_TABLE)
+
+    def clear(self, provider: Optional[str] = None):
+        """
+        Remove cached results.
+
+        Parameters
+        ----------
+        provider : Optional[str], optional
+            Provider name, by default None (remove all results).
+
+        """
+        with self._lock, self._conn:
+            if provider:
+                self._conn.execute(
+                    "DELETE FROM ti_results WHERE provider = ?", (provider,)
+                )
+            else:
+                self._conn.execute("DELETE FROM ti_results")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _read_entries(
+        self, provider: str, keys: List[CacheKey]
+    ) -> Dict[CacheKey, Tuple[Any, bool, float]]:
+        """Return the (value, negative, created) entries found for `keys`."""
+        query = (
+            "SELECT value, negative, created FROM ti_results WHERE provider = ?"
+            " AND ioc_type = ? AND query_type = ? AND observable = ?"
+        )
+        entries = {}
+        with self._lock:
+            for key in keys:
+                ioc_type, query_type, observable = key
+                row = self._conn.execute(
+                    query, (provider, ioc_type, query_type or "", observable)
+                ).fetchone()
+                if row:
+                    entries[key] = (json.loads(row[0]), bool(row[1]), row[2])
+        return entries
+
+    def _write_entries(
+        self, provider: str, rows: List[Tuple[CacheKey, str, bool, float]]
+    ):
+        """Write the (key, json_value, negative, created) rows."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ti_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        provider,
+                        ioc_type,
+                        query_type or "",
+                        observable,
+                        value,
+                        int(negative),
+                        created,
+                    )
+                    for (
+                        ioc_type,
+                        query_type,
+                        observable,
+                    ), value, negative, created in rows
+                ],
+            )
+
+
+@export
+class FileTICache(TICache):
+    """TI lookup result cache stored as JSON files in a folder."""
+
+    def __init__(self, path: Union[str, Path], **kwargs):
+        """
+        Initialize the cache.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            Path of the folder to store the results in. Results for
+            each provider are stored in a sub-folder.
+
+        Other Parameters
+        ----------------
+        kwargs :
+            TTL settings passed to `TICache`.
+
+        """
+        super().__init__(**kwargs)
+        self.path = Path(path).expanduser()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def clear(self, provider: Optional[str] = None):
+        """
+        Remove cached results.
+
+        Parameters
+        ----------
+        provider : Optional[str], optional
+            Provider name, by default None (remove all results).
+
+        """
+        folders = (
+            [self._provider_folder(provider)]
+            if provider
+            else [folder for folder in self.path.iterdir() if folder.is_dir()]
+        )
+        for folder in folders:
+            for file in folder.glob("*.json"):
+                try:
+                    file.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _provider_folder(self, provider: str) -> Path:
+        return self.path.joinpath(re.sub(r"[^\w.-]", "_", provider))
+
+    def _entry_path(self, provider: str, key: CacheKey) -> Path:
+        ioc_type, query_type, observable = key
+        name = hashlib.sha256(
+            "\n".join([ioc_type, query_type or "", observable]).encode("utf-8")
+        ).hexdigest()
+        return self._provider_folder(provider).joinpath(f"{name}.json")
+
+    def _read_entries(
+        self, provider: str, keys: List[CacheKey]
+    ) -> Dict[CacheKey, Tuple[Any, bool, float]]:
+        """Return the (value, negative, created) entries found for `keys`."""
+        entries = {}
+        for key in keys:
+            try:
+                entry = json.loads(
+                    self._entry_path(provider, key).read_text(encoding="utf-8")
+                )
+            except (OSError, ValueError):
+                continue
+            entries[key] = (
+                json.loads(entry["value"]),
+                entry["negative"],
+                entry["created"],
+            )
+        return entries
+
+    def _write_entries(
+        self, provider: str, rows: List[Tuple[CacheKey, str, bool, float]]
+    ):
+        """Write the (key, json_value, negative, created) rows."""
+        folder = self._provider_folder(provider)
+        folder.mkdir(parents=True, exist_ok=True)
+        for key, value, negative, created in rows:
+            entry = json.dumps(
+                {"value": value, "negative": negative, "created": created}
+            )
+            # write to a temporary file and rename so readers in other
+            # processes never see a partially written file
+            file_desc, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            with os.fdopen(file_desc, "w", encoding="utf-8") as tmp_file:
+                tmp_file.write(entry)
+            os.replace(tmp_path, self._entry_path(provider, key))
+
+
+def get_ti_cache(
+    cache: Union[None, bool, str, Path, TICache] = True
+) -> Optional[TICache]:
+    """
+    Return a TICache instance for the `cache` parameter value.
+
+    Parameters
+    ----------
+    cache : Union[None, bool, str, Path, TICache], optional
+        - True - the SQLite cache at the default location
+          (~/.msticpy/ti_cache.db), which is shared by all processes
+          using the default.
+        - str or Path - path of a SQLite cache database.
+        - a TICache instance (e.g. a FileTICache) - returned unchanged.
+        - None or False - no cache.
+
+    Returns
+    -------
+    Optional[TICache]
+        The cache.
+
+    """
+    if isinstance(cache, TICache):
+        return cache
+    if cache is True:
+        return _default_cache()
+    if isinstance(cache, (str, Path)):
+        return SQLiteTICache(cache)
+    return None
+
+
+_DEFAULT_CACHE: Optional[TICache] = None
+
+
+def _default_cache() -> TICache:
+    """Return the shared instance of the default cache."""
+    global _DEFAULT_CACHE  # pylint: disable=global-statement
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = SQLiteTICache(DEFAULT_CACHE_PATH)
+    return _DEFAULT_CACHE
+
+
+def _to_json(value: Any) -> str:
+    """Return `value` as JSON, converting NumPy types."""
+    return json.dumps(value, default=_json_default)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
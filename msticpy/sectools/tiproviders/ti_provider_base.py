@@ -13,16 +13,18 @@ requests per minute for the account type that you have.
 
 """
 import abc
+import asyncio
 from abc import ABC, abstractmethod
 import collections
 import math  # noqa
 import pprint
 import re
 from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from functools import lru_cache, singledispatch, total_ordering
+from functools import lru_cache, partial, singledispatch, total_ordering
 from ipaddress import IPv4Address, IPv6Address, ip_address
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from urllib.parse import quote_plus
 
 import attr
@@ -229,6 +231,9 @@ class TIProvider(ABC):
 
     _IOC_QUERIES: Dict[str, Any] = {}
 
+    # whether TILookup can cache the results of this provider
+    cache_results = True
+
     # pylint: disable=unused-argument
     def __init__(self, **kwargs):
         """Initialize the provider."""
@@ -300,19 +305,78 @@ class TIProvider(ABC):
         Returns
         -------
         pd.DataFrame
-            DataFrame of results.
+            DataFrame of results. This has a row (and a SourceIndex
+            column) for each observable in `data`.
+
+        Notes
+        -----
+        Duplicate observables in `data` are looked up once - see
+        `dedup_items`.
 
         """
+        items, unique_items = dedup_items(data, obs_col, ioc_type_col)
         results = []
-        for observable, ioc_type in generate_items(data, obs_col, ioc_type_col):
-            if not observable:
-                continue
+        for observable, ioc_type in zip(unique_items["Ioc"], unique_items["IocType"]):
             item_result = self.lookup_ioc(
                 ioc=observable, ioc_type=ioc_type, query_type=query_type
             )
             results.append(pd.Series(attr.asdict(item_result)))
 
-        return pd.DataFrame(data=results).rename(columns=LookupResult.column_map())
+        results_df = pd.DataFrame(
+            data=results, columns=list(attr.fields_dict(LookupResult))
+        ).rename(columns=LookupResult.column_map())
+        return fan_out_results(results_df, items, unique_items)
+
+    async def lookup_iocs_async(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        obs_col: str = None,
+        ioc_type_col: str = None,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup collection of IoC observables asynchronously.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Dict[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `obs_col` parameter)
+            2. Dict of observable, IoCType
+            3. Iterable of observables - IoCTypes will be inferred
+        obs_col : str, optional
+            DataFrame column to use for observables, by default None
+        ioc_type_col : str, optional
+            DataFrame column to use for IoCTypes, by default None
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the IoC type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results.
+
+        Notes
+        -----
+        The default implementation runs `lookup_iocs` in a worker thread.
+        Providers with a native asynchronous implementation override this.
+
+        """
+        return await asyncio.get_event_loop().run_in_executor(
+            None,
+            partial(
+                self.lookup_iocs,
+                data=data,
+                obs_col=obs_col,
+                ioc_type_col=ioc_type_col,
+                query_type=query_type,
+                **kwargs,
+            ),
+        )
 
     @abc.abstractmethod
     def parse_results(self, response: LookupResult) -> Tuple[bool, TISeverity, Any]:
@@ -502,6 +566,37 @@ class TIPivotProvider(ABC):
         """
 
 
+def run_coroutine(coroutine: Awaitable) -> Any:
+    """
+    Run `coroutine` to completion and return its result.
+
+    Parameters
+    ----------
+    coroutine : Awaitable
+        The coroutine to run.
+
+    Returns
+    -------
+    Any
+        The result of the coroutine.
+
+    Notes
+    -----
+    If an event loop is already running in this thread (e.g. in Jupyter)
+    the coroutine is run in a new event loop in a worker thread.
+
+    """
+    if asyncio._get_running_loop() is not None:  # pylint: disable=protected-access
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(run_coroutine, coroutine).result()
+    # asyncio.run is not available in Python 3.6
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
 # slightly stricter than normal URL regex to exclude '() from host string
 _HTTP_STRICT_REGEX = r"""
     (?P<protocol>(https?|ftp|telnet|ldap|file)://)
@@ -753,11 +848,11 @@ def generate_items(
 
 @generate_items.register(pd.DataFrame)
 def _(data: pd.DataFrame, obs_col: str, ioc_type_col: Optional[str] = None):
-    for _, row in data.iterrows():
-        if ioc_type_col is None:
-            yield row[obs_col], TIProvider.resolve_ioc_type(row[obs_col])
-        else:
-            yield row[obs_col], row[ioc_type_col]
+    if ioc_type_col is None:
+        for observable in data[obs_col]:
+            yield observable, TIProvider.resolve_ioc_type(observable)
+    else:
+        yield from zip(data[obs_col], data[ioc_type_col])
 
 
 @generate_items.register(dict)  # type: ignore
@@ -766,3 +861,139 @@ def _(data: dict, obs_col: Optional[str] = None, ioc_type_col: Optional[str] = N
         if not ioc_type:
             ioc_type = TIProvider.resolve_ioc_type(obs)
         yield obs, ioc_type
+
+
+# column used to join the results for unique observables to the source rows
+_KEY_COL = "_NormalizedIoc"
+
+
+def dedup_items(
+    data: Any, obs_col: Optional[str] = None, ioc_type_col: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Return the source items and the unique observables in `data`.
+
+    Parameters
+    ----------
+    data : Any
+        DataFrame, mapping of observable/type or iterable of observables
+    obs_col : Optional[str]
+        If `data` is a DataFrame, the column containing the observable value.
+    ioc_type_col : Optional[str]
+        If `data` is a DataFrame, the column containing the observable type.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        The source items - a DataFrame with Ioc, IocType and SourceIndex
+        columns for each (non-empty) observable in `data`,
+        the unique observables - a DataFrame with Ioc and IocType columns
+        holding the first occurrence of each observable.
+        Both also have a column with the normalized observable that is
+        used by `fan_out_results`.
+
+    Notes
+    -----
+    Observables are normalized with `preprocess_observable`, so that
+    values that only differ by, for example, surrounding whitespace are
+    looked up once. SourceIndex is the index of the row in a DataFrame
+    input (or the values of its SourceIndex column, if it has one -
+    e.g. the output of IoCExtract) or the position of the item in
+    other inputs.
+
+    """
+    if isinstance(data, pd.DataFrame):
+        items = pd.DataFrame(
+            {
+                "Ioc": data[obs_col].values,
+                "IocType": data[ioc_type_col].values if ioc_type_col else None,
+                "SourceIndex": data["SourceIndex"].values
+                if "SourceIndex" in data.columns and obs_col != "SourceIndex"
+                else data.index,
+            }
+        )
+    elif isinstance(data, collections.abc.Mapping):
+        items = pd.DataFrame({"Ioc": list(data.keys()), "IocType": list(data.values())})
+        items["SourceIndex"] = items.index
+    elif isinstance(data, collections.abc.Iterable) and not isinstance(data, str):
+        items = pd.DataFrame({"Ioc": list(data), "IocType": None})
+        items["SourceIndex"] = items.index
+    else:
+        items = pd.DataFrame(columns=["Ioc", "IocType", "SourceIndex"])
+    items = items[items["Ioc"].map(bool)].reset_index(drop=True)
+
+    # resolve and normalize each distinct observable/type only once
+    normalized: Dict[Tuple[Any, Any], Tuple[Any, Any]] = {}
+    norm_values = []
+    for ioc, ioc_type in zip(items["Ioc"], items["IocType"]):
+        norm_value = normalized.get((ioc, ioc_type))
+        if norm_value is None:
+            norm_ioc = ioc.strip() if isinstance(ioc, str) else ioc
+            resolved_type = ioc_type or TIProvider.resolve_ioc_type(norm_ioc)
+            if isinstance(ioc, str):
+                clean_ioc = preprocess_observable(norm_ioc, resolved_type)
+                if clean_ioc.status == "ok":
+                    norm_ioc = clean_ioc.observable
+            norm_value = normalized[(ioc, ioc_type)] = (resolved_type, norm_ioc)
+        norm_values.append(norm_value)
+    items["IocType"] = [ioc_type for ioc_type, _ in norm_values]
+    items[_KEY_COL] = [norm_ioc for _, norm_ioc in norm_values]
+
+    unique_items = items.drop_duplicates([_KEY_COL, "IocType"])[
+        ["Ioc", "IocType", _KEY_COL]
+    ].reset_index(drop=True)
+    return items, unique_items
+
+
+def fan_out_results(
+    results: Optional[pd.DataFrame],
+    items: pd.DataFrame,
+    unique_items: pd.DataFrame,
+) -> Optional[pd.DataFrame]:
+    """
+    Join the results for the unique observables to all of the source items.
+
+    Parameters
+    ----------
+    results : Optional[pd.DataFrame]
+        Lookup results for the unique observables (with LookupResult
+        column names)
+    items : pd.DataFrame
+        The source items returned by `dedup_items`
+    unique_items : pd.DataFrame
+        The unique observables returned by `dedup_items`
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        The results with a row for each source item (with the
+        observable value of the item) and a SourceIndex column.
+        Results that do not match any of the unique observables
+        are kept with an empty SourceIndex.
+
+    """
+    if results is None:
+        return None
+    if "SourceIndex" in results.columns:
+        results = results.drop(columns="SourceIndex")
+    if results.empty:
+        return results.assign(SourceIndex=None)
+    keyed_results = results.merge(
+        unique_items, on=["Ioc", "IocType"], how="left", sort=False
+    )
+    matched = keyed_results[keyed_results[_KEY_COL].notna()]
+    # the (stable) sort returns the results in the order of the source items
+    all_results = (
+        items.assign(_ItemPos=range(len(items)))
+        .merge(
+            matched.drop(columns="Ioc"),
+            on=[_KEY_COL, "IocType"],
+            how="inner",
+            sort=False,
+        )
+        .sort_values("_ItemPos", kind="stable")
+    )
+    unmatched = keyed_results[keyed_results[_KEY_COL].isna()]
+    if not unmatched.empty:
+        all_results = pd.concat([all_results, unmatched], ignore_index=True)
+    return all_results[[*results.columns, "SourceIndex"]]
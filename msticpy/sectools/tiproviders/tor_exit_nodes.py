@@ -33,6 +33,8 @@ class Tor(TIProvider):
     _BASE_URL = "https://check.torproject.org/exit-addresses"
 
     _IOC_QUERIES: dict = {"ipv4": None}
+    # lookups use the local copy of the node list so are not cached
+    cache_results = False
     _nodelist: Dict[str, Dict[str, str]] = {}
     _last_cached = datetime.min
     _cache_lock = Lock()
@@ -22,13 +22,15 @@ for the account type that you have. Support IoC Types:
 # pylint: disable=too-many-lines
 import json
 from json import JSONDecodeError
-from typing import List, Mapping, Any, Dict, Optional, Tuple
+from pathlib import Path
+from typing import List, Mapping, Any, Dict, Optional, Tuple, Union
 from collections import namedtuple
 
 import pandas as pd
 import httpx
 
 from .iocextract import IoCExtract
+from .tiproviders.ti_cache import TICache, get_ti_cache
 from .tiproviders.ti_provider_base import SanitizedObservable, preprocess_observable
 from ..common.pkg_config import get_http_timeout
 from ..common.utility import export
@@ -124,7 +126,17 @@ class VTLookup:
 
     _http_strict_rgxc = None  # type: Any
 
-    def __init__(self, vtkey: str, verbosity: int = 1):
+    # provider name used for results in the TI cache
+    _CACHE_PROVIDER = "VTLookup"
+    # VT response codes for found (1) and not found (0) items
+    _CACHEABLE_RESPONSE_CODES = (0, 1)
+
+    def __init__(
+        self,
+        vtkey: str,
+        verbosity: int = 1,
+        cache: Union[None, bool, str, Path, TICache] = None,
+    ):
         """
         Create a new instance of VTLookup class.
 
@@ -137,9 +149,15 @@ class VTLookup:
                 0 = no reporting
                 1 = minimal reporting (default)
                 2 = verbose reporting
+        cache : Union[None, bool, str, Path, TICache], optional
+            Cache for VirusTotal responses, by default None (no cache).
+            Use True for the persistent TI cache shared with `TILookup`
+            (~/.msticpy/ti_cache.db), a path for a SQLite cache at that
+            location or a TICache instance.
 
         """
         self._vtkey = vtkey
+        self.cache: Optional[TICache] = get_ti_cache(cache)
         self._verbosity = verbosity
         self._ioc_custom_type_map = {}  # type: Dict[str, Optional[str]]
 
@@ -325,10 +343,14 @@ class VTLookup:
             )
             raise LookupError(err)
 
-        # do the submission
+        # do the submission (unless we have a cached response)
         vt_api_type = self._VT_TYPE_MAP[ioc_type]
         vt_param = self._VT_API_TYPES[vt_api_type]
-        results, _ = self._vt_submit_request(observable, vt_param)
+        results = self._get_cached_result(observable, ioc_type)
+        if results is None:
+            results, status_code = self._vt_submit_request(observable, vt_param)
+            if status_code == 200:
+                self._cache_vt_results(results, [observable], ioc_type)
         self._parse_vt_results(results, observable, ioc_type)
 
         # return as a list of dictionaries or a DataFrame
@@ -395,8 +417,17 @@ class VTLookup:
             # validate the observable to avoid sending too much junk to VT
             pp_observable = self._validate_observable(observable, ioc_type, idx)
 
+            cached_result = (
+                self._get_cached_result(pp_observable.observable, ioc_type)
+                if pp_observable.observable
+                else None
+            )
+            if cached_result is not None:
+                self._parse_vt_results(
+                    cached_result, pp_observable.observable, ioc_type, idx
+                )
             # if the observable is valid, add it to the submission batch
-            if pp_observable.observable:
+            elif pp_observable.observable:
                 obs_batch.append(pp_observable.observable)
                 source_row_index[pp_observable.observable] = idx
                 batch_index += 1
@@ -439,6 +470,7 @@ class VTLookup:
                             1,
                         )
                 else:
+                    self._cache_vt_results(results, obs_batch, ioc_type)
                     # parse the results from the response
                     self._parse_vt_results(
                         results, obs_submit, ioc_type, idx, source_row_index, vt_param
@@ -774,6 +806,52 @@ class VTLookup:
 
         self.results = new_results
 
+    def _get_cached_result(self, observable: str, ioc_type: str) -> Optional[dict]:
+        """Return the cached VT response for `observable` (if any)."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._CACHE_PROVIDER, ioc_type, None, observable)
+
+    def _cache_vt_results(self, vt_results: Any, observables: List[str], ioc_type: str):
+        """
+        Add the VT responses for each of the `observables` to the cache.
+
+        Parameters
+        ----------
+        vt_results : Any
+            Raw results from VT (a single result or a list of results
+            for a batch submission)
+        observables : List[str]
+            The observables that were submitted
+        ioc_type : str
+            The IoC type of the observables
+
+        """
+        if self.cache is None:
+            return
+        if isinstance(vt_results, str):
+            try:
+                vt_results = json.loads(vt_results, strict=False)
+            except (JSONDecodeError, TypeError):
+                return
+        if isinstance(vt_results, dict):
+            vt_results = [vt_results]
+        if not isinstance(vt_results, list) or len(vt_results) != len(observables):
+            return
+        self.cache.set_many(
+            self._CACHE_PROVIDER,
+            (
+                (
+                    (ioc_type, None, observable),
+                    result,
+                    result.get("response_code") == 0,
+                )
+                for observable, result in zip(observables, vt_results)
+                if isinstance(result, dict)
+                and result.get("response_code") in self._CACHEABLE_RESPONSE_CODES
+            ),
+        )
+
     def _vt_submit_request(
         self, submission_string: str, vt_param: VTParams
     ) -> Tuple[Optional[Dict[Any, Any]], int]:
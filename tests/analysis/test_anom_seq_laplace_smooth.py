@@ -145,6 +145,19 @@ class TestLaplaceSmooth(unittest.TestCase):
         self.assertDictEqual(seq1_ls_actual, self.data3["seq1_counts_ls"])
         self.assertDictEqual(seq2_ls_actual, self.data3["seq2_counts_ls"])
 
+    def test_laplace_smooth_cmd_counts_input_unchanged(self):
+        seq1_counts = dict(self.data1["seq1_counts"])
+        seq2_counts = {key: dict(val) for key, val in self.data1["seq2_counts"].items()}
+        laplace_smooth.laplace_smooth_cmd_counts(
+            seq1_counts=self.data1["seq1_counts"],
+            seq2_counts=self.data1["seq2_counts"],
+            start_token=START_TOKEN,
+            end_token=END_TOKEN,
+            unk_token=UNK_TOKEN,
+        )
+        self.assertDictEqual(self.data1["seq1_counts"], seq1_counts)
+        self.assertDictEqual(self.data1["seq2_counts"], seq2_counts)
+
     def test_laplace_smooth_param_counts(self):
         (
             param_ls_actual,
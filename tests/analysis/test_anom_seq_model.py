@@ -1,6 +1,15 @@
+import tempfile
 import unittest
+from pathlib import Path
 
-from msticpy.analysis.anomalous_sequence.utils.data_structures import Cmd
+import numpy as np
+
+from msticpy.analysis.anomalous_sequence.utils import (
+    cmds_only,
+    cmds_params_only,
+    cmds_params_values,
+)
+from msticpy.analysis.anomalous_sequence.utils.data_structures import Cmd, StateMatrix
 from msticpy.analysis.anomalous_sequence.model import Model
 from msticpy.common.exceptions import MsticpyException
 
@@ -169,6 +178,190 @@ class TestModel(unittest.TestCase):
         self.assertTrue(3 in model.rare_window_likelihoods_geo)
         self.assertTrue(3 in model.rare_windows_geo)
 
+    def test_scores_match_window_functions(self):
+        cases = [
+            (self.sessions1, cmds_only, {}),
+            (self.sessions2, cmds_params_only, {"param_cond_cmd_probs": None}),
+            (
+                self.sessions3,
+                cmds_params_values,
+                {
+                    "param_cond_cmd_probs": None,
+                    "value_cond_param_probs": None,
+                    "modellable_params": None,
+                },
+            ),
+        ]
+        for sessions, module, extra_args in cases:
+            model = Model(sessions=sessions)
+            model.train()
+            kwargs = {arg: getattr(model, arg) for arg in extra_args}
+            for use_tokens in (True, False):
+                model.compute_likelihoods_of_sessions(use_start_end_tokens=use_tokens)
+                for ses, lik in zip(sessions, model.session_likelihoods):
+                    expected = module.compute_likelihood_window(
+                        window=ses,
+                        prior_probs=model.prior_probs,
+                        trans_probs=model.trans_probs,
+                        use_start_token=use_tokens,
+                        use_end_token=use_tokens,
+                        start_token=model.start_token,
+                        end_token=model.end_token,
+                        **kwargs,
+                    )
+                    self.assertAlmostEqual(lik, expected, places=12)
+
+                for window_len in (1, 2, 3, 4):
+                    model.compute_rarest_windows(
+                        window_len=window_len,
+                        use_start_end_tokens=use_tokens,
+                        use_geo_mean=True,
+                    )
+                    for idx, ses in enumerate(sessions):
+                        window, lik = module.rarest_window_session(
+                            session=ses,
+                            prior_probs=model.prior_probs,
+                            trans_probs=model.trans_probs,
+                            window_len=window_len,
+                            use_start_end_tokens=use_tokens,
+                            start_token=model.start_token,
+                            end_token=model.end_token,
+                            use_geo_mean=True,
+                            **kwargs,
+                        )
+                        self.assertListEqual(
+                            model.rare_windows_geo[window_len][idx], window
+                        )
+                        if np.isnan(lik):
+                            self.assertTrue(
+                                np.isnan(
+                                    model.rare_window_likelihoods_geo[window_len][idx]
+                                )
+                            )
+                        else:
+                            self.assertAlmostEqual(
+                                model.rare_window_likelihoods_geo[window_len][idx],
+                                lik,
+                                places=12,
+                            )
+
+    def test_long_session_geomean(self):
+        long_session = ["Set-Mailbox"] * 3000
+        model = Model(sessions=self.sessions1)
+        model.train()
+        model.sessions = [long_session]
+        model.compute_likelihoods_of_sessions(use_start_end_tokens=True)
+        model.compute_geomean_lik_of_sessions()
+        # the product of the probabilities underflows but the geomean does not
+        self.assertEqual(model.session_likelihoods[0], 0)
+        self.assertLess(model.session_log_likelihoods[0], -1000)
+        self.assertGreater(model.session_geomean_likelihoods[0], 0)
+        self.assertAlmostEqual(
+            model.session_geomean_likelihoods[0],
+            np.exp(model.session_log_likelihoods[0] / len(long_session)),
+        )
+
+    def test_partial_fit(self):
+        for sessions in [self.sessions1, self.sessions2, self.sessions3]:
+            full_model = Model(sessions=sessions)
+            full_model.train()
+            model = Model(sessions=sessions[:1])
+            model.train()
+            model.partial_fit(sessions[1:])
+            self.assertListEqual(model.sessions, sessions)
+            self.assertEqual(
+                _probs_as_dict(model), _probs_as_dict(full_model), sessions
+            )
+            # partial_fit before train counts the existing sessions first
+            model = Model(sessions=sessions[:1])
+            model.partial_fit(sessions[1:])
+            self.assertEqual(_probs_as_dict(model), _probs_as_dict(full_model))
+
+        model = Model(sessions=self.sessions1)
+        model.train()
+        self.assertRaises(MsticpyException, lambda: model.partial_fit([]))
+        self.assertRaises(MsticpyException, lambda: model.partial_fit(self.sessions2))
+
+    def test_train_n_jobs(self):
+        for sessions in [self.sessions1, self.sessions2, self.sessions3]:
+            full_model = Model(sessions=sessions)
+            full_model.train()
+            model = Model(sessions=sessions)
+            model.train(n_jobs=2)
+            self.assertEqual(_probs_as_dict(model), _probs_as_dict(full_model))
+            self.assertEqual(model.modellable_params, full_model.modellable_params)
+
+    def test_save_load(self):
+        for sessions in [self.sessions1, self.sessions2, self.sessions3]:
+            model = Model(sessions=sessions)
+            model.train()
+            model.compute_scores(use_start_end_tokens=True)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                model_path = Path(tmp_dir).joinpath("model")
+                model.save(model_path)
+                for mmap in [True, False]:
+                    loaded = Model.load(model_path, sessions=sessions, mmap=mmap)
+                    self.assertEqual(loaded.session_type, model.session_type)
+                    self.assertEqual(loaded.modellable_params, model.modellable_params)
+                    trans_keys = loaded._saved_tables.tables["trans_probs"][0]
+                    self.assertEqual(isinstance(trans_keys, np.memmap), mmap)
+                    loaded.compute_scores(use_start_end_tokens=True)
+                    self.assertListEqual(
+                        loaded.session_likelihoods, model.session_likelihoods
+                    )
+                    self.assertDictEqual(loaded.rare_windows, model.rare_windows)
+                    # the scores are computed without restoring the dicts
+                    self.assertIsNone(loaded.__dict__["trans_probs"])
+                    self.assertIsNone(loaded.__dict__["_seq1_counts"])
+                    self.assertEqual(_probs_as_dict(loaded), _probs_as_dict(model))
+
+                # a loaded model can be updated with new sessions
+                loaded = Model.load(model_path)
+                self.assertListEqual(loaded.sessions, [])
+                loaded.partial_fit(sessions)
+                full_model = Model(sessions=sessions + sessions)
+                full_model.train()
+                self.assertEqual(_probs_as_dict(loaded), _probs_as_dict(full_model))
+
+                self.assertRaises(
+                    MsticpyException,
+                    lambda: Model.load(
+                        model_path,
+                        sessions=self.sessions1
+                        if sessions is not self.sessions1
+                        else self.sessions2,
+                    ),
+                )
+                self.assertRaises(MsticpyException, lambda: Model.load(Path(tmp_dir)))
+
+        model = Model(sessions=self.sessions1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertRaises(MsticpyException, lambda: model.save(tmp_dir))
+
+
+def _probs_as_dict(model: Model) -> dict:
+    """Return the probabilities of the model as plain (rounded) dicts."""
+
+    def _as_dict(probs):
+        if probs is None:
+            return None
+        if isinstance(probs, (dict, StateMatrix)):
+            states = probs.states if isinstance(probs, StateMatrix) else probs
+            return {key: _as_dict(val) for key, val in states.items()}
+        return round(probs, 12)
+
+    return {
+        attr: _as_dict(getattr(model, attr))
+        for attr in [
+            "prior_probs",
+            "trans_probs",
+            "param_probs",
+            "param_cond_cmd_probs",
+            "value_probs",
+            "value_cond_param_probs",
+        ]
+    }
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -258,6 +258,47 @@ class TestSessionize(unittest.TestCase):
 
         assert_frame_equal(actual, self.df3_sessionized, check_dtype=False)
 
+    def test_create_session_col_max_session_time(self):
+        data = pd.DataFrame(
+            {
+                "UserId": ["a"] * 50 + ["b"] * 5,
+                "time": list(
+                    pd.date_range("2020-01-03 00:00:00", periods=50, freq="1min")
+                )
+                + list(pd.date_range("2020-01-03 00:10:00", periods=5, freq="1min")),
+                "operation": ["A"] * 55,
+            }
+        )
+        actual = sessionize.create_session_col(
+            data=data.sample(frac=1, random_state=1),
+            user_identifier_cols=["UserId"],
+            time_col="time",
+            max_session_time_mins=20,
+            max_event_separation_mins=2,
+        )
+        self.assertListEqual(
+            actual["session_ind"].tolist(), [0] * 21 + [1] * 21 + [2] * 8 + [3] * 5
+        )
+
+        actual = sessionize.sessionize_data(
+            data=data,
+            user_identifier_cols=["UserId"],
+            time_col="time",
+            max_session_time_mins=20,
+            max_event_separation_mins=2,
+            event_col="operation",
+        )
+        self.assertListEqual(actual["number_events"].tolist(), [21, 21, 8, 5])
+        self.assertListEqual(actual["UserId"].tolist(), ["a", "a", "a", "b"])
+        self.assertListEqual(
+            actual["duration"].tolist(),
+            [pd.to_timedelta(20, "min")] * 2
+            + [
+                pd.to_timedelta(7, "min"),
+                pd.to_timedelta(4, "min"),
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
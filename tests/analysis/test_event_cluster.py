@@ -5,6 +5,7 @@
 # --------------------------------------------------------------------------
 """Event cluster test class."""
 import os
+from math import log10
 import unittest
 
 import pandas as pd
@@ -17,6 +18,7 @@ from msticpy.analysis.eventcluster import (
     dbcluster_events,
     delim_count,
     delim_count_df,
+    HDBSCAN,
     delim_hash,
     token_count,
     token_count_df,
@@ -122,3 +124,142 @@ class TestEventCluster(unittest.TestCase):
         self.assertEqual(out_df3["ClusterId"].max(), 31)
         self.assertEqual(out_df3["ClusterSize"].min(), 1)
         self.assertEqual(len(out_df3[out_df3["ClusterId"] == -1]), 89)
+
+    def test_process_features_parity(self):
+        test_df = pd.DataFrame(
+            {
+                "NewProcessName": [
+                    "C:\\Windows\\System32\\cmd.exe",
+                    "",
+                    "C:\\Program Files\\Ünïcode\\app.exe",
+                    "C:\\Windows\\System32\\cmd.exe",
+                    None,
+                ],
+                "CommandLine": [
+                    'cmd.exe /c "echo hello & dir"',
+                    "",
+                    "app.exe -x:€ --opt=1",
+                    'cmd.exe /c "echo hello & dir"',
+                    None,
+                ],
+                "SubjectLogonId": ["0x3e7", "0x1", "-1", "0x3e7", "0x2"],
+            }
+        )
+        out_df = add_process_features(input_frame=test_df, path_separator="\\")
+        self.assertListEqual(
+            list(out_df.columns),
+            [
+                "NewProcessName",
+                "CommandLine",
+                "SubjectLogonId",
+                "processName",
+                "pathScore",
+                "pathLogScore",
+                "pathHash",
+                "commandlineLen",
+                "commandlineLogLen",
+                "commandlineTokensFull",
+                "commandlineScore",
+                "commandlineTokensHash",
+                "isSystemSession",
+            ],
+        )
+        proc_names = out_df["NewProcessName"]
+        cmd_lines = out_df["CommandLine"]
+        self.assertListEqual(
+            out_df["processName"].tolist(),
+            [name.split("\\")[-1] for name in proc_names],
+        )
+        self.assertListEqual(
+            out_df["pathScore"].tolist(), [char_ord_score(val) for val in proc_names]
+        )
+        self.assertListEqual(
+            out_df["pathHash"].tolist(), [crc32_hash(val) for val in proc_names]
+        )
+        self.assertListEqual(
+            out_df["commandlineLen"].tolist(), [len(val) for val in cmd_lines]
+        )
+        self.assertListEqual(
+            out_df["commandlineTokensFull"].tolist(),
+            [delim_count(val) for val in cmd_lines],
+        )
+        self.assertListEqual(
+            out_df["commandlineScore"].tolist(),
+            [char_ord_score(val) for val in cmd_lines],
+        )
+        self.assertListEqual(
+            out_df["commandlineTokensHash"].tolist(),
+            [delim_hash(val) for val in cmd_lines],
+        )
+        self.assertEqual(out_df["pathLogScore"].iloc[1], 0)
+        self.assertAlmostEqual(
+            out_df["commandlineLogLen"].iloc[0], log10(len(cmd_lines.iloc[0]))
+        )
+
+    def test_clustering_dedupe_backend(self):
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        cluster_columns = ["pathHash", "commandlineTokensHash", "isSystemSession"]
+
+        full_df, full_model, _ = dbcluster_events(
+            data=out_df,
+            cluster_columns=cluster_columns,
+            time_column="TimeGenerated",
+            max_cluster_distance=0.001,
+        )
+        dedup_df, dedup_model, x_norm = dbcluster_events(
+            data=out_df,
+            cluster_columns=cluster_columns,
+            time_column="TimeGenerated",
+            max_cluster_distance=0.001,
+            backend="dedupe",
+        )
+        pd.testing.assert_frame_equal(full_df, dedup_df)
+        self.assertEqual(len(dedup_model.labels_), len(x_norm))
+        self.assertListEqual(dedup_model.labels_.tolist(), full_model.labels_.tolist())
+        self.assertListEqual(
+            dedup_model.core_sample_indices_.tolist(),
+            full_model.core_sample_indices_.tolist(),
+        )
+
+    def test_clustering_backends(self):
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        cluster_columns = ["pathScore", "commandlineTokensFull", "isSystemSession"]
+
+        with self.assertRaises(ValueError):
+            dbcluster_events(
+                data=out_df, cluster_columns=cluster_columns, backend="kmeans"
+            )
+
+        ball_tree_df, _, _ = dbcluster_events(
+            data=out_df,
+            cluster_columns=cluster_columns,
+            time_column="TimeGenerated",
+            max_cluster_distance=0.0001,
+            algorithm="ball_tree",
+            n_jobs=2,
+        )
+        self.assertEqual(len(ball_tree_df), 62)
+        self.assertEqual(ball_tree_df["ClusterSize"].max(), 71)
+
+        if HDBSCAN is not None:
+            hdb_df, hdb_model, _ = dbcluster_events(
+                data=out_df,
+                cluster_columns=cluster_columns,
+                time_column="TimeGenerated",
+                max_cluster_distance=0.0001,
+                backend="hdbscan",
+            )
+            self.assertIsInstance(hdb_model, HDBSCAN)
+            self.assertEqual(hdb_df["ClusterSize"].sum(), len(out_df))
+
+    def test_clustering_ndarray(self):
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        x_input = out_df[
+            ["pathScore", "commandlineTokensFull", "isSystemSession"]
+        ].values.astype(float)
+
+        clus_df, _, _ = dbcluster_events(
+            data=x_input, cluster_columns=[0, 1], max_cluster_distance=0.0001
+        )
+        self.assertEqual(clus_df["ClusterSize"].sum(), len(x_input))
+        self.assertTrue(clus_df["FirstEventTime"].isna().all())
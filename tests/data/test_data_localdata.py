@@ -8,10 +8,20 @@ import unittest
 from pathlib import Path
 
 import pandas as pd
+import pytest
+import pytest_check as check
 
 from msticpy.data.data_providers import QueryProvider
+from msticpy.data.drivers.local_data_driver import LocalDataDriver
 from ..unit_test_lib import get_test_data_path
 
+try:
+    import pyarrow  # noqa: F401 pylint: disable=unused-import
+
+    _PYARROW_IMP_OK = True
+except ImportError:
+    _PYARROW_IMP_OK = False
+
 
 class TestLocalDataQuery(unittest.TestCase):
     """Test class for local data provider."""
@@ -66,3 +76,91 @@ class TestLocalDataQuery(unittest.TestCase):
             d_frame = qry_func(**qry_params)
             self.assertIsInstance(d_frame, pd.DataFrame)
             self.assertGreaterEqual(len(d_frame), 1)
+
+
+_LOGONS_PKL = Path(get_test_data_path()) / "localdata" / "host_logons.pkl"
+_START = "2019-02-12 04:40:00"
+_END = "2019-02-12 04:50:00"
+
+
+def _check_filtered(data, logons_df):
+    """Check the data is the time range and column subset of logons_df."""
+    in_range = logons_df[
+        (logons_df["TimeGenerated"] >= _START) & (logons_df["TimeGenerated"] <= _END)
+    ]
+    check.equal(list(data.columns), ["TimeGenerated", "Account"])
+    check.equal(len(data), len(in_range))
+    check.is_true(0 < len(data) < len(logons_df))
+
+
+def test_local_data_filter_and_cache(tmp_path):
+    """Test column and time range filtering of pickle and csv files."""
+    logons_df = pd.read_pickle(_LOGONS_PKL)
+    logons_df.to_csv(tmp_path / "host_logons.csv", index=False)
+    logons_df.to_pickle(tmp_path / "host_logons_2.pkl")
+    driver = LocalDataDriver(data_paths=[str(tmp_path)])
+
+    for query in ("host_logons.csv", "host_logons_2.pkl"):
+        data = driver.query(
+            query, columns=["TimeGenerated", "Account"], time_range=(_START, _END)
+        )
+        _check_filtered(data, logons_df)
+        check.equal(len(driver.query(query)), len(logons_df))
+
+    csv_df = driver.query("host_logons.csv")
+    check.is_true(pd.api.types.is_datetime64_any_dtype(csv_df["TimeGenerated"]))
+    # results are copies of the cached data
+    csv_df["Account"] = "changed"
+    check.not_equal(driver.query("host_logons.csv")["Account"].iloc[0], "changed")
+
+    # changed files are re-read
+    logons_df.iloc[:5].to_pickle(tmp_path / "host_logons_2.pkl")
+    check.equal(len(driver.query("host_logons_2.pkl")), 5)
+
+
+def test_local_data_unparsed_time(tmp_path):
+    """Test time range filtering of a CSV with unparseable TimeGenerated values."""
+    logons_df = pd.read_pickle(_LOGONS_PKL)
+    bad_times_df = logons_df.astype({"TimeGenerated": str})
+    bad_times_df.loc[bad_times_df.index[0], "TimeGenerated"] = "not a time"
+    bad_times_df.to_csv(tmp_path / "host_logons.csv", index=False)
+    driver = LocalDataDriver(data_paths=[str(tmp_path)])
+
+    data = driver.query("host_logons.csv")
+    check.is_false(pd.api.types.is_datetime64_any_dtype(data["TimeGenerated"]))
+    data = driver.query(
+        "host_logons.csv",
+        columns=["TimeGenerated", "Account"],
+        time_range=(_START, _END),
+    )
+    _check_filtered(data, logons_df.iloc[1:])
+
+
+@pytest.mark.skipif(not _PYARROW_IMP_OK, reason="pyarrow not installed")
+def test_local_data_parquet_feather(tmp_path):
+    """Test reading Parquet and Feather files."""
+    logons_df = pd.read_pickle(_LOGONS_PKL)
+    logons_df.to_parquet(tmp_path / "host_logons.parquet", row_group_size=5)
+    logons_df.to_feather(tmp_path / "host_logons.feather")
+    driver = LocalDataDriver(data_paths=[str(tmp_path)])
+    check.equal(set(driver.data_files), {"host_logons.parquet", "host_logons.feather"})
+
+    for query in driver.data_files:
+        data = driver.query(query)
+        check.equal(data.shape, logons_df.shape)
+        data = driver.query(
+            query, columns=["TimeGenerated", "Account"], time_range=(_START, _END)
+        )
+        _check_filtered(data, logons_df)
+    # timezone-aware time range
+    data = driver.query(
+        "host_logons.parquet",
+        columns=["TimeGenerated", "Account"],
+        time_range=(pd.Timestamp(_START, tz="UTC"), None),
+    )
+    check.equal(len(data), (logons_df["TimeGenerated"] >= _START).sum())
+
+    schema = driver.schema
+    for query in driver.data_files:
+        check.equal(len(schema[query]), logons_df.shape[1])
+        check.equal(schema[query]["TimeGenerated"], "datetime64[ns]")
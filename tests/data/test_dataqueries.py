@@ -6,6 +6,8 @@
 """dataprovider query test class."""
 import contextlib
 import io
+import threading
+import time
 import unittest
 import warnings
 from datetime import datetime
@@ -14,9 +16,12 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, Optional, Tuple, Union
 
 import pandas as pd
+import pytest
 import pytest_check as check
-from msticpy.common.exceptions import MsticpyException
+from msticpy.common.exceptions import MsticpyDataQueryError, MsticpyException
+from msticpy.data import data_providers
 from msticpy.data.data_providers import DriverBase, QueryContainer, QueryProvider
+from msticpy.data.query_cache import QueryCache
 from msticpy.data.query_source import QuerySource
 
 from ..unit_test_lib import get_test_data_path
@@ -413,6 +418,16 @@ class TestDataQuery(unittest.TestCase):
 
 _LOCAL_DATA_PATHS = [str(get_test_data_path().joinpath("localdata"))]
 
+_PYARROW_IMP_OK = False
+try:
+    # pylint: disable=unused-import
+    import pyarrow
+
+    del pyarrow
+    _PYARROW_IMP_OK = True
+except ImportError:
+    pass
+
 
 def test_add_provider():
     """Test adding connection instance to provider."""
@@ -433,8 +448,40 @@ def test_add_provider():
     multi_results = local_prov.Azure.list_all_signins_geo()
     # verify len of result is 2x single_result
     check.equal(single_results.shape[0] * 2, multi_results.shape[0])
-    # verify columns/schema is the same.
-    check.equal(list(single_results.columns), list(multi_results.columns))
+    # verify columns/schema is the same (plus the connection column).
+    check.equal(
+        [*single_results.columns, "QueryConnection"], list(multi_results.columns)
+    )
+    check.equal(
+        multi_results["QueryConnection"].value_counts().to_dict(),
+        {"Default": single_results.shape[0], "SecondInst": single_results.shape[0]},
+    )
+    check.equal(local_prov.connection_stats["Status"].tolist(), ["OK", "OK"])
+
+
+def test_add_provider_failures():
+    """Test multi-connection queries with failed connections."""
+    qry_prov, driver = _get_split_provider()
+    qry_prov.add_connection(alias="Second")
+    qry_prov.add_connection(alias="Third")
+    failed = qry_prov._additional_connections["Second"]
+    failed.throttle_count = 100
+
+    results = qry_prov.exec_query("test query")
+    check.equal(results["QueryConnection"].unique().tolist(), ["Default", "Third"])
+    check.equal(len(results), 4)
+    stats = qry_prov.connection_stats.set_index("Connection")
+    check.equal(stats.loc["Default", "Status"], "OK")
+    check.equal(stats.loc["Default", "Rows"], 2)
+    check.greater(stats.loc["Default", "Seconds"], 0)
+    check.is_in("Failed:", stats.loc["Second", "Status"])
+    check.equal(stats.loc["Second", "Rows"], 0)
+
+    # all connections fail
+    driver.throttle_count = 100
+    qry_prov._additional_connections["Third"].throttle_count = 100
+    with pytest.raises(MsticpyDataQueryError):
+        qry_prov.exec_query("test query 2")
 
 
 def test_query_prov_properties():
@@ -459,3 +506,158 @@ def test_query_prov_properties():
     check.is_in("M365D", data_envs)
     check.is_in("LocalData", data_envs)
     check.is_in("ResourceGraph", data_envs)
+
+
+class _SplitQueryDriver(UTDataDriver):
+    """Test driver recording concurrent queries."""
+
+    def __init__(self, **kwargs):
+        """Initialize new instance."""
+        super().__init__(**kwargs)
+        self.active = 0
+        self.max_active = 0
+        self.throttled: Dict[str, int] = {}
+        self.throttle_count = 0
+        self.query_count = 0
+        self._lock = threading.Lock()
+
+    def query(
+        self, query: str, query_source: QuerySource = None, **kwargs
+    ) -> Union[pd.DataFrame, Any]:
+        """Return a unique row and a row duplicated in each slice."""
+        del query_source, kwargs
+        with self._lock:
+            self.query_count += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            throttle = self.throttled.get(query, 0) < self.throttle_count
+            if throttle:
+                self.throttled[query] = self.throttled.get(query, 0) + 1
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if throttle:
+            raise MsticpyDataQueryError("Query failed: 429 Too Many Requests")
+        return pd.DataFrame(
+            {
+                "TimeGenerated": pd.to_datetime(["2021-01-01", "2021-01-02"]),
+                "query": [query, "boundary"],
+            }
+        )
+
+
+def _get_split_provider(query_cache=None, **kwargs):
+    """Return provider with the split query test driver."""
+    driver = _SplitQueryDriver(**kwargs)
+    driver.connect("testuri")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        return (
+            QueryProvider(
+                data_environment="LogAnalytics",
+                driver=driver,
+                query_cache=query_cache,
+            ),
+            driver,
+        )
+
+
+def test_split_queries_concurrent(monkeypatch):
+    """Test split queries run on a thread pool."""
+    monkeypatch.setattr(data_providers, "_RETRY_BACKOFF", 0)
+    qry_prov, driver = _get_split_provider()
+    start = datetime.utcnow() - pd.Timedelta("5H")
+    end = datetime.utcnow() + pd.Timedelta("5min")
+    queries = qry_prov.all_queries.list_alerts(
+        "print", start=start, end=end, split_query_by="1H"
+    ).split("\n\n")
+
+    result = qry_prov.all_queries.list_alerts(
+        start=start, end=end, split_query_by="1H", max_workers=3
+    )
+    check.equal(driver.max_active, 3)
+    # results are in time order and the duplicated boundary row is removed
+    check.equal(result["query"].tolist(), [queries[0], "boundary", *queries[1:]])
+
+    driver.max_active = 0
+    result = qry_prov.all_queries.list_alerts(
+        start=start, end=end, split_query_by="1H", split_query_dedup=False
+    )
+    check.equal(driver.max_active, 1)
+    check.equal(len(result), 10)
+
+    # driver concurrency limit
+    driver.max_active = 0
+    driver.max_concurrent_queries = 2
+    qry_prov.all_queries.list_alerts(
+        start=start, end=end, split_query_by="1H", max_workers=8
+    )
+    check.equal(driver.max_active, 2)
+
+    # throttled sub-queries are retried
+    driver.throttle_count = 2
+    result = qry_prov.all_queries.list_alerts(
+        start=start, end=end, split_query_by="1H", max_workers=4
+    )
+    check.equal(len(result), 6)
+    check.equal(set(driver.throttled.values()), {2})
+
+    driver.throttled = {}
+    with pytest.raises(MsticpyDataQueryError):
+        qry_prov.all_queries.list_alerts(
+            start=start,
+            end=end,
+            split_query_by="1H",
+            max_workers=4,
+            split_query_retries=1,
+        )
+
+
+@pytest.mark.skipif(not _PYARROW_IMP_OK, reason="pyarrow not installed")
+def test_query_cache(tmp_path):
+    """Test query results are cached."""
+    qry_prov, driver = _get_split_provider(query_cache=QueryCache(cache_path=tmp_path))
+    start = datetime(2021, 1, 1)
+    end = datetime(2021, 1, 2)
+    result = qry_prov.SecurityAlert.list_alerts(start=start, end=end)
+    check.equal(driver.query_count, 1)
+    cached = qry_prov.SecurityAlert.list_alerts(start=start, end=end)
+    check.equal(driver.query_count, 1)
+    pd.testing.assert_frame_equal(result, cached)
+    # string datetimes are also absolute
+    qry_prov.SecurityAlert.list_alerts(start="2021-01-01", end="2021-01-02")
+    check.equal(driver.query_count, 1)
+
+    # per-call overrides
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end, cache=False)
+    check.equal(driver.query_count, 2)
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end, refresh=True)
+    check.equal(driver.query_count, 3)
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end)
+    check.equal(driver.query_count, 3)
+
+    # different query text
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end, add_query_items="| take 1")
+    check.equal(driver.query_count, 4)
+
+    # relative times are not reused
+    for _ in range(2):
+        qry_prov.SecurityAlert.list_alerts(start=-1, end=0)
+    check.equal(driver.query_count, 6)
+    qry_prov.SecurityAlert.list_alerts()
+    qry_prov.SecurityAlert.list_alerts()
+    check.equal(driver.query_count, 8)
+
+    # split queries
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end, split_query_by="6H")
+    check.equal(driver.query_count, 12)
+    split_result = qry_prov.SecurityAlert.list_alerts(
+        start=start, end=end, split_query_by="6H"
+    )
+    check.equal(driver.query_count, 12)
+    check.equal(len(split_result), 5)
+
+    # different connection
+    qry_prov.add_connection(alias="Second")
+    qry_prov.SecurityAlert.list_alerts(start=start, end=end)
+    check.equal(driver.query_count, 13)
@@ -0,0 +1,104 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Query cache test class."""
+import os
+import time
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from msticpy.data.query_cache import QueryCache
+
+__author__ = "Ian Hellen"
+
+_PYARROW_IMP_OK = False
+try:
+    # pylint: disable=unused-import
+    import pyarrow
+
+    del pyarrow
+    _PYARROW_IMP_OK = True
+except ImportError:
+    pass
+
+pytestmark = pytest.mark.skipif(not _PYARROW_IMP_OK, reason="pyarrow not installed")
+
+
+def _get_test_df(rows=10):
+    return pd.DataFrame(
+        {
+            "TimeGenerated": pd.date_range("2021-01-01", periods=rows, freq="1H"),
+            "Computer": [f"host{idx}" for idx in range(rows)],
+            "Count": list(range(rows)),
+        }
+    )
+
+
+def test_query_cache(tmp_path):
+    """Test storing and retrieving results."""
+    cache = QueryCache(cache_path=tmp_path)
+    key = QueryCache.make_key("KqlDriver", "workspace1", "SecurityAlert | take 10")
+    check.not_equal(
+        key, QueryCache.make_key("KqlDriver", "workspace2", "SecurityAlert | take 10")
+    )
+    check.is_none(cache.get(key))
+
+    data = _get_test_df()
+    check.is_true(cache.set(key, data))
+    pd.testing.assert_frame_equal(cache.get(key), data)
+    check.greater(cache.size, 0)
+
+    # new instance using the same folder
+    cache2 = QueryCache(cache_path=tmp_path)
+    pd.testing.assert_frame_equal(cache2.get(key), data)
+
+    cache.delete(key)
+    check.is_none(cache2.get(key))
+
+    # data that cannot be stored as parquet is not cached
+    bad_data = pd.DataFrame({"col": [{"a": 1}, "str"]})
+    check.is_false(cache.set(key, bad_data))
+    check.is_none(cache.get(key))
+
+    cache.set(key, data)
+    cache.clear()
+    check.equal(cache.size, 0)
+
+
+def test_query_cache_ttl(tmp_path):
+    """Test expired results are ignored."""
+    cache = QueryCache(cache_path=tmp_path, ttl=60)
+    key = QueryCache.make_key("drv", "con", "query")
+    cache.set(key, _get_test_df())
+    check.is_not_none(cache.get(key))
+
+    cache_file = tmp_path.joinpath(f"{key}.parquet")
+    old_time = time.time() - 120
+    os.utime(cache_file, (old_time, old_time))
+    check.is_none(cache.get(key))
+    check.is_false(cache_file.exists())
+
+
+def test_query_cache_lru(tmp_path):
+    """Test least recently used results are evicted."""
+    cache = QueryCache(cache_path=tmp_path, max_size_mb=None)
+    keys = [QueryCache.make_key("drv", "con", f"query{idx}") for idx in range(4)]
+    for idx, key in enumerate(keys):
+        cache.set(key, _get_test_df(100 + idx))
+        # give each result a distinct access time
+        cache_file = tmp_path.joinpath(f"{key}.parquet")
+        os.utime(cache_file, (time.time() - 100 + idx, time.time()))
+    # access the first result so that it is most recently used
+    check.is_not_none(cache.get(keys[0]))
+
+    file_size = tmp_path.joinpath(f"{keys[0]}.parquet").stat().st_size
+    cache.max_size = file_size * 3.5
+    cache.set(QueryCache.make_key("drv", "con", "new"), _get_test_df(100))
+    check.is_not_none(cache.get(keys[0]))
+    check.is_none(cache.get(keys[1]))
+    check.is_none(cache.get(keys[2]))
+    check.is_not_none(cache.get(keys[3]))
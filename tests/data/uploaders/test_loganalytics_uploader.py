@@ -5,13 +5,16 @@
 # --------------------------------------------------------------------------
 """Tests for the LogAnlaytics Uploader class."""
 
+import json
 from pathlib import Path
 from unittest.mock import patch
 import pytest
+import pytest_check as check
 
 from httpx import Response
 import pandas as pd
 
+from msticpy.data.uploaders import loganalytics_uploader
 from msticpy.data.uploaders.loganalytics_uploader import LAUploader
 from msticpy.common.exceptions import MsticpyConnectionError
 
@@ -61,8 +64,9 @@ def test_folder_upload(mock_put, la_uploader):
 
 
 @patch("httpx.post")
-def test_upload_fails(mock_put, la_uploader):
+def test_upload_fails(mock_put, la_uploader, monkeypatch):
     """Check upload failure."""
+    monkeypatch.setattr(loganalytics_uploader, "_RETRY_BACKOFF", 0)
     response = Response(503)
     mock_put.return_value = response
     data_path = Path(_TEST_DATA).joinpath("syslog_data.csv")
@@ -70,3 +74,48 @@ def test_upload_fails(mock_put, la_uploader):
     with pytest.raises(MsticpyConnectionError) as err:
         la_uploader.upload_df(data, "test")
         assert "LogAnalytics data upload failed with code 503" in str(err.value)
+
+
+def test_json_chunks():
+    """Check DataFrame is split into JSON chunks below the size limit."""
+    data = pd.read_csv(Path(_TEST_DATA).joinpath("syslog_data.csv"))
+    max_bytes = 20000
+    chunks = list(loganalytics_uploader._get_json_chunks(data, max_bytes))
+    check.greater(len(chunks), 1)
+    check.is_true(all(len(chunk.encode("utf-8")) <= max_bytes for chunk in chunks))
+    records = [record for chunk in chunks for record in json.loads(chunk)]
+    check.equal(records, data.astype(str).to_dict(orient="records"))
+    check.equal(list(loganalytics_uploader._get_json_chunks(data.iloc[:0], 10)), [])
+
+
+@patch("httpx.post")
+def test_df_upload_chunked(mock_put, monkeypatch):
+    """Check concurrent upload of chunks with retries."""
+    monkeypatch.setattr(loganalytics_uploader, "_MAX_BODY_BYTES", 20000)
+    monkeypatch.setattr(loganalytics_uploader, "_RETRY_BACKOFF", 0)
+    responses = {}
+
+    def _post(uri, content, headers, timeout):
+        del uri, timeout
+        check.equal(headers["Log-Type"], "test_table")
+        # throttle the first attempt for each chunk
+        attempts = responses.setdefault(content, 0)
+        responses[content] = attempts + 1
+        return Response(429 if not attempts else 200)
+
+    mock_put.side_effect = _post
+    la_uploader = LAUploader(workspace="1234", workspace_secret="password")
+    data = pd.read_csv(Path(_TEST_DATA).joinpath("syslog_data.csv"))
+    la_uploader.upload_df(data, "test_table")
+    check.greater(len(responses), 1)
+    check.is_true(all(attempts == 2 for attempts in responses.values()))
+    uploaded = sum(len(json.loads(content)) for content in responses)
+    check.equal(uploaded, len(data))
+
+    # client errors are not retried
+    mock_put.side_effect = None
+    mock_put.return_value = Response(403)
+    mock_put.reset_mock()
+    with pytest.raises(MsticpyConnectionError):
+        la_uploader.upload_df(data.iloc[:10], "test_table")
+    check.equal(mock_put.call_count, 1)
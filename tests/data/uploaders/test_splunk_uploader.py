@@ -4,9 +4,13 @@
 # license information.
 # --------------------------------------------------------------------------
 """Tests for the Splunk Uploader class."""
+import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from unittest.mock import MagicMock
 import pytest
+import pytest_check as check
 import pandas as pd
 
 from msticpy.data.uploaders.splunk_uploader import SplunkUploader
@@ -50,6 +54,7 @@ def sp_upload():
 
 def test_df_upload(sp_upload):
     """Test DataFrame upload."""
+    check.equal(sp_upload.upload_mode, "submit")
     data_file = Path(_TEST_DATA).joinpath("syslog_data.csv")
     data = pd.read_csv(data_file, parse_dates=["TimeGenerated"])
     sp_upload.upload_df(data, index_name="test_upload", table_name="test_upload")
@@ -98,3 +103,94 @@ def test_not_connected(sp_upload):
         sp_upload.upload_file(
             data_file, index_name="test_upload", table_name="test_upload"
         )
+
+
+class _RecordingIndex:
+    """Splunk index that records the uploaded events."""
+
+    def __init__(self):
+        self.sent = []
+        self.submitted = []
+        self._lock = threading.Lock()
+
+    def submit(self, data, sourcetype, host):
+        """Record a submitted event."""
+        with self._lock:
+            self.submitted.append((sourcetype, host, data))
+
+    @contextmanager
+    def attached_socket(self, sourcetype, host):
+        """Return a socket that records the data sent."""
+        sock = MagicMock()
+
+        def _sendall(data):
+            with self._lock:
+                self.sent.append((sourcetype, host, data))
+
+        sock.sendall.side_effect = _sendall
+        yield sock
+
+
+@pytest.fixture
+def rec_upload(monkeypatch):
+    """Return SplunkUploader and the index that it uploads to."""
+    index = _RecordingIndex()
+    sp_upload = SplunkUploader(  # nosec
+        host="test",
+        username="test",
+        password="[PLACEHOLDER]",
+        connect=False,
+        upload_mode="stream",
+        batch_size=20,
+    )
+    monkeypatch.setattr(sp_upload, "_load_index", lambda *args: index)
+    sp_upload.connected = True
+    return sp_upload, index
+
+
+def test_df_upload_stream(rec_upload):
+    """Test DataFrame upload in batches of events."""
+    sp_upload, index = rec_upload
+    data_file = Path(_TEST_DATA).joinpath("syslog_data.csv")
+    data = pd.read_csv(data_file, parse_dates=["TimeGenerated"])
+    sp_upload.upload_df(data, index_name="test_upload", table_name="test_table")
+
+    check.equal(len(index.sent), -(-len(data) // 20))
+    check.equal({sent[:2] for sent in index.sent}, {("test_table", "Upload")})
+    events = [
+        json.loads(line)
+        for _, _, batch in index.sent
+        for line in batch.decode("utf-8").splitlines()
+    ]
+    check.equal(len(events), len(data))
+    check.equal(events[0]["Computer"], data.iloc[0]["Computer"])
+    check.equal(pd.Timestamp(events[0]["TimeGenerated"]), data.iloc[0]["TimeGenerated"])
+    check.equal(index.submitted, [])
+
+    sp_upload.upload_mode = "submit"
+    sp_upload.upload_df(data.iloc[:5], index_name="test_upload", table_name="test")
+    check.equal(len(index.submitted), 5)
+
+    with pytest.raises(ValueError):
+        SplunkUploader(  # nosec
+            host="test",
+            username="test",
+            password="[PLACEHOLDER]",
+            connect=False,
+            upload_mode="hec",
+        )
+
+
+def test_folder_upload_concurrent(rec_upload):
+    """Test all files in a folder are uploaded to the correct sourcetype."""
+    sp_upload, index = rec_upload
+    data_folder = Path(_TEST_DATA).joinpath("uploader")
+    sp_upload.upload_folder(data_folder, index_name="test_upload", glob="*.csv")
+
+    for file_path in data_folder.glob("*.csv"):
+        n_events = sum(
+            len(batch.splitlines())
+            for sourcetype, _, batch in index.sent
+            if sourcetype == file_path.stem
+        )
+        check.equal(n_events, len(pd.read_csv(file_path)))
@@ -4,12 +4,14 @@
 # license information.
 # --------------------------------------------------------------------------
 """Base64unpack test class."""
+import tempfile
 import unittest
 from os import path
 
 import pandas as pd
 
 from msticpy.sectools import base64unpack as b64
+from msticpy.sectools.base64_cache import DecodeCache
 
 from ..unit_test_lib import TEST_DATA_PATH
 
@@ -91,9 +93,98 @@ class TestB64Unpack(unittest.TestCase):
             self.assertEqual(result_df.shape, (16, 15))
             self.assertIsNotNone(result_df)
 
+            result_df = b64.unpack_df(data=input_df, column="input", n_jobs=2)
+            self.assertEqual(result_df.shape, (16, 15))
+            self.assertListEqual(sorted(result_df["src_index"].unique()), [0, 1])
+
         except FileNotFoundError as ex:
             self.fail(msg="Exception {}".format(str(ex)))
 
+    def test_unpack_df_dedup(self):
+        FILE_NAME = path.join(TEST_DATA_PATH, "base64msg.txt")
+        with open(FILE_NAME, "r") as f_handle:
+            input_txt = f_handle.read()
+        input_df = pd.DataFrame(
+            data=[input_txt, "no encoded data", input_txt, input_txt],
+            columns=["input"],
+            index=[10, 11, 12, 13],
+        )
+        _, single_df = b64.unpack(input_string=input_txt)
+        result_df = input_df.mp_b64.extract(column="input")
+        self.assertEqual(result_df.shape, (single_df.shape[0] * 3, 15))
+        self.assertListEqual(sorted(result_df["src_index"].unique()), [10, 12, 13])
+        for _, src_rows in result_df.groupby("src_index"):
+            self.assertListEqual(
+                list(src_rows["reference"]), list(single_df["reference"])
+            )
+
+        result_df = b64.unpack_df(data=input_df.iloc[[1]], column="input")
+        self.assertEqual(result_df.shape[0], 0)
+
+    def test_decode_cache(self):
+        FILE_NAME = path.join(TEST_DATA_PATH, "base64msg.txt")
+        with open(FILE_NAME, "r") as f_handle:
+            input_txt = f_handle.read()
+        undecodable = "cmd " + "B" * 33
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = path.join(tmp_dir, "b64_cache.db")
+            b64.enable_decode_cache(cache_path=cache_path)
+            try:
+                result_str, result_df = b64.unpack(input_string=input_txt)
+                b64.unpack(input_string=undecodable)
+                decode_cache = b64._GET_CACHE()
+                self.assertGreater(decode_cache.misses, 0)
+                self.assertEqual(decode_cache.hits, 0)
+                self.assertTrue(path.isfile(cache_path))
+
+                # new cache instance (e.g. new session) reads from same db
+                b64.enable_decode_cache(cache_path=cache_path)
+                cached_str, cached_df = b64.unpack(input_string=input_txt)
+                decode_cache = b64._GET_CACHE()
+                self.assertGreater(decode_cache.hits, 0)
+                self.assertEqual(cached_str, result_str)
+                self.assertEqual(cached_df.shape, result_df.shape)
+                self.assertListEqual(
+                    list(cached_df["sha256"]), list(result_df["sha256"])
+                )
+                self.assertTrue(decode_cache.is_undecodable("B" * 33))
+
+                # size-based eviction
+                b64.enable_decode_cache(cache_path=cache_path, max_size_mb=0)
+                b64.unpack(input_string=input_txt)
+                self.assertEqual(b64._GET_CACHE()._total_size, 0)
+            finally:
+                b64.disable_decode_cache(clear=True)
+        self.assertIsNone(b64._GET_CACHE())
+
+    def test_decode_cache_storage(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            decode_cache = DecodeCache(path.join(tmp_dir, "b64_cache.db"), 1000)
+            results = {"[zip]": {"input_bytes": b"\x00\xff", "file_hashes": {}}}
+            decode_cache.put("key1", results)
+            # results are stored as JSON, with bytes encoded as base64
+            stored = decode_cache.conn.execute(
+                "SELECT results FROM b64_decoded"
+            ).fetchone()[0]
+            self.assertIn("AP8=", stored)
+            self.assertEqual(decode_cache.get("key1"), (True, results))
+
+            # replacing an item does not add to the total size
+            total_size = decode_cache._total_size
+            decode_cache.put("key1", results)
+            self.assertEqual(decode_cache._total_size, total_size)
+
+            # undecodable items are included in size and evicted
+            for idx in range(200):
+                decode_cache.put(f"undecodable_{idx}", None)
+            self.assertLessEqual(decode_cache._total_size, 1000)
+            row_count = decode_cache.conn.execute(
+                "SELECT COUNT(*) FROM b64_decoded"
+            ).fetchone()[0]
+            self.assertLess(row_count, 200)
+            self.assertFalse(decode_cache.get("key1")[0])
+            decode_cache.conn.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -50,3 +50,17 @@ def test_resolver_funcs():
     result = domain_utils.url_components("http://www.microsoft.com")
     check.equal(result["scheme"], "http")
     check.equal(result["host"], "www.microsoft.com")
+
+
+def test_validate_tld_cache():
+    """Test TLD validation and cache statistics."""
+    test_dom_val = domain_utils.DomainValidator()
+    check.is_true(test_dom_val.validate_tld("www.microsoft.com"))
+    hits = test_dom_val.tld_cache_info().hits
+    check.is_true(test_dom_val.validate_tld("WWW.Contoso.COM"))
+    check.greater(test_dom_val.tld_cache_info().hits, hits)
+    check.is_true(test_dom_val.validate_tld("bbc.co.uk"))
+    check.is_true(test_dom_val.validate_tld("foo.xn--p1ai"))
+    check.is_true(test_dom_val.validate_tld("https://www.microsoft.com/path"))
+    check.is_false(test_dom_val.validate_tld("www.contoso.garbage"))
+    check.is_false(test_dom_val.validate_tld("192.168.0.1"))
@@ -9,12 +9,15 @@ from pathlib import Path
 import socket
 
 import nbformat
+import pandas as pd
 import pytest
 import pytest_check as check
 
+from geoip2.errors import AddressNotFoundError
 from nbconvert.preprocessors import CellExecutionError, ExecutePreprocessor
 
 from msticpy.sectools.geoip import GeoLiteLookup, IPStackLookup
+from msticpy.sectools.ip_range_index import GeoLiteDfLookup
 
 from ..unit_test_lib import custom_mp_config, get_test_data_path
 
@@ -132,3 +135,104 @@ def test_ipstack_lookup():
         check.equal(len(loc_result), len(ips))
         for ip_entity in ip_entities:
             check.is_not_none(ip_entity.Location)
+
+
+_CITY_RECORDS = {
+    "1.1.1.1": {
+        "country": {"iso_code": "AU", "names": {"en": "Australia"}},
+        "subdivisions": [{"names": {"en": "Queensland"}}],
+        "city": {"names": {"en": "Brisbane"}},
+        "location": {"longitude": 153.0, "latitude": -27.5},
+    },
+    "8.8.8.8": {
+        "country": {"iso_code": "US", "names": {"en": "United States"}},
+        "location": {"longitude": -97.8, "latitude": 37.8},
+    },
+}
+_ASN_RECORDS = {
+    "8.8.8.8": {
+        "autonomous_system_number": 15169,
+        "autonomous_system_organization": "GOOGLE",
+    }
+}
+
+
+class _FakeMMDBReader:
+    """Stand-in for a geoip2/maxminddb reader."""
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = 0
+
+    def get(self, ip_address):
+        self.calls += 1
+        if ip_address == "not_an_ip":
+            raise ValueError(ip_address)
+        return self.records.get(ip_address)
+
+    def city(self, ip_address):
+        record = self.get(ip_address)
+        if record is None:
+            raise AddressNotFoundError(ip_address)
+        return type("City", (), {"raw": record})
+
+
+def _get_offline_geolite(tmp_path, city_reader, asn_reader=None):
+    """Return GeoLiteLookup with fake DB readers."""
+    ip_location = GeoLiteLookup(api_key="test", db_folder=str(tmp_path))
+    ip_location._reader = city_reader
+    ip_location._df_lookup = GeoLiteDfLookup(str(tmp_path.joinpath("city.mmdb")))
+    ip_location._df_lookup._city_source = city_reader
+    ip_location._df_lookup._asn_source = asn_reader
+    return ip_location
+
+
+def test_geoiplite_lookup_ip_cache(tmp_path):
+    """Test that repeated IPs are only read from the DB once."""
+    city_reader = _FakeMMDBReader(_CITY_RECORDS)
+    ip_location = _get_offline_geolite(tmp_path, city_reader)
+
+    ips = ["1.1.1.1", "8.8.8.8", "1.1.1.1", "10.0.0.1", "10.0.0.1", "1.1.1.1"]
+    loc_result, ip_entities = ip_location.lookup_ip(ip_addr_list=ips)
+    check.equal(city_reader.calls, 3)
+    check.equal(len(loc_result), 4)
+    check.equal(len(ip_entities), 4)
+    check.equal(ip_entities[0].Location.City, "Brisbane")
+
+
+def test_geoiplite_lookup_ips_df(tmp_path):
+    """Test DataFrame lookup of IP addresses."""
+    city_reader = _FakeMMDBReader(_CITY_RECORDS)
+    asn_reader = _FakeMMDBReader(_ASN_RECORDS)
+    ip_location = _get_offline_geolite(tmp_path, city_reader, asn_reader)
+
+    ips = pd.Series(["1.1.1.1", " 8.8.8.8", "1.1.1.1", "10.0.0.1", "not_an_ip"] * 10)
+    results = ip_location.lookup_ips_df(ips)
+    check.equal(city_reader.calls, 4)
+    check.equal(len(results), 4)
+    check.equal(
+        list(results.columns),
+        [
+            "IpAddress",
+            "CountryCode",
+            "CountryName",
+            "State",
+            "City",
+            "Longitude",
+            "Latitude",
+            "ASN",
+            "ASNOrganization",
+        ],
+    )
+    results = results.set_index("IpAddress")
+    check.equal(results.loc["1.1.1.1", "State"], "Queensland")
+    check.equal(results.loc["1.1.1.1", "Latitude"], -27.5)
+    check.is_true(pd.isna(results.loc["1.1.1.1", "ASN"]))
+    check.equal(results.loc["8.8.8.8", "CountryName"], "United States")
+    check.is_none(results.loc["8.8.8.8", "City"])
+    check.equal(results.loc["8.8.8.8", "ASNOrganization"], "GOOGLE")
+    check.is_none(results.loc["10.0.0.1", "CountryCode"])
+    check.is_none(results.loc["not_an_ip", "CountryCode"])
+
+    single = ip_location.lookup_ips_df("8.8.8.8")
+    check.equal(single.iloc[0]["CountryCode"], "US")
@@ -1,4 +1,7 @@
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pandas as pd
 
@@ -65,6 +68,17 @@ class TestIoCExtractor(unittest.TestCase):
         self.__run_extract(self.extractor, "domain_neg", {"dns": 0})
         self.__run_extract(self.extractor, "domain_short", {"dns": 1})
 
+    def test_required_substring(self):
+        extractor = IoCExtract()
+        extractor.add_ioc_type("cve", r"CVE-\d{4}-\d{4,7}", 0, required="CVE-")
+        self.assertEqual(extractor.ioc_types["cve"].required, "CVE-")
+        results = extractor.extract("patch for CVE-2021-44228 and cve-2021-45046")
+        self.assertEqual(len(results["cve"]), 2)
+        # required substring check is case-sensitive
+        results = extractor.extract("patch for cve-2021-45046")
+        self.assertEqual(len(results["cve"]), 0)
+        del extractor.ioc_types["cve"]
+
     def test_dataframe(self):
 
         input_df = pd.DataFrame.from_dict(
@@ -195,6 +209,131 @@ class TestIoCExtractor(unittest.TestCase):
         self.assertEqual(output_df[output_df["IoCType"] == "sha1_hash"].shape[0], 0)
         self.assertEqual(output_df[output_df["IoCType"] == "sha256_hash"].shape[0], 0)
 
+    def test_dataframe_columnar(self):
+
+        input_df = pd.DataFrame.from_dict(
+            data=TEST_CASES, orient="index", columns=["input"]
+        )
+        # repeat input rows to exercise de-duplication of cell values
+        input_df = pd.concat([input_df] * 5)
+        row_df = self.extractor.extract_df(
+            data=input_df, columns=["input"], include_paths=True
+        )
+        col_df = self.extractor.extract_df(
+            data=input_df, columns=["input"], include_paths=True, columnar=True
+        )
+
+        self.assertListEqual(list(col_df.columns), list(row_df.columns))
+        self.assertEqual(col_df.shape, row_df.shape)
+        self.assertEqual(col_df[col_df["IoCType"] == "ipv4"].shape[0], 15)
+        self.assertEqual(col_df[col_df["IoCType"] == "windows_path"].shape[0], 30)
+
+        def _result_set(results):
+            return set(
+                results[["IoCType", "Observable", "SourceIndex"]].itertuples(
+                    index=False
+                )
+            )
+
+        self.assertSetEqual(_result_set(col_df), _result_set(row_df))
+
+        ioc_types = ["ipv4", "url", "md5_hash"]
+        row_df = self.extractor.extract_df(
+            data=input_df, columns="input", ioc_types=ioc_types
+        )
+        col_df = input_df.mp_ioc.extract(
+            columns=["input"], ioc_types=ioc_types, columnar=True
+        )
+        # the columnar engine scans every decoded URL from the start so
+        # may find additional hosts not found by the row-based engine
+        self.assertTrue(_result_set(row_df) <= _result_set(col_df))
+
+    def test_dataframe_columnar_no_matches(self):
+
+        input_df = pd.DataFrame({"input": ["nothing to see here", None, "x"]})
+        output_df = self.extractor.extract_df(
+            data=input_df, columns=["input"], columnar=True
+        )
+        self.assertEqual(output_df.shape[0], 0)
+        self.assertListEqual(
+            list(output_df.columns), ["IoCType", "Observable", "SourceIndex", "Input"]
+        )
+
+    def test_dataframe_parallel(self):
+
+        input_df = pd.DataFrame.from_dict(
+            data=TEST_CASES, orient="index", columns=["input"]
+        )
+        input_df = pd.concat([input_df] * 3)
+        expected_df = self.extractor.extract_df(
+            data=input_df, columns=["input"], include_paths=True
+        )
+        expected = expected_df[["IoCType", "Observable", "SourceIndex"]]
+
+        for columnar in (False, True):
+            output_df = self.extractor.extract_df(
+                data=input_df,
+                columns=["input"],
+                include_paths=True,
+                n_jobs=2,
+                columnar=columnar,
+            )
+            self.assertEqual(output_df.shape, expected_df.shape)
+            self.assertSetEqual(
+                set(output_df[expected.columns].itertuples(index=False)),
+                set(expected.itertuples(index=False)),
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            output_df = input_df.mp_ioc.extract(
+                columns=["input"], include_paths=True, executor=executor, chunk_size=5
+            )
+        self.assertEqual(output_df.shape, expected_df.shape)
+
+    def test_extract_stream(self):
+
+        input_df = pd.DataFrame.from_dict(
+            data=TEST_CASES, orient="index", columns=["input"]
+        ).reset_index()
+        expected_df = self.extractor.extract_df(data=input_df, columns="input")
+
+        chunks = (
+            input_df.iloc[i : i + 5] for i in range(0, len(input_df), 5)  # noqa: E203
+        )
+        results = list(self.extractor.extract_stream(chunks, columns="input"))
+        self.assertGreater(len(results), 1)
+        self.assertEqual(pd.concat(results).shape, expected_df.shape)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_file = Path(tmp_dir).joinpath("iocs.csv")
+            input_df.to_csv(csv_file, index=False)
+            json_file = Path(tmp_dir).joinpath("iocs.jsonl")
+            input_df.to_json(json_file, orient="records", lines=True)
+            for src_file in (csv_file, str(json_file)):
+                output_df = pd.concat(
+                    self.extractor.extract_stream(
+                        src_file, columns=["input"], file_chunk_size=4, columnar=True
+                    )
+                )
+                self.assertEqual(output_df.shape, expected_df.shape)
+                self.assertSetEqual(
+                    set(output_df["SourceIndex"]), set(expected_df["SourceIndex"])
+                )
+            # chunk_size is passed to extract_df (rows per worker)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                output_df = pd.concat(
+                    self.extractor.extract_stream(
+                        csv_file,
+                        columns=["input"],
+                        file_chunk_size=10,
+                        executor=executor,
+                        chunk_size=3,
+                    )
+                )
+            self.assertEqual(output_df.shape, expected_df.shape)
+            with self.assertRaises(ValueError):
+                next(self.extractor.extract_stream(f"{tmp_dir}/iocs.txt", "input"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,228 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""IP range index test class."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from msticpy.common.exceptions import MsticpyUserConfigError
+from msticpy.sectools import ip_utils
+from msticpy.sectools.geoip import GeoLiteLookup
+from msticpy.sectools.ip_range_index import (
+    IPRangeIndex,
+    _get_source_stamp,
+    asn_fields,
+    city_fields,
+    get_index_path,
+)
+
+__author__ = "Ian Hellen"
+
+# pylint: disable=protected-access, redefined-outer-name
+
+_CITY_NETWORKS = [
+    (
+        "1.1.1.0/24",
+        {
+            "country": {"iso_code": "AU", "names": {"en": "Australia"}},
+            "subdivisions": [{"names": {"en": "Queensland"}}],
+            "city": {"names": {"en": "Brisbane"}},
+            "location": {"longitude": 153.0, "latitude": -27.5},
+        },
+    ),
+    (
+        "8.8.8.0/24",
+        {
+            "country": {"iso_code": "US", "names": {"en": "United States"}},
+            "location": {"longitude": -97.8, "latitude": 37.8},
+        },
+    ),
+    (
+        "8.8.4.0/24",
+        {
+            "country": {"iso_code": "US", "names": {"en": "United States"}},
+            "location": {"longitude": -97.8, "latitude": 37.8},
+        },
+    ),
+    (
+        "2001:4860::/32",
+        {
+            "country": {"iso_code": "US", "names": {"en": "United States"}},
+            "location": {"longitude": -97.8, "latitude": 37.8},
+        },
+    ),
+]
+_ASN_NETWORKS = [
+    (
+        "8.8.8.0/24",
+        {
+            "autonomous_system_number": 15169,
+            "autonomous_system_organization": "GOOGLE",
+        },
+    ),
+    (
+        "2001:4860::/32",
+        {
+            "autonomous_system_number": 15169,
+            "autonomous_system_organization": "GOOGLE",
+        },
+    ),
+]
+_CITY_COLS = ["CountryCode", "CountryName", "State", "City", "Longitude", "Latitude"]
+_ASN_COLS = ["ASN", "ASNOrganization"]
+
+
+@pytest.fixture
+def city_index():
+    """Return an index of the test City networks."""
+    return IPRangeIndex.from_records(_CITY_NETWORKS, _CITY_COLS, city_fields)
+
+
+def test_index_lookup(city_index):
+    """Test lookups of IPv4 and IPv6 addresses."""
+    check.equal(len(city_index), 4)
+    # the US networks share a record
+    check.equal(len(city_index.records), 2)
+
+    ips = ["8.8.8.8", "1.1.1.255", "1.1.2.0", "2001:4860::8888", "::1", "x", "8.8.4.4"]
+    results = city_index.lookup(ips)
+    check.equal(list(results.columns), ["IpAddress", *_CITY_COLS])
+    check.equal(results["IpAddress"].tolist(), ips)
+    check.equal(
+        results["CountryCode"].tolist(), ["US", "AU", None, "US", None, None, "US"]
+    )
+    check.equal(results.loc[1, "City"], "Brisbane")
+    check.equal(results.loc[1, "Latitude"], -27.5)
+    check.is_true(pd.isna(results.loc[2, "Latitude"]))
+
+
+def test_index_from_csv():
+    """Test building the index from a CSV export."""
+    asn_df = pd.DataFrame(
+        {
+            "network": ["1.1.1.0/24", "8.8.8.0/24", "2001:4860::/32"],
+            "autonomous_system_number": [13335, 15169, 15169],
+            "autonomous_system_organization": ["CLOUDFLARENET", "GOOGLE", "GOOGLE"],
+        }
+    )
+    asn_index = IPRangeIndex.from_csv(asn_df)
+    results = asn_index.lookup(["1.1.1.1", "2001:4860::1", "9.9.9.9"])
+    check.equal(
+        results["autonomous_system_organization"].tolist(),
+        ["CLOUDFLARENET", "GOOGLE", None],
+    )
+    with pytest.raises(Exception):
+        IPRangeIndex.from_csv(asn_df, network_col="cidr")
+
+
+def test_index_load_or_build(tmp_path, city_index, monkeypatch):
+    """Test saving and reloading the index next to the database."""
+    db_path = tmp_path.joinpath("GeoLite2-City.mmdb")
+    db_path.write_bytes(b"mmdb")
+    idx_path = get_index_path(db_path)
+    check.equal(idx_path.name, "GeoLite2-City.idx.npz")
+
+    city_index.source_stamp = _get_source_stamp(db_path)
+    city_index.save(idx_path)
+    built = []
+
+    def _from_mmdb(db_path, columns, record_fields):
+        built.append(db_path)
+        index = IPRangeIndex.from_records(_CITY_NETWORKS, columns, record_fields)
+        index.source_stamp = _get_source_stamp(db_path)
+        return index
+
+    monkeypatch.setattr(IPRangeIndex, "from_mmdb", _from_mmdb)
+    loaded = IPRangeIndex.load_or_build(db_path, _CITY_COLS, city_fields)
+    check.equal(built, [])
+    check.equal(loaded.records, city_index.records)
+    check.equal(loaded.lookup(["2001:4860::1"]).loc[0, "CountryName"], "United States")
+
+    # changing the database invalidates the saved index
+    db_path.write_bytes(b"new mmdb")
+    IPRangeIndex.load_or_build(db_path, _CITY_COLS, city_fields)
+    check.equal(len(built), 1)
+    check.equal(IPRangeIndex.load(idx_path).source_stamp, _get_source_stamp(db_path))
+
+
+def _save_test_index(db_path, networks, columns, record_fields):
+    """Create a dummy database with a saved index."""
+    db_path.write_bytes(b"mmdb")
+    index = IPRangeIndex.from_records(networks, columns, record_fields)
+    index.source_stamp = _get_source_stamp(db_path)
+    index.save(get_index_path(db_path))
+
+
+@pytest.fixture
+def geolite_index(tmp_path):
+    """Return GeoLiteLookup using the index engine."""
+    city_db = tmp_path.joinpath("GeoLite2-City.mmdb")
+    _save_test_index(city_db, _CITY_NETWORKS, _CITY_COLS, city_fields)
+    _save_test_index(
+        tmp_path.joinpath("GeoLite2-ASN.mmdb"), _ASN_NETWORKS, _ASN_COLS, asn_fields
+    )
+    ip_location = GeoLiteLookup(api_key="test", db_folder=str(tmp_path), engine="index")
+    ip_location._reader = object()
+    ip_location._db_path = str(city_db)
+    return ip_location
+
+
+def test_geolite_index_engine(geolite_index):
+    """Test GeoLiteLookup.lookup_ips_df with the index engine."""
+    ips = pd.Series(["1.1.1.1", "8.8.8.8", "1.1.1.1", "10.0.0.1"])
+    results = geolite_index.lookup_ips_df(ips).set_index("IpAddress")
+    check.equal(len(results), 3)
+    check.equal(results.loc["1.1.1.1", "State"], "Queensland")
+    check.is_true(pd.isna(results.loc["1.1.1.1", "ASN"]))
+    check.equal(results.loc["8.8.8.8", "ASN"], 15169)
+    check.equal(results.loc["8.8.8.8", "ASNOrganization"], "GOOGLE")
+    check.is_none(results.loc["10.0.0.1", "CountryCode"])
+
+    with pytest.raises(ValueError):
+        GeoLiteLookup(api_key="test", engine="tree")
+
+
+def test_whois_df_geolite(tmp_path, monkeypatch):
+    """Test get_whois_df with the geolite engine (using only the ASN DB)."""
+    asn_db = tmp_path.joinpath("GeoLite2-ASN.mmdb")
+    _save_test_index(asn_db, _ASN_NETWORKS, _ASN_COLS, asn_fields)
+    monkeypatch.setattr(
+        ip_utils, "GeoLiteLookup", lambda: SimpleNamespace(asn_db_path=str(asn_db))
+    )
+    monkeypatch.setattr(ip_utils, "_GET_ASN_INDEX", ip_utils._get_asn_index_lookup())
+    data = pd.DataFrame(
+        {"SrcIP": ["8.8.8.8", "10.0.0.1", "2001:4860::1", "8.8.8.8"]},
+        index=[10, 11, 12, 13],
+    )
+    results = ip_utils.get_whois_df(
+        data, ip_column="SrcIP", whois_col="WhoIsData", engine="geolite"
+    )
+    check.equal(list(results.index), [10, 11, 12, 13])
+    check.equal(
+        results["AsnDescription"].tolist(), ["GOOGLE", None, "GOOGLE", "GOOGLE"]
+    )
+    check.equal(
+        results.loc[10, "WhoIsData"], {"asn": "15169", "asn_description": "GOOGLE"}
+    )
+    check.equal(results.loc[11, "WhoIsData"], {})
+
+    all_cols = data.mp_whois.lookup(
+        ip_column="SrcIP", all_columns=True, engine="geolite"
+    )
+    check.equal(list(all_cols.columns), ["asn", "asn_description"])
+    check.equal(all_cols["asn"].tolist(), ["15169", None, "15169", "15169"])
+
+    with pytest.raises(ValueError):
+        ip_utils.get_whois_df(data, ip_column="SrcIP", engine="dns")
+
+    monkeypatch.setattr(
+        ip_utils, "GeoLiteLookup", lambda: SimpleNamespace(asn_db_path=None)
+    )
+    monkeypatch.setattr(ip_utils, "_GET_ASN_INDEX", ip_utils._get_asn_index_lookup())
+    with pytest.raises(MsticpyUserConfigError):
+        ip_utils.get_whois_df(data, ip_column="SrcIP", engine="geolite")
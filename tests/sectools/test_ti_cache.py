@@ -0,0 +1,115 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""TI cache test class."""
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from msticpy.sectools.tiproviders.ti_cache import (
+    FileTICache,
+    SQLiteTICache,
+    TICache,
+    get_ti_cache,
+)
+
+# pylint: disable=protected-access, redefined-outer-name
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def ti_cache(request, tmp_path):
+    """Return each type of cache."""
+    if request.param == "sqlite":
+        return SQLiteTICache(tmp_path.joinpath("ti_cache.db"))
+    return FileTICache(tmp_path.joinpath("ti_cache"))
+
+
+def test_cache_get_set(ti_cache):
+    """Test adding and retrieving results."""
+    result = {"ioc": "1.2.3.4", "result": True, "severity": np.int64(2)}
+    ti_cache.set("OTX", "ipv4", None, "1.2.3.4", result)
+    ti_cache.set("OTX", "ipv4", "geo", "1.2.3.4", {"result": False}, negative=True)
+
+    cached = ti_cache.get("OTX", "ipv4", None, "1.2.3.4")
+    assert cached == {"ioc": "1.2.3.4", "result": True, "severity": 2}
+    assert ti_cache.get("OTX", "ipv4", "geo", "1.2.3.4") == {"result": False}
+    assert ti_cache.get("XForce", "ipv4", None, "1.2.3.4") is None
+    assert ti_cache.get("OTX", "ipv4", None, "5.6.7.8") is None
+
+    keys = [("ipv4", None, "1.2.3.4"), ("ipv4", None, "5.6.7.8")]
+    assert list(ti_cache.get_many("OTX", keys)) == keys[:1]
+    assert ti_cache.stats["OTX"] == {"hits": 3, "misses": 2, "expired": 0, "writes": 2}
+    assert ti_cache.stats["XForce"]["misses"] == 1
+
+    ti_cache.reset_stats()
+    assert not ti_cache.stats
+    ti_cache.clear("OTX")
+    assert ti_cache.get("OTX", "ipv4", None, "1.2.3.4") is None
+
+
+def test_cache_ttl(ti_cache):
+    """Test that positive and negative results expire."""
+    ti_cache.ttl = 10
+    ti_cache.negative_ttl = 1
+    ti_cache.provider_ttl = {"XForce": 1}
+    ti_cache.set("OTX", "ipv4", None, "1.2.3.4", "positive")
+    ti_cache.set("OTX", "ipv4", None, "5.6.7.8", "negative", negative=True)
+    ti_cache.set("XForce", "ipv4", None, "1.2.3.4", "positive")
+    assert ti_cache.get_ttl("OTX") == 10
+    assert ti_cache.get_ttl("XForce") == 1
+    assert ti_cache.get_ttl("XForce", negative=True) == 1
+
+    now = time.time()
+    ti_cache._read_entries = _shift_time(ti_cache._read_entries, now - 5)
+    assert ti_cache.get("OTX", "ipv4", None, "1.2.3.4") == "positive"
+    assert ti_cache.get("OTX", "ipv4", None, "5.6.7.8") is None
+    assert ti_cache.get("XForce", "ipv4", None, "1.2.3.4") is None
+    assert ti_cache.stats["OTX"]["expired"] == 1
+    assert ti_cache.stats["XForce"]["expired"] == 1
+
+    # expired results are replaced by new results
+    ti_cache.set("OTX", "ipv4", None, "5.6.7.8", "positive")
+    assert ti_cache.get("OTX", "ipv4", None, "5.6.7.8") == "positive"
+
+
+def _shift_time(read_entries, created):
+    """Return `read_entries` with the created time of entries set to `created`."""
+
+    def _read_entries(provider, keys):
+        entries = read_entries(provider, keys)
+        return {
+            key: (value, negative, min(created, entry_created))
+            for key, (value, negative, entry_created) in entries.items()
+        }
+
+    return _read_entries
+
+
+def test_cache_shared(tmp_path):
+    """Test that results are visible to other cache instances."""
+    cache1 = SQLiteTICache(tmp_path.joinpath("ti_cache.db"))
+    cache2 = SQLiteTICache(tmp_path.joinpath("ti_cache.db"))
+    cache1.set("OTX", "dns", None, "contoso.com", [1, 2])
+    assert cache2.get("OTX", "dns", None, "contoso.com") == [1, 2]
+
+    file_cache1 = FileTICache(tmp_path.joinpath("ti_cache"))
+    file_cache2 = FileTICache(tmp_path.joinpath("ti_cache"))
+    file_cache1.set("OTX", "dns", None, "contoso.com", [1, 2])
+    assert file_cache2.get("OTX", "dns", None, "contoso.com") == [1, 2]
+    assert not list(tmp_path.joinpath("ti_cache").glob("**/*.tmp"))
+
+
+def test_get_ti_cache(tmp_path):
+    """Test creating caches from parameter values."""
+    assert get_ti_cache(None) is None
+    assert get_ti_cache(False) is None
+    file_cache = FileTICache(tmp_path.joinpath("ti_cache"))
+    assert get_ti_cache(file_cache) is file_cache
+    sqlite_cache = get_ti_cache(tmp_path.joinpath("ti_cache.db"))
+    assert isinstance(sqlite_cache, SQLiteTICache)
+    assert Path(sqlite_cache.path).is_file()
+    assert isinstance(get_ti_cache(str(tmp_path.joinpath("ti2.db"))), TICache)
@@ -4,15 +4,21 @@
 # license information.
 # --------------------------------------------------------------------------
 """TIProviders test class."""
+import asyncio
 import datetime as dt
 import io
+import json
 import random
 import string
+import tempfile
+import time
 import unittest
+import unittest.mock
 import warnings
 from contextlib import redirect_stdout
 from pathlib import Path
 
+import httpx
 import pandas as pd
 
 from msticpy.common import pkg_config
@@ -21,10 +27,23 @@ from msticpy.sectools.tiproviders import (
     get_provider_settings,
     preprocess_observable,
 )
+from msticpy.sectools.tiproviders.alienvault_otx import OTX
+from msticpy.sectools.tiproviders.greynoise import GreyNoise
+from msticpy.sectools.tiproviders.http_base import (
+    HttpProvider,
+    IoCLookupParams,
+    _TokenBucket,
+)
+from msticpy.sectools.tiproviders.open_page_rank import OPR
+from msticpy.sectools.tiproviders.ibm_xforce import XForce
+from msticpy.sectools.tiproviders.ti_cache import FileTICache
 from msticpy.sectools.tiproviders.ti_provider_base import (
     TISeverity,
     _clean_url,
+    dedup_items,
+    fan_out_results,
     generate_items,
+    run_coroutine,
 )
 from ..unit_test_lib import get_test_data_path, custom_mp_config
 
@@ -68,6 +87,21 @@ def mocked_session(*args, **kwargs):
     return mock_req_session()
 
 
+# This class will mock httpx.AsyncClient()
+class mock_async_session:
+    def __init__(self, **kwargs):
+        del kwargs
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        del args
+
+    async def get(self, *args, **kwargs):
+        return mock_req_session().get(*args, **kwargs)
+
+
 # This class will mock httpx.Client()
 class mock_req_session:
     def get(self, *args, **kwargs):
@@ -183,7 +217,7 @@ class mock_req_session:
                 },
             }
 
-            if "params" in kwargs:
+            if len(kwargs.get("params", {})) == 1:
                 mocked_result = {
                     "status_code": 200,
                     "response": [dom_responses["unknown.dom"]],
@@ -197,13 +231,17 @@ class mock_req_session:
                         break
                 return MockResponse(mocked_result, 200)
             else:
-                url_param_str = kwargs["url"].split("?", 1)[1]
-                url_params = url_param_str.split("&")
-                if len(url_params) > 100:
+                if "params" in kwargs:
+                    bulk_doms = list(kwargs["params"].values())
+                else:
+                    url_param_str = kwargs["url"].split("?", 1)[1]
+                    bulk_doms = [
+                        param.split("=")[1] for param in url_param_str.split("&")
+                    ]
+                if len(bulk_doms) > 100:
                     raise ValueError("Maximum of 100 items in bulk request")
                 rand_responses = []
-                for param in url_params:
-                    dom = param.split("=")[1]
+                for dom in bulk_doms:
                     rank = random.randint(1, 1000)
                     if bool(rank % 2):
                         dom_resp = {
@@ -464,6 +502,8 @@ class TestTIProviders(unittest.TestCase):
         ti_provider = ti_lookup.loaded_providers[provider_name]
         saved_session = ti_provider._httpx_client
         ti_provider._httpx_client = mock_req_session()
+        if hasattr(ti_provider, "_create_async_client"):
+            ti_provider._create_async_client = mock_async_session
 
         iocs = {
             "124.5.6.7": ("ipv4", None),
@@ -568,6 +608,7 @@ class TestTIProviders(unittest.TestCase):
 
         ti_provider = ti_lookup.loaded_providers["OPR"]
         ti_provider._httpx_client = mock_req_session()
+        ti_provider._create_async_client = mock_async_session
 
         n_requests = 250
         gen_doms = {self._generate_rand_domain(): "dns" for i in range(n_requests)}
@@ -726,3 +767,338 @@ class TestTIProviders(unittest.TestCase):
     #         )
 
     #     os.environ[pkg_config._CONFIG_ENV_VAR] = saved_env
+
+
+def _mock_transport_response(request):
+    """Return an httpx response from the mock_req_session responses."""
+    response = mock_req_session().get(
+        url=str(request.url), params=dict(request.url.params)
+    )
+    return httpx.Response(response.status_code, json=response.json_data)
+
+
+class TestTILookupAsync(unittest.TestCase):
+    """Unit tests for the concurrent TI lookups."""
+
+    def test_async_lookup_concurrency(self):
+        ti_provider = OTX(AuthKey="test", MaxConcurrency=3)
+        self.assertEqual(ti_provider.max_concurrency, 3)
+        in_flight = []
+        max_in_flight = []
+
+        class slow_async_session(mock_async_session):
+            async def get(self, *args, **kwargs):
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+                await asyncio.sleep(0.05)
+                in_flight.pop()
+                return mock_req_session().get(*args, **kwargs)
+
+        ti_provider._create_async_client = slow_async_session
+        iocs = ioc_ips + ioc_benign_iocs
+        results_df = ti_provider.lookup_iocs(data=iocs)
+
+        self.assertEqual(len(iocs), len(results_df))
+        self.assertListEqual(results_df["Ioc"].tolist(), iocs)
+        self.assertEqual(17, len(results_df[results_df["Result"]]))
+        self.assertEqual(3, max(max_in_flight))
+
+    def test_async_lookup_rate_limit(self):
+        ti_provider = OTX(AuthKey="test", RequestsPerMinute=600)
+        self.assertEqual(ti_provider.requests_per_minute, 600)
+        ti_provider._create_async_client = mock_async_session
+        start = time.perf_counter()
+        results_df = ti_provider.lookup_iocs(data=ioc_ips)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(ioc_ips), len(results_df))
+        # burst of 10 requests, then 10 per second
+        self.assertGreater(elapsed, (len(ioc_ips) - 10) / 10 * 0.9)
+
+        rate_limiter = _TokenBucket(rate=100, capacity=1)
+
+        async def _acquire_all():
+            for _ in range(11):
+                await rate_limiter.acquire()
+
+        start = time.perf_counter()
+        run_coroutine(_acquire_all())
+        self.assertGreater(time.perf_counter() - start, 0.09)
+
+    def test_tilookup_parallel_providers(self):
+        providers = [OTX(AuthKey="test"), XForce(ApiID="test", AuthKey="test")]
+        for ti_provider in providers:
+            ti_provider._create_async_client = lambda **kwargs: httpx.AsyncClient(
+                transport=httpx.MockTransport(_mock_transport_response)
+            )
+        ti_lookup = TILookup(primary_providers=providers)
+        iocs = ioc_ips + ioc_benign_iocs
+        results_df = ti_lookup.lookup_iocs(data=iter(iocs))
+
+        self.assertEqual(2 * len(iocs), len(results_df))
+        self.assertEqual(2 * 17, len(results_df[results_df["Result"]]))
+        for prov_name in ["OTX", "XForce"]:
+            prov_results = results_df[results_df["Provider"] == prov_name]
+            self.assertListEqual(prov_results["Ioc"].tolist(), iocs)
+
+        async def _lookup_in_running_loop():
+            # the synchronous lookup also works from inside an event loop
+            return ti_lookup.lookup_iocs(data=iocs[:2])
+
+        self.assertEqual(4, len(run_coroutine(_lookup_in_running_loop())))
+
+
+class TestTILookupCache(unittest.TestCase):
+    """Unit tests for caching of TI lookup results."""
+
+    def setUp(self):
+        self.requests = []
+
+        def _counting_transport(request):
+            self.requests.append(str(request.url))
+            return _mock_transport_response(request)
+
+        self.ti_provider = OTX(AuthKey="test")
+        self.ti_provider._create_async_client = lambda **kwargs: httpx.AsyncClient(
+            transport=httpx.MockTransport(_counting_transport)
+        )
+
+    def test_tilookup_cache_lookup_iocs(self):
+        ti_cache = FileTICache(self.id_path())
+        ti_lookup = TILookup(primary_providers=[self.ti_provider], cache=ti_cache)
+        iocs = ioc_ips + ioc_benign_iocs
+        results_df = ti_lookup.lookup_iocs(data=iocs[:10])
+        self.assertEqual(10, len(results_df))
+        self.assertEqual(10, len(self.requests))
+
+        # only the uncached items are sent to the provider
+        results_df = ti_lookup.lookup_iocs(data=iocs)
+        self.assertEqual(len(iocs), len(results_df))
+        self.assertEqual(len(iocs), len(self.requests))
+        self.assertListEqual(results_df["Ioc"].tolist(), iocs)
+        self.assertEqual(17, len(results_df[results_df["Result"]]))
+        self.assertIn("[cache hits: 10, misses: 20]", ti_lookup.provider_status[0])
+
+        # a new TILookup using the same cache does not query the provider
+        ti_lookup2 = TILookup(primary_providers=[self.ti_provider], cache=ti_cache)
+        results_df2 = ti_lookup2.lookup_iocs(data=iocs)
+        self.assertEqual(len(iocs), len(self.requests))
+        pd.testing.assert_frame_equal(
+            results_df.reset_index(drop=True), results_df2.reset_index(drop=True)
+        )
+
+    def test_tilookup_cache_lookup_ioc(self):
+        ti_lookup = TILookup(primary_providers=[self.ti_provider])
+        self.ti_provider._httpx_client = mock_req_session()
+        with unittest.mock.patch.object(
+            OTX, "lookup_ioc", wraps=self.ti_provider.lookup_ioc
+        ) as lookup_mock:
+            for _ in range(3):
+                result, details = ti_lookup.lookup_ioc(observable=ioc_ips[0])
+                self.assertTrue(result)
+                self.assertEqual(ioc_ips[0], details[0][1].ioc)
+            self.assertEqual(1, lookup_mock.call_count)
+        self.assertIn("[cache hits: 2, misses: 1]", ti_lookup.provider_status[0])
+
+        # caching can be disabled for a provider
+        self.ti_provider.cache_results = False
+        ti_lookup.lookup_iocs(data=ioc_ips[:2])
+        self.assertEqual(2, len(self.requests))
+        ti_lookup.lookup_iocs(data=ioc_ips[:2])
+        self.assertEqual(4, len(self.requests))
+
+    def id_path(self):
+        """Return a temporary folder for the test."""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        return tmp_dir.name
+
+
+class _BatchPostProvider(HttpProvider):
+    """Test provider with a POST batch endpoint."""
+
+    _BASE_URL = "https://batch.contoso.com"
+    _IOC_QUERIES = {
+        "ipv4": IoCLookupParams(
+            path="/lookup",
+            verb="POST",
+            json_body={"indicators": "{observables}", "key": "{API_KEY}"},
+            batch_size=3,
+        )
+    }
+
+    def parse_results(self, response):
+        if self._failed_response(response):
+            return False, TISeverity.information, "Not found."
+        return True, TISeverity.warning, response.raw_result
+
+
+class TestHttpProviderBatch(unittest.TestCase):
+    """Unit tests for HttpProvider batch endpoints."""
+
+    def setUp(self):
+        self.requests = []
+
+    def _mock_client(self, handler):
+        def _handler(request):
+            self.requests.append(request)
+            return handler(request)
+
+        return lambda **kwargs: httpx.AsyncClient(
+            transport=httpx.MockTransport(_handler)
+        )
+
+    def test_batch_get_lookup(self):
+        def _greynoise_multi(request):
+            ips = request.url.params["ips"].split(",")
+            # the last IP of each batch is missing from the response
+            return httpx.Response(
+                200,
+                json=[{"ip": ip, "noise": True, "code": "0x01"} for ip in ips[:-1]],
+            )
+
+        ti_provider = GreyNoise(AuthKey="test")
+        ti_provider._create_async_client = self._mock_client(_greynoise_multi)
+        iocs = [f"20.{idx // 250}.{idx % 250}.1" for idx in range(2500)]
+        iocs.append("10.0.0.1")
+        results_df = ti_provider.lookup_iocs(data=iocs, query_type="quick")
+
+        self.assertEqual(3, len(self.requests))
+        self.assertEqual("/v2/noise/multi/quick", self.requests[0].url.path)
+        self.assertListEqual(results_df["Ioc"].tolist(), iocs)
+        self.assertEqual(2497, results_df["Result"].sum())
+        not_found = results_df[~results_df["Result"]]
+        self.assertListEqual(
+            not_found["Ioc"].tolist(), [iocs[999], iocs[1999], iocs[2499], iocs[2500]]
+        )
+        self.assertEqual("Not found.", not_found["Details"].iloc[0])
+        # the private IP address is not sent
+        self.assertNotEqual(0, not_found["Status"].iloc[-1])
+        self.assertEqual(
+            {"ip": iocs[0], "noise": True, "code": "0x01"},
+            results_df["RawResult"].iloc[0],
+        )
+
+    def test_batch_post_lookup(self):
+        def _post_handler(request):
+            body = json.loads(request.content)
+            if "20.0.0.7" in body["indicators"]:
+                return httpx.Response(429)
+            return httpx.Response(
+                200, json=[{"indicator": ioc} for ioc in body["indicators"]]
+            )
+
+        ti_provider = _BatchPostProvider(AuthKey="test")
+        ti_provider._create_async_client = self._mock_client(_post_handler)
+        iocs = [f"20.0.0.{idx}" for idx in range(1, 9)]
+        results_df = ti_provider.lookup_iocs(data=iocs)
+
+        self.assertEqual(3, len(self.requests))
+        self.assertTrue(all(req.method == "POST" for req in self.requests))
+        self.assertDictEqual(
+            {"indicators": iocs[:3], "key": "test"},
+            json.loads(self.requests[0].content),
+        )
+        self.assertListEqual(results_df["Ioc"].tolist(), iocs)
+        self.assertListEqual(results_df["Result"].tolist(), [True] * 6 + [False] * 2)
+        self.assertListEqual(results_df["Status"].tolist(), [0] * 6 + [429] * 2)
+        self.assertEqual({"indicator": iocs[1]}, results_df["RawResult"].iloc[1])
+
+    def test_batch_single_lookup(self):
+        ti_provider = _BatchPostProvider(AuthKey="test")
+        ti_provider._httpx_client = httpx.Client(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json=[{"indicator": "x"}])
+            )
+        )
+        result = ti_provider.lookup_ioc("20.0.0.1")
+        self.assertTrue(result.result)
+        self.assertEqual({"indicator": "x"}, result.raw_result)
+
+    def test_substitute_batch_params(self):
+        ti_provider = OPR(AuthKey="test")
+        verb, req_params = ti_provider._substitute_parms(
+            "a.com", "dns", batch=["a.com", "b.com", "c.com"]
+        )
+        self.assertEqual("GET", verb)
+        self.assertDictEqual(
+            {"domains[0]": "a.com", "domains[1]": "b.com", "domains[2]": "c.com"},
+            req_params["params"],
+        )
+
+
+class TestTILookupDedup(unittest.TestCase):
+    """Unit tests for de-duplication of observables in TI lookups."""
+
+    def test_dedup_items(self):
+        data = pd.DataFrame(
+            {
+                "Ioc": ["1.2.3.4", " 1.2.3.4", "contoso.com", "", "1.2.3.4 "],
+                "Type": ["ipv4", "ipv4", None, "dns", "ipv4"],
+            },
+            index=[10, 11, 12, 13, 14],
+        )
+        items, unique_items = dedup_items(data, obs_col="Ioc", ioc_type_col="Type")
+        self.assertListEqual(items["SourceIndex"].tolist(), [10, 11, 12, 14])
+        self.assertListEqual(items["IocType"].tolist(), ["ipv4", "ipv4", "dns", "ipv4"])
+        self.assertListEqual(unique_items["Ioc"].tolist(), ["1.2.3.4", "contoso.com"])
+
+        # SourceIndex from an IoCExtract results DataFrame
+        items, _ = dedup_items(
+            data.assign(SourceIndex=[5, 5, 6, 7, 8]), obs_col="Ioc", ioc_type_col="Type"
+        )
+        self.assertListEqual(items["SourceIndex"].tolist(), [5, 5, 6, 8])
+
+        for iocs in (["1.2.3.4", "1.2.3.4"], iter(["1.2.3.4", "1.2.3.4"])):
+            items, unique_items = dedup_items(iocs)
+            self.assertListEqual(items["SourceIndex"].tolist(), [0, 1])
+            self.assertListEqual(items["IocType"].tolist(), ["ipv4", "ipv4"])
+            self.assertEqual(1, len(unique_items))
+
+        results = pd.DataFrame(
+            {"Ioc": ["1.2.3.4", "other"], "IocType": ["ipv4", "dns"], "Result": [1, 2]}
+        )
+        items, unique_items = dedup_items(["1.2.3.4", "1.2.3.4 "])
+        all_results = fan_out_results(results, items, unique_items)
+        self.assertListEqual(
+            all_results.columns.tolist(), ["Ioc", "IocType", "Result", "SourceIndex"]
+        )
+        self.assertListEqual(
+            all_results["Ioc"].tolist(), ["1.2.3.4", "1.2.3.4 ", "other"]
+        )
+        self.assertListEqual(all_results["Result"].tolist(), [1, 1, 2])
+        self.assertListEqual(all_results["SourceIndex"].tolist()[:2], [0, 1])
+        self.assertTrue(pd.isna(all_results["SourceIndex"].iloc[2]))
+
+    def test_tilookup_dedup(self):
+        requests = []
+
+        def _counting_transport(request):
+            requests.append(str(request.url))
+            return _mock_transport_response(request)
+
+        ti_provider = OTX(AuthKey="test")
+        ti_provider._create_async_client = lambda **kwargs: httpx.AsyncClient(
+            transport=httpx.MockTransport(_counting_transport)
+        )
+        ti_lookup = TILookup(primary_providers=[ti_provider], cache=False)
+        iocs = ioc_ips + ioc_benign_iocs
+        log_rows = pd.DataFrame(
+            {"SrcIp": [iocs[idx % len(iocs)] for idx in range(200)]},
+            index=range(1000, 1200),
+        )
+        results_df = ti_lookup.lookup_iocs(data=log_rows, obs_col="SrcIp")
+
+        self.assertEqual(len(iocs), len(requests))
+        self.assertEqual(len(log_rows), len(results_df))
+        self.assertListEqual(
+            results_df["SourceIndex"].tolist(), log_rows.index.tolist()
+        )
+        self.assertListEqual(results_df["Ioc"].tolist(), log_rows["SrcIp"].tolist())
+        self.assertEqual(170, results_df["Result"].sum())
+
+        # lookups directly from the provider are also de-duplicated
+        results_df = ti_provider.lookup_iocs(data=log_rows, obs_col="SrcIp")
+        self.assertEqual(2 * len(iocs), len(requests))
+        self.assertListEqual(
+            results_df["SourceIndex"].tolist(), log_rows.index.tolist()
+        )
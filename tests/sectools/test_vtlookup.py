@@ -4,9 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 """vtlookup test class."""
+import json
+import tempfile
 import unittest
 from os import path
+from unittest import mock
 
+import pandas as pd
+
+from msticpy.sectools.tiproviders.ti_cache import FileTICache
 from msticpy.sectools.tiproviders.ti_provider_base import preprocess_observable
 from msticpy.sectools.vtlookup import VTLookup
 
@@ -227,6 +233,39 @@ class TestVTLookup(unittest.TestCase):
         self.assertEqual(test_df[["Positives"]].values, 0)
         print(test_df.T)
 
+    def test_lookup_cache(self):
+        with open(path.join(TEST_DATA_PATH, "ip-address_pos.json"), "r") as file:
+            ip_response = json.load(file)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ti_cache = FileTICache(cache_dir)
+            vtlookup = VTLookup(vtkey="fake", verbosity=0, cache=ti_cache)
+            with mock.patch.object(
+                VTLookup, "_vt_submit_request", return_value=(ip_response, 200)
+            ) as submit_mock:
+                result = vtlookup.lookup_ioc("90.156.201.27", "ipv4")
+                self.assertEqual(1, submit_mock.call_count)
+
+                # a new instance using the same cache gets the cached response
+                vtlookup = VTLookup(vtkey="fake", verbosity=0, cache=ti_cache)
+                cached_result = vtlookup.lookup_ioc("90.156.201.27", "ipv4")
+                self.assertEqual(1, submit_mock.call_count)
+                self.assertEqual(result, cached_result)
+
+                vtlookup = VTLookup(vtkey="fake", verbosity=0, cache=ti_cache)
+                data = pd.DataFrame(
+                    {
+                        "Observable": ["90.156.201.27", "90.156.201.28"],
+                        "IoCType": "ipv4",
+                    }
+                )
+                results_df = vtlookup.lookup_iocs(data)
+                self.assertEqual(2, submit_mock.call_count)
+                self.assertEqual(2, len(results_df))
+                self.assertEqual(
+                    {"hits": 2, "misses": 2, "expired": 0, "writes": 2},
+                    ti_cache.stats["VTLookup"],
+                )
+
 
 if __name__ == "__main__":
     unittest.main()